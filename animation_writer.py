@@ -0,0 +1,220 @@
+from PIL import Image, GifImagePlugin
+import os
+import queue
+import threading
+
+
+class StreamedFrameSequence(Image.Image):
+    """
+    Multi-frame image whose frames are taken from an iterator as the encoder seeks through them. Lets the animated
+        WebP encoder of Pillow pull the frames one at a time instead of being handed a list of every frame.
+    """
+
+    def __init__(self, frames, n_frames: int):
+        """
+        Initializer for the StreamedFrameSequence.
+
+        Args:
+            frames: Iterator of RGB frames, all of the same size.
+            n_frames (int): Number of frames the iterator yields.
+        """
+        super().__init__()
+        self.frames = frames
+        self.n_frames = n_frames
+        self.is_animated = n_frames > 1
+        self.frame_index = -1
+        self.seek(0)
+
+    def seek(self, frame: int):
+        """
+        Moves to the next frame. The frames can only be read in order, seeking back keeps the current frame.
+
+        Args:
+            frame (int): Index of the frame.
+
+        Returns:
+            None
+
+        """
+        while self.frame_index < frame:
+            frame_image = next(self.frames)
+            self.im = frame_image.im
+            self._mode = frame_image.mode
+            self._size = frame_image.size
+            self.frame_index += 1
+
+    def tell(self):
+        return self.frame_index
+
+
+class AnimationWriter:
+    """
+    Encodes the rendered frames into an animated WebP or GIF while the render runs. The frames are handed over one
+        at a time, so the memory used stays the same however long the sequence is.
+    """
+    # Frames waiting for the encoder, the render waits once the queue is full.
+    FRAME_QUEUE_SIZE = 2
+
+    def __init__(self, path: str, durations: list, frame_size: tuple, quality: int = 80):
+        """
+        Initializer for the AnimationWriter.
+
+        Args:
+            path (str): Path of the animation, .webp or .gif.
+            durations (list): Duration of every frame in milliseconds.
+            frame_size (tuple): Size of the animation, the frames are letterboxed to it.
+            quality (int): WebP quality. Default 80.
+        """
+        self.path = path
+        self.animation_format = os.path.splitext(path)[1].lower().lstrip(".")
+        self.durations = durations
+        self.frame_size = frame_size
+        self.quality = quality
+        self.frames_added = 0
+        self.error = None
+
+        if self.animation_format == "webp":
+            # Pillow pulls the frames of an animated WebP itself, so the encoder runs in its own thread.
+            self.frame_queue = queue.Queue(maxsize=self.FRAME_QUEUE_SIZE)
+            self.encoder_thread = threading.Thread(target=self.encode_webp, daemon=True)
+            self.encoder_thread.start()
+        elif self.animation_format == "gif":
+            # GIF frames are written as they come, every frame with its own palette.
+            self.gif_file = open(path + ".tmp", 'wb')
+        else:
+            raise ValueError(f"Unsupported animation format: {self.animation_format}")
+
+    def add_frame(self, frame):
+        """
+        Adds the next frame of the animation. Blocks while the encoder is behind.
+
+        Args:
+            frame (Image): The frame, letterboxed to the frame size of the animation.
+
+        Returns:
+            None
+
+        """
+        frame = self.fit_frame(frame)
+        if self.animation_format == "webp":
+            while self.encoder_thread.is_alive():
+                try:
+                    self.frame_queue.put(frame, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+        else:
+            self.write_gif_frame(frame)
+        self.frames_added += 1
+
+    def fit_frame(self, frame):
+        """
+        Converts the frame to RGB and letterboxes it to the frame size of the animation.
+
+        Args:
+            frame (Image): The frame.
+
+        Returns:
+            Image: RGB frame of the animation size.
+
+        """
+        if frame.mode != "RGB":
+            frame = frame.convert("RGB")
+        if frame.size == self.frame_size:
+            return frame
+
+        frame = frame.copy()
+        frame.thumbnail(self.frame_size, resample=Image.LANCZOS)
+        letterboxed_frame = Image.new("RGB", self.frame_size, "black")
+        letterboxed_frame.paste(frame, ((self.frame_size[0] - frame.width) // 2,
+                                        (self.frame_size[1] - frame.height) // 2))
+        return letterboxed_frame
+
+    def encode_webp(self):
+        """
+        Encoder thread of the WebP animation, saves the frames from the frame queue as they arrive.
+
+        Returns:
+            None
+
+        """
+
+        def iterate_frames():
+            for _ in self.durations:
+                frame = self.frame_queue.get()
+                if frame is None:  # Render stopped.
+                    raise EOFError("Animation stopped")
+                yield frame
+
+        try:
+            frame_sequence = StreamedFrameSequence(frames=iterate_frames(), n_frames=len(self.durations))
+            frame_sequence.save(self.path + ".tmp", format="WEBP", save_all=True, duration=self.durations,
+                                loop=0, quality=self.quality)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+    def write_gif_frame(self, frame):
+        """
+        Quantizes the frame and appends it to the GIF file, the header is written with the first frame.
+
+        Args:
+            frame (Image): RGB frame of the animation size.
+
+        Returns:
+            None
+
+        """
+        frame = frame.quantize(colors=256, method=Image.Quantize.MEDIANCUT)
+        duration = self.durations[self.frames_added]
+        if self.frames_added == 0:
+            header, used_palette_colors = GifImagePlugin.getheader(frame, info={"loop": 0, "duration": duration})
+            for block in header:
+                self.gif_file.write(block)
+        for block in GifImagePlugin.getdata(frame, duration=duration, include_color_table=True):
+            self.gif_file.write(block)
+
+    def close(self):
+        """
+        Finishes the animation once every frame is added.
+
+        Returns:
+            str: Path of the animation.
+
+        Raises:
+            OSError: If the encoder failed.
+
+        """
+        if self.animation_format == "webp":
+            self.encoder_thread.join()
+        else:
+            self.gif_file.write(b";")  # GIF trailer
+            self.gif_file.close()
+
+        if self.error:
+            self.abort()
+            raise OSError(self.error)
+        os.replace(self.path + ".tmp", self.path)
+        return self.path
+
+    def abort(self):
+        """
+        Stops the encoder and removes the unfinished animation.
+
+        Returns:
+            None
+
+        """
+        if self.animation_format == "webp":
+            if self.encoder_thread.is_alive():
+                # Drops the waiting frames and ends the frame iterator of the encoder.
+                while not self.frame_queue.empty():
+                    self.frame_queue.get()
+                self.frame_queue.put(None)
+                self.encoder_thread.join()
+        elif not self.gif_file.closed:
+            self.gif_file.close()
+
+        try:
+            os.remove(self.path + ".tmp")
+        except OSError:
+            pass
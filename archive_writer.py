@@ -0,0 +1,108 @@
+import io
+import os
+import tarfile
+import time
+import zipfile
+
+
+class ArchiveWriter:
+    """
+    Writes the rendered images into a single ZIP or TAR archive as they are handed over, one after the other.
+        The archive is written from start to end, the images are never saved as files of their own.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializer for the ArchiveWriter.
+
+        Args:
+            path (str): Path of the archive, .zip or .tar.
+        """
+        self.path = path
+        self.archive_format = os.path.splitext(path)[1].lower().lstrip(".")
+        self.names = set()
+
+        if self.archive_format == "zip":
+            # Stored, the images are compressed already and deflating them again only costs time.
+            self.archive = zipfile.ZipFile(path + ".tmp", 'w', compression=zipfile.ZIP_STORED, allowZip64=True)
+        elif self.archive_format == "tar":
+            self.archive = tarfile.open(path + ".tmp", 'w', format=tarfile.PAX_FORMAT)
+        else:
+            raise ValueError(f"Unsupported archive format: {self.archive_format}")
+
+    @staticmethod
+    def get_entry_overhead(archive_format: str, name: str):
+        """
+        Estimates the bytes the archive adds around a file, its headers and padding.
+
+        Args:
+            archive_format (str): "zip" or "tar".
+            name (str): Name of the file in the archive.
+
+        Returns:
+            int: Size in bytes.
+
+        """
+        if archive_format == "zip":
+            # Local file header and central directory entry, both hold the name.
+            return 30 + 46 + 2 * len(name.encode("utf-8"))
+        # Header block, and half a block of padding after the contents on average.
+        return tarfile.BLOCKSIZE + tarfile.BLOCKSIZE // 2
+
+    def add_file(self, name: str, data: bytes):
+        """
+        Appends a file to the archive. A name already in the archive is skipped, of two queued images with the same
+            filename the archive keeps the first.
+
+        Args:
+            name (str): Name of the file in the archive.
+            data (bytes): Contents of the file.
+
+        Returns:
+            int: Number of bytes added, 0 if the name was already in the archive.
+
+        """
+        if name in self.names:
+            return 0
+        self.names.add(name)
+
+        if self.archive_format == "zip":
+            zip_info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            zip_info.compress_type = zipfile.ZIP_STORED
+            self.archive.writestr(zip_info, data)
+        else:
+            tar_info = tarfile.TarInfo(name)
+            tar_info.size = len(data)
+            tar_info.mtime = int(time.time())
+            self.archive.addfile(tar_info, io.BytesIO(data))
+        return len(data)
+
+    def close(self):
+        """
+        Finishes the archive once every file is added.
+
+        Returns:
+            str: Path of the archive.
+
+        """
+        self.archive.close()
+        os.replace(self.path + ".tmp", self.path)
+        return self.path
+
+    def abort(self):
+        """
+        Closes and removes the unfinished archive.
+
+        Returns:
+            None
+
+        """
+        try:
+            self.archive.close()
+        except Exception:
+            pass
+
+        try:
+            os.remove(self.path + ".tmp")
+        except OSError:
+            pass
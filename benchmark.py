@@ -0,0 +1,418 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+
+import PIL
+import psutil
+from PIL import Image, ImageChops
+
+from file_handler import FileHandler
+from graphics_manager import GraphicsCache, OverlayImageCache
+from image_processor import ImageProcessor
+
+
+# Export benchmark. Generates synthetic projects, renders them through the export path and saves the results as json.
+#   python -m benchmark run --suite quick --out results.json
+#   python -m benchmark compare baseline.json results.json
+
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+    "8k": (7680, 4320),
+}
+
+# name, image count, resolution, annotation density, overlay images, render workers and optionally unchanged, True
+#   times the re-export of a project rendered before with nothing changed since.
+SUITES = {
+    "quick": [
+        ("blank-1080p", 20, "1080p", "none", 0, 1),
+        ("light-1080p", 20, "1080p", "light", 0, 1),
+        ("heavy-1080p", 10, "1080p", "heavy", 0, 1),
+        ("overlay-1080p", 20, "1080p", "light", 2, 1),
+        ("heavy-4k", 4, "4k", "heavy", 1, 1),
+        ("unchanged-light-1080p", 20, "1080p", "light", 1, 1, True),
+    ],
+    "full": [
+        ("blank-720p-x10000", 10000, "720p", "none", 0, 1),
+        ("light-720p-x1000", 1000, "720p", "light", 0, 1),
+        ("light-1080p-x1000", 1000, "1080p", "light", 1, 1),
+        ("light-1080p-x1000-pool", 1000, "1080p", "light", 1, os.cpu_count() or 1),
+        ("heavy-1080p-x200", 200, "1080p", "heavy", 2, 1),
+        ("heavy-4k-x100", 100, "4k", "heavy", 2, 1),
+        ("heavy-4k-x100-pool", 100, "4k", "heavy", 2, os.cpu_count() or 1),
+        ("heavy-8k-x10", 10, "8k", "heavy", 2, 1),
+        ("unchanged-light-1080p-x1000", 1000, "1080p", "light", 1, 1, True),
+    ],
+}
+
+COLORS = ("#ff0000", "#00ff00", "#0000ff", "#ffff00", "#ff00ff", "#00ffff", "#ffffff", "#000000")
+
+
+def create_source_images(folder: str, image_count: int, resolution: tuple):
+    """
+    Creates the source images of a synthetic project. Every frame is the same noise shifted by a different
+        offset, so no two frames are the same file or decode to the same pixels.
+
+    Args:
+        folder (str): Folder to save the images.
+        image_count (int): Number of images.
+        resolution (tuple): Width and height of the images.
+
+    Returns:
+        list: Paths of the images.
+
+    """
+    os.makedirs(folder, exist_ok=True)
+    # Noise at a low resolution, scaled up so the jpeg has realistic detail and file size.
+    noise = Image.effect_noise((max(resolution[0] // 8, 1), max(resolution[1] // 8, 1)), 64).convert("RGB")
+    noise = noise.resize(resolution, resample=Image.BICUBIC)
+
+    image_paths = []
+    for frame in range(1, image_count + 1):
+        image_path = os.path.join(folder, f"frame_{frame:05d}.jpg")
+        # Steps coprime to the sides, so the offsets repeat only after lcm(width, height) frames.
+        ImageChops.offset(noise, frame * 7919 % resolution[0], frame * 104729 % resolution[1]).save(image_path,
+                                                                                                   quality=90)
+        image_paths.append(image_path)
+    return image_paths
+
+
+def create_annotations(rng: random.Random, density: str, resolution: tuple):
+    """
+    Creates the graphic elements of a single image.
+
+    Args:
+        rng (random.Random): Seeded random generator, so every run draws the same elements.
+        density (str): "none", "light" or "heavy".
+        resolution (tuple): Width and height of the image.
+
+    Returns:
+        dict: GraphicsCache objects keyed by the item id.
+
+    """
+    width, height = resolution
+
+    def point():
+        return rng.uniform(0, width), rng.uniform(0, height)
+
+    if density == "none":
+        return {}
+    elif density == "light":
+        brush_strokes, brush_points, shapes, texts = 2, 50, 4, 1
+    else:  # heavy
+        brush_strokes, brush_points, shapes, texts = 10, 2000, 20, 5
+
+    graphics_dict = {}
+    item_id = 1
+    for _ in range(brush_strokes):
+        x, y = point()
+        coordinates = []
+        for _ in range(brush_points):  # Random walk, like a freehand stroke.
+            x = min(max(x + rng.uniform(-4, 4), 0), width)
+            y = min(max(y + rng.uniform(-4, 4), 0), height)
+            coordinates.append((x, y))
+        graphics_dict[item_id] = GraphicsCache(coordinates=coordinates, width=rng.choice((3, 6, 12)), tags="",
+                                               tool=2, fill_color=rng.choice(COLORS))
+        item_id += 1
+
+    for shape in range(shapes):
+        tool = (4, 5, 6)[shape % 3]  # line, rectangle, oval
+        highlight = tool != 4 and rng.random() < 0.5
+        fill_color = rng.choice(COLORS)
+        graphics_dict[item_id] = GraphicsCache(coordinates=[point(), point()], width=rng.choice((2, 4, 8)), tags="",
+                                               tool=tool, fill_color=fill_color,
+                                               interior_fill_color=fill_color if highlight else "",
+                                               stipple="gray50" if highlight else "")
+        item_id += 1
+
+    for _ in range(texts):
+        graphics_dict[item_id] = GraphicsCache(coordinates=point(), width=1, tags="", tool=8,
+                                               fill_color=rng.choice(COLORS), text="Benchmark text",
+                                               font_name="Roboto", font_file="Roboto-Regular.ttf",
+                                               font_size=-rng.choice((16, 28, 48)))
+        item_id += 1
+
+    return graphics_dict
+
+
+def create_project(folder: str, image_count: int, resolution: str, density: str, overlay_images: int,
+                   render_workers: int, seed: int = 0, skip_unchanged: bool = False):
+    """
+    Creates a synthetic .rvp project with its source images.
+
+    Args:
+        folder (str): Folder for the project file and the images.
+        image_count (int): Number of images.
+        resolution (str): Key of RESOLUTIONS.
+        density (str): Annotation density, "none", "light" or "heavy".
+        overlay_images (int): Number of overlay images, a line is also drawn on the overlay if not 0.
+        render_workers (int): Number of render worker processes saved in the project.
+        seed (int): Seed of the random annotations. Default 0.
+        skip_unchanged (bool): Skip the frames unchanged since the last render. Default False, every run renders
+            every image.
+
+    Returns:
+        str: Path of the project file.
+
+    """
+    rng = random.Random(seed)
+    image_size = RESOLUTIONS[resolution]
+    image_paths = create_source_images(os.path.join(folder, "images"), image_count=image_count,
+                                       resolution=image_size)
+
+    image_data = {}
+    graphics_data = {-2: {}, -1: {}}
+    for index, image_path in enumerate(image_paths):
+        image_data[index] = {"file": image_path, "sequence_code": f"{index + 1:05d}", "image_size": image_size,
+                             "in_queue": True}
+        graphics_data[index] = create_annotations(rng, density=density, resolution=image_size)
+
+    if overlay_images:
+        overlay_image_path = os.path.join(folder, "overlay.png")
+        Image.radial_gradient("L").convert("RGBA").save(overlay_image_path)
+        for item_id in range(1, overlay_images + 1):
+            # The overlay coordinates are in the 1920x1080 overlay space, image_object is left out as in saved projects.
+            graphics_data[-2][item_id] = OverlayImageCache(image_object=None, image_path=overlay_image_path,
+                                                           coordinates=(rng.uniform(200, 1720), rng.uniform(200, 880)),
+                                                           max_coordinates=(0, 0), proxy_coordinates=(0, 0),
+                                                           size=(200, 200), max_size=(0, 0), proxy_size=(0, 0),
+                                                           opacity=0.8, angle=rng.choice((0, 30, 90)), tags="")
+        graphics_data[-1][overlay_images + 1] = GraphicsCache(coordinates=[(100, 100), (1820, 980)], width=8,
+                                                              tags="", tool=4, fill_color="#00ffff")
+
+    settings = {
+        "render_overlay": bool(overlay_images),
+        "trim_overlay": True,
+        "render_sequence_code": True,
+        "sequence_code_render_position": "se",
+        "anti_alias": True,
+        "include_blanks": True,
+        "jpeg_quality": 75,
+        "png_compression": 1,
+        "render_workers": render_workers,
+        "overlay_cache_mb": 256,
+        "skip_unchanged": skip_unchanged,
+        "output_path": os.path.join(folder, "output"),
+    }
+
+    project_path = os.path.join(folder, "benchmark.rvp")
+    FileHandler.save_project_file(project_data={"settings": settings, "image_data": image_data,
+                                                "graphics_data": graphics_data},
+                                  output_path=project_path)
+    return project_path
+
+
+class PeakMemorySampler:
+    """
+    Samples the resident memory of this process and its render workers in a background thread, keeping the peak.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_rss = 0
+        self.process = psutil.Process()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    def sample(self):
+        """
+        Keeps sampling until stopped, the render workers are added to the main process.
+
+        Returns:
+            None
+
+        """
+        while not self.stop_event.is_set():
+            rss = 0
+            try:
+                rss = self.process.memory_info().rss
+                for child in self.process.children(recursive=True):
+                    rss += child.memory_info().rss
+            except psutil.Error:  # A worker exited while sampling.
+                pass
+            self.peak_rss = max(self.peak_rss, rss)
+            self.stop_event.wait(self.interval)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop_event.set()
+        self.thread.join()
+
+
+def run_case(work_folder: str, name: str, image_count: int, resolution: str, density: str, overlay_images: int,
+             render_workers: int, unchanged: bool = False):
+    """
+    Generates the project of a benchmark case and renders it through the headless export path.
+
+    Args:
+        work_folder (str): Folder for the generated project, removed after the render.
+        name (str): Name of the case.
+        image_count (int): Number of images.
+        resolution (str): Key of RESOLUTIONS.
+        density (str): Annotation density, "none", "light" or "heavy".
+        overlay_images (int): Number of overlay images.
+        render_workers (int): Number of render worker processes.
+        unchanged (bool): Render the project once untimed, then time the re-export with nothing changed.
+            Default False.
+
+    Returns:
+        dict: Result of the case.
+
+    """
+    case_folder = os.path.join(work_folder, name)
+    shutil.rmtree(case_folder, ignore_errors=True)
+    project_path = create_project(case_folder, image_count=image_count, resolution=resolution, density=density,
+                                  overlay_images=overlay_images, render_workers=render_workers,
+                                  skip_unchanged=unchanged)
+
+    project_data = FileHandler.load_project_file(project_path)
+    os.makedirs(project_data["settings"]["output_path"], exist_ok=True)
+    render_state = ImageProcessor.create_render_state_from_project(project_data=project_data,
+                                                                   output_path=project_data["settings"]["output_path"])
+
+    if unchanged:  # The first render writes the manifest the re-export skips the frames by.
+        ImageProcessor(app=None, canvas_gm=None, overlay_gm=None).render_images(batch=True, render_state=render_state)
+
+    image_processor = ImageProcessor(app=None, canvas_gm=None, overlay_gm=None)
+    with PeakMemorySampler() as memory_sampler:
+        start = time.perf_counter()
+        rendered = image_processor.render_images(batch=True, render_state=render_state)
+        seconds = time.perf_counter() - start
+
+    shutil.rmtree(case_folder, ignore_errors=True)
+    return {
+        "name": name,
+        "image_count": image_count,
+        "resolution": resolution,
+        "density": density,
+        "overlay_images": overlay_images,
+        "render_workers": render_workers,
+        "unchanged": unchanged,
+        "rendered": rendered,
+        "failed_images": len(image_processor.failed_images),
+        "skipped_images": image_processor.render_stats["images_skipped"],
+        "seconds": seconds,
+        "images_per_second": image_count / seconds,
+        "peak_rss_mb": memory_sampler.peak_rss / (1024 * 1024),
+        "stage_times": image_processor.get_stage_times(),
+    }
+
+
+def run_benchmark(args):
+    """
+    Runs every case of the suite and saves the results as json.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments of the run command.
+
+    Returns:
+        int: Exit code, 0 if every case rendered.
+
+    """
+    cases = SUITES[args.suite]
+    if args.case:
+        cases = [case for case in cases if case[0] in args.case]
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "suite": args.suite,
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cases": [],
+    }
+    for case in cases:
+        print(f"{case[0]}: ", end="", flush=True)
+        result = run_case(args.work, *case)
+        results["cases"].append(result)
+        stage_times = ", ".join(f"{stage} {times['ms_per_image']:.1f}" for stage, times in result["stage_times"].items())
+        print(f"{result['images_per_second']:.2f} images/s, peak {result['peak_rss_mb']:.0f} MB, "
+              f"ms per image: {stage_times}")
+
+    with open(args.out, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"Results saved to {args.out}")
+
+    return 0 if all(result["rendered"] for result in results["cases"]) else 1
+
+
+def compare_results(args):
+    """
+    Compares the throughput and memory of two result files and reports the cases that got worse than the threshold.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments of the compare command.
+
+    Returns:
+        int: Exit code, 1 if any case regressed.
+
+    """
+    with open(args.baseline, 'r') as file:
+        baseline_cases = {case["name"]: case for case in json.load(file)["cases"]}
+    with open(args.results, 'r') as file:
+        result_cases = json.load(file)["cases"]
+
+    regressions = 0
+    for case in result_cases:
+        baseline_case = baseline_cases.get(case["name"])
+        if baseline_case is None:
+            continue
+
+        speed_change = case["images_per_second"] / baseline_case["images_per_second"] - 1
+        memory_change = case["peak_rss_mb"] / baseline_case["peak_rss_mb"] - 1
+        regressed = speed_change < -args.threshold or memory_change > args.threshold
+        regressions += regressed
+
+        print(f"{'REGRESSION' if regressed else 'ok':<10} {case['name']}: "
+              f"{speed_change * 100:+.1f}% images/s, {memory_change * 100:+.1f}% peak memory")
+
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    """
+    Parses the command line arguments and runs the command.
+
+    Args:
+        argv (list,optional): Command line arguments. Default sys.argv.
+
+    Returns:
+        int: Exit code.
+
+    """
+    parser = argparse.ArgumentParser(prog="benchmark", description="R-View Tool export benchmark.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Render the synthetic projects of a suite.")
+    run_parser.add_argument("--suite", choices=SUITES, default="quick", help="Benchmark suite. Default quick.")
+    run_parser.add_argument("--case", nargs="*", default=None, help="Only run the cases with these names.")
+    run_parser.add_argument("--out", default="benchmark_results.json", help="Json file to save the results.")
+    run_parser.add_argument("--work", default="benchmark_work",
+                            help="Folder for the generated projects, emptied after every case.")
+    run_parser.set_defaults(func=run_benchmark)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare results against a baseline.")
+    compare_parser.add_argument("baseline", help="Json results of the baseline.")
+    compare_parser.add_argument("results", help="Json results to check.")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="Allowed slowdown or memory growth, 0.1 is 10%%. Default 0.1.")
+    compare_parser.set_defaults(func=compare_results)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+from PIL import Image, ImageTk
+
+
+class TiledCanvasImage:
+    """
+    Shows a large image on a canvas as fixed size tiles. Only the tiles in view, and a ring of tiles around them,
+        are made, and the ones scrolled away are released, so the memory used follows the size of the view and not
+        the size of the image.
+    """
+    TILE_SIZE = 512
+    # Tiles kept around the view, so a short pan shows finished tiles.
+    TILE_MARGIN = 1
+
+    def __init__(self, canvas, tags: tuple = ("img",)):
+        """
+        Initializer for the TiledCanvasImage.
+
+        Args:
+            canvas (tkinter.Canvas): Canvas the tiles are drawn on.
+            tags (tuple): Canvas tags of the tile items. Default ("img",), the tag of the canvas image.
+        """
+        self.canvas = canvas
+        self.tags = tags
+        self.source_image = None
+        self.image_size = (0, 0)
+        self.resample = Image.NEAREST
+        self.tiles = {}  # (column, row): (canvas item, PhotoImage)
+
+    def set_image(self, source_image, image_size: tuple, resample):
+        """
+        Shows the source image resized to the image size, with its top left corner at the canvas origin. The tiles
+            are made by update.
+
+        Args:
+            source_image (Image): The image, any size. Resized tile by tile, it is never resized as a whole.
+            image_size (tuple): Width and height of the image on the canvas.
+            resample: Resampling filter of the tiles.
+
+        Returns:
+            None
+
+        """
+        self.clear()
+        self.source_image = source_image
+        self.image_size = tuple(image_size)
+        self.resample = resample
+
+    def update(self, view_size: tuple):
+        """
+        Makes the tiles that scrolled into view and releases the ones that scrolled away.
+
+        Args:
+            view_size (tuple): Width and height of the visible part of the canvas, in window pixels.
+
+        Returns:
+            None
+
+        """
+        if self.source_image is None:
+            return
+
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        columns = self.get_tile_range(left, left + view_size[0], self.image_size[0])
+        rows = self.get_tile_range(top, top + view_size[1], self.image_size[1])
+
+        for tile_key in [tile_key for tile_key in self.tiles if tile_key[0] not in columns or
+                         tile_key[1] not in rows]:
+            self.canvas.delete(self.tiles.pop(tile_key)[0])
+
+        for column in columns:
+            for row in rows:
+                if (column, row) not in self.tiles:
+                    self.tiles[(column, row)] = self.make_tile(column, row)
+
+    def get_tile_range(self, start: float, end: float, length: int):
+        """
+        Gets the tiles along one axis that intersect the view, with the margin.
+
+        Args:
+            start (float): Start of the view in canvas coordinates.
+            end (float): End of the view in canvas coordinates.
+            length (int): Length of the image along the axis.
+
+        Returns:
+            range: Tile indices.
+
+        """
+        tile_count = -(-length // self.TILE_SIZE)
+        first_tile = max(0, int(start // self.TILE_SIZE) - self.TILE_MARGIN)
+        last_tile = min(tile_count - 1, int(end // self.TILE_SIZE) + self.TILE_MARGIN)
+        return range(first_tile, last_tile + 1)
+
+    def make_tile(self, column: int, row: int):
+        """
+        Resizes the region of the source image under the tile and draws it below the annotations.
+
+        Args:
+            column (int): Column of the tile.
+            row (int): Row of the tile.
+
+        Returns:
+            tuple: (canvas item, PhotoImage)
+
+        """
+        left = column * self.TILE_SIZE
+        top = row * self.TILE_SIZE
+        right = min(left + self.TILE_SIZE, self.image_size[0])
+        bottom = min(top + self.TILE_SIZE, self.image_size[1])
+
+        scale_x = self.source_image.width / self.image_size[0]
+        scale_y = self.source_image.height / self.image_size[1]
+        if (scale_x, scale_y) == (1, 1):
+            tile_image = self.source_image.crop((left, top, right, bottom))
+        else:
+            # Matches the whole image resized to within rounding, the filter reads past the box edges, so no seams.
+            tile_image = self.source_image.resize((right - left, bottom - top), resample=self.resample,
+                                                  box=(left * scale_x, top * scale_y,
+                                                       right * scale_x, bottom * scale_y))
+
+        tile_imagetk = ImageTk.PhotoImage(tile_image)
+        tile_item = self.canvas.create_image(left, top, image=tile_imagetk, anchor="nw", tags=self.tags)
+        self.canvas.tag_lower(tile_item)
+        return tile_item, tile_imagetk
+
+    def getpixel(self, position: tuple):
+        """
+        Gets the pixel of the source image under a canvas position.
+
+        Args:
+            position (tuple): x and y in canvas coordinates.
+
+        Returns:
+            The pixel value of the source image.
+
+        """
+        x = min(int(position[0] * self.source_image.width / self.image_size[0]), self.source_image.width - 1)
+        y = min(int(position[1] * self.source_image.height / self.image_size[1]), self.source_image.height - 1)
+        return self.source_image.getpixel((x, y))
+
+    def clear(self):
+        """
+        Removes the tiles from the canvas and releases the image.
+
+        Returns:
+            None
+
+        """
+        for tile_item, _ in self.tiles.values():
+            self.canvas.delete(tile_item)
+        self.tiles = {}
+        self.source_image = None
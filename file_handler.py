@@ -131,6 +131,26 @@ class FileHandler:
             else:
                 return None
 
+    @staticmethod
+    def get_sequence_code_seconds(sequence_code):
+        """
+        Converts a timestamp sequence code of a VLC or PotPlayer screenshot to seconds.
+
+        Args:
+            sequence_code (str|None): Sequence code from get_sequence_code.
+
+        Returns:
+            int|None: Seconds from the start of the video. None if the sequence code is not a timestamp.
+        """
+        if not sequence_code:
+            return None
+
+        match = re.fullmatch(r'(\d+):(\d{2}):(\d{2})', sequence_code)
+        if match:
+            hours, minutes, seconds = (int(value) for value in match.groups())
+            return hours * 3600 + minutes * 60 + seconds
+        return None
+
     @staticmethod
     def load_project_file(file_path):
         """
@@ -194,7 +214,8 @@ class FileHandler:
                 # Checking value types.
                 if isinstance(parsed_data["canvas_color"], str) and \
                         isinstance(parsed_data["selection_color"], str) and \
-                        isinstance(parsed_data["highlight_opacity"], (int, float)):
+                        isinstance(parsed_data["highlight_opacity"], (int, float)) and \
+                        isinstance(parsed_data.get("disk_cache_mb", 0), int):  # Missing in older settings files.
                     return True
                 else:
                     return False
@@ -1278,7 +1278,7 @@ class GraphicsManager:
             scale_factor = self.app.resized_ld_img.width / self.app.ld_img.width
             scaled_coordinates = [((x * scale_factor), (y * scale_factor)) for x, y in coordinate_list]
         elif mode == "zoomed":  # Compares the difference of the displayed image with the zoomed image size.
-            scale_factor = self.app.resized_ld_img.width / self.app.zoomed_ld_img.width
+            scale_factor = self.app.resized_ld_img.width / self.app.zoom_tiles.image_size[0]
             scaled_coordinates = [((x * scale_factor), (y * scale_factor)) for x, y in coordinate_list]
         return scaled_coordinates
 
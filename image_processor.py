@@ -1,270 +1,2892 @@
 from PIL import Image, ImageDraw, ImageFont
-from tkinter.font import Font
+from animation_writer import AnimationWriter
+from archive_writer import ArchiveWriter
+from file_handler import FileHandler
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import dataclasses
+import hashlib
+import io
+import json
+import multiprocessing
 import math
 import os
+import pickle
+import psutil
+import queue
+import shutil
+import threading
+import time
+
+# Guards the decompression bomb limit of Pillow while open_project_image lifts it.
+_pixel_limit_lock = threading.Lock()
+
+
+def open_project_image(path: str):
+    """
+    Opens an image of the render queue without the decompression bomb limit of Pillow. Stitched maps and scans
+        can be far larger than the limit, the images come from the user's own project and large ones are rendered
+        in bands. The limit is lifted only while the header is read, every other image is still checked.
+
+    Args:
+        path (str): Path of the image.
+
+    Returns:
+        Image: The opened image, not loaded yet.
+
+    """
+    with _pixel_limit_lock:
+        max_image_pixels = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = None
+        try:
+            return Image.open(path)
+        finally:
+            Image.MAX_IMAGE_PIXELS = max_image_pixels
+
+
+@lru_cache(maxsize=256)
+def get_cached_font(font_path: str, size: int):
+    """
+    Loads a truetype font once per process, parsing the font file for every text element is slow.
+        Thread-safe, shared by every ImageProcessor of the process.
+
+    Args:
+        font_path (str): Path to the font file.
+        size (int): Font size in pixels.
+
+    Returns:
+        tuple: (FreeTypeFont, ascent, descent)
+
+    """
+    font = ImageFont.truetype(font=font_path, size=size)
+    ascent, descent = font.getmetrics()
+    return font, ascent, descent
+
+
+class FilmDraw(ImageDraw.ImageDraw):
+    """
+    Draws on a film layer that holds only a region of the full size film, from the given upper row and left column.
+        The elements are drawn at their full film coordinates. Pillow truncates every coordinate to a whole pixel
+        the same way as on the full film, and the rows and columns before the layer are subtracted from the whole
+        pixels. Shifting the coordinates before truncation would round the ones before the layer edge the other way.
+    """
+
+    def __init__(self, im, upper: int, left: int = 0):
+        """
+        Initializer for the FilmDraw
+
+        Args:
+            im (Image): Film layer to draw on.
+            upper (int): Row of the full size film at the top of the layer.
+            left (int): Column of the full size film at the left edge of the layer.
+        """
+        super().__init__(im)
+        self.draw = FilmCoreDraw(self.draw, upper=upper, left=left, size=im.size)
+
+
+class FilmCoreDraw:
+    """
+    Wraps the core draw object of Pillow for FilmDraw, truncates the coordinates and subtracts the layer corner.
+    """
+    # Rows of the wide line mask filled at a time.
+    MASK_STRIP_HEIGHT = 32
+    # Core draw methods that take the coordinates as their first argument.
+    COORDINATE_METHODS = ("draw_arc", "draw_bitmap", "draw_chord", "draw_ellipse", "draw_lines", "draw_pieslice",
+                          "draw_points", "draw_polygon", "draw_rectangle")
+
+    def __init__(self, draw, upper: int, left: int = 0, size: tuple = (0, 0)):
+        """
+        Initializer for the FilmCoreDraw
+
+        Args:
+            draw: Core draw object of Pillow.
+            upper (int): Row of the full size film at the top of the layer.
+            left (int): Column of the full size film at the left edge of the layer.
+            size (tuple): Size of the layer.
+        """
+        self.draw = draw
+        self.upper = upper
+        self.left = left
+        self.size = size
+
+    def __getattr__(self, name: str):
+        method = getattr(self.draw, name)
+        if name == "draw_lines" and self.left:
+            return self.draw_shifted_lines
+        if name not in self.COORDINATE_METHODS:
+            return method
+        return lambda xy, *args: method(self.shift_coordinates(xy), *args)
+
+    def draw_shifted_lines(self, xy, ink, width: int = 0):
+        """
+        Draws lines on a layer that starts right of the full size film edge. Pillow fills wide lines with the film
+            column added in single precision, so the edges of a wide line drawn at shifted columns can land a pixel
+            apart. Wide lines are drawn on a mask that starts at the film edge and filled into the layer through it.
+
+        Args:
+            xy: Full film coordinates of the line points.
+            ink (int): Core ink of the lines.
+            width (int): Stroke width.
+
+        Returns:
+            None
+
+        """
+        if width <= 1:  # Thin lines are stepped in whole pixels.
+            self.draw.draw_lines(self.shift_coordinates(xy), ink, width)
+            return
+
+        flat_xy = [int(value) for value in self.flatten_coordinates(xy)]
+        # Only the rows and columns the line can reach are filled. The rows shift exactly, the mask columns start
+        #   at the film edge.
+        x_coordinates, y_coordinates = flat_xy[0::2], flat_xy[1::2]
+        mask_left = max(self.left, min(x_coordinates) - width)
+        mask_right = min(self.left + self.size[0], max(x_coordinates) + width + 1)
+        mask_upper = max(self.upper, min(y_coordinates) - width)
+        mask_lower = min(self.upper + self.size[1], max(y_coordinates) + width + 1)
+        if mask_left >= mask_right or mask_upper >= mask_lower:
+            return
+
+        mask = Image.new("L", (mask_right, mask_lower - mask_upper), 0)
+        mask_xy = [value - mask_upper if i % 2 else value for i, value in enumerate(flat_xy)]
+        ImageDraw.Draw(mask).draw.draw_lines(mask_xy, 255, width)
+        # Filled in strips cropped to the line, a long diagonal line covers little of its box.
+        for strip_upper in range(0, mask.height, self.MASK_STRIP_HEIGHT):
+            strip = mask.crop((mask_left, strip_upper, mask_right,
+                               min(mask.height, strip_upper + self.MASK_STRIP_HEIGHT)))
+            strip_box = strip.getbbox()
+            if strip_box:
+                self.draw.draw_bitmap((mask_left - self.left + strip_box[0],
+                                       mask_upper - self.upper + strip_upper + strip_box[1]),
+                                      strip.crop(strip_box).im, ink)
+
+    @staticmethod
+    def flatten_coordinates(xy):
+        """
+        Flattens the coordinates to a single sequence.
+
+        Args:
+            xy: Coordinates as a flat sequence or a sequence of (x, y) pairs.
+
+        Returns:
+            list: Flat list of the coordinates.
+
+        """
+        flat_xy = []
+        for value in xy:
+            if isinstance(value, (tuple, list)):
+                flat_xy.extend(value)
+            else:
+                flat_xy.append(value)
+        return flat_xy
+
+    def shift_coordinates(self, xy):
+        """
+        Truncates the full film coordinates like Pillow does and moves them by the rows and columns before the layer.
+
+        Args:
+            xy: Coordinates as a flat sequence or a sequence of (x, y) pairs.
+
+        Returns:
+            list: Flat list of whole pixel coordinates on the layer.
+
+        """
+        return [int(value) - self.upper if i % 2 else int(value) - self.left
+                for i, value in enumerate(self.flatten_coordinates(xy))]
+
+
+# ImageProcessor of a render worker process, created once per process by init_render_worker.
+_worker_image_processor = None
+
+
+def init_render_worker(render_state: dict):
+    """
+    Initializer for the render worker processes. Creates an ImageProcessor without the app and configures it.
+
+    Args:
+        render_state (dict): Render state from ImageProcessor.create_render_state.
+
+    Returns:
+        None
+
+    """
+    global _worker_image_processor
+    _worker_image_processor = ImageProcessor(app=None, canvas_gm=None, overlay_gm=None)
+    _worker_image_processor.configure_render(render_state)
+
+
+def render_worker_task(image_index: int):
+    """
+    Renders and saves a single image inside a render worker process.
+
+    Args:
+        image_index (int): Index of the image to render.
+
+    Returns:
+        tuple: (image_index, error message or None, time spent in each render stage, animation frame or None,
+            archive entries or None)
+
+    """
+    _worker_image_processor.reset_stage_stats()
+    try:
+        _worker_image_processor.render_and_save(image_index)
+    except Exception as e:  # Reported back to the main process instead of stopping the whole batch.
+        _worker_image_processor.archive_entries.pop(image_index, None)
+        return image_index, f"{type(e).__name__}: {e}", _worker_image_processor.stage_stats, None, None
+    animation_frame = _worker_image_processor.animation_frames.pop(image_index, None)
+    archive_entries = _worker_image_processor.archive_entries.pop(image_index, None)
+    return image_index, None, _worker_image_processor.stage_stats, animation_frame, archive_entries
+
+
+def render_thumbnail_task(image_index: int, cell_size: tuple):
+    """
+    Renders the contact sheet thumbnail of a single image inside a render worker process.
+
+    Args:
+        image_index (int): Index of the image to render.
+        cell_size (tuple): Size of the contact sheet cell the thumbnail fits in.
+
+    Returns:
+        tuple: (image_index, error message or None, RGB thumbnail or None)
+
+    """
+    try:
+        return image_index, None, _worker_image_processor.render_thumbnail(image_index, cell_size=cell_size)
+    except Exception as e:
+        return image_index, f"{type(e).__name__}: {e}", None
 
 
 class ImageProcessor:
     """
     Handles the Image rendering and save operations.
     """
+    # Transparent pixels kept around the annotated region, wider than the LANCZOS kernel of the 2x downscale.
+    ANNOTATION_BOX_MARGIN = 8
+    # Record of the rendered frames, saved in the output folder.
+    RENDER_MANIFEST_FILENAME = "rview_manifest.json"
+    RENDER_MANIFEST_VERSION = 1
+    # Frames finished by an unfinished batch render, saved in the output folder until the batch completes.
+    RENDER_CHECKPOINT_FILENAME = "rview_checkpoint.json"
+    RENDER_CHECKPOINT_VERSION = 1
+    # Seconds between checkpoint writes during the render.
+    RENDER_CHECKPOINT_INTERVAL = 5
+    # File extension of each export target format.
+    EXPORT_TARGET_EXTENSIONS = {"png": ".png", "jpeg": ".jpg", "webp": ".webp"}
+    # Sequence codes and source paths of the archived images, the last file of the archive.
+    ARCHIVE_INDEX_FILENAME = "rview_index.json"
+    # Gap between the cells of the contact sheet and its background color.
+    CONTACT_SHEET_PADDING = 8
+    CONTACT_SHEET_COLOR = "#263142"
+    # Smallest band of the tiled render, even if the budget is smaller.
+    MIN_BAND_HEIGHT = 16
+
+    def __init__(self, app, canvas_gm, overlay_gm):
+        """
+        Initializer for the ImageProcessor
+
+        Args:
+            app: Main app
+            canvas_gm: Base Canvas GraphicsProcessor
+            overlay_gm: Overlay Canvas GraphicProcessor
+        """
+        self.app = app
+        self.canvas_gm = canvas_gm
+        self.overlay_gm = overlay_gm
+
+        self.current_image = None
+        self.canvas_image = None
+        self.overlay_layer = None
+        self.current_image_size = None
+        # Overlay pixel at the top left corner of the overlay layer the overlay images are pasted on.
+        self.overlay_offset = (0, 0)
+        # Scale of the thumbnail being rendered from the image pixel coordinates, 1 for full size renders.
+        self.thumbnail_scale = 1
+        # Used to measure the text elements without drawing them.
+        self.measure_draw = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+        self.failed_images = []
+        self.animation_error = None
+        self.archive_error = None
+        # The reader, annotate and writer stages of the render add their times from their own threads.
+        self.stage_stats_lock = threading.Lock()
+        self.reset_stage_stats()
+
+    def create_render_state(self, batch: bool):
+        """
+        Takes a snapshot of every app value needed to render the images.
+        The snapshot is picklable, so it can be handed over to the render worker processes. It is a deep copy, so
+            edits made on the canvas while the render runs do not reach the images being rendered.
+
+        Args:
+            batch (bool): True renders every image in queue, False renders the current image on display.
+
+        Returns:
+            dict: The render state.
+
+        """
+        # Updates the app.settings_data with the current RenderMenu values.
+        self.app.create_settings_dict()
+        # A pickle round trip copies the app values faster than copy.deepcopy, and a value that can not be handed
+        #   over to the workers fails here on the main loop instead of in the render.
+        snapshot = pickle.loads(pickle.dumps((self.app.settings_data, self.app.image_data, self.app.graphics_data),
+                                             protocol=pickle.HIGHEST_PROTOCOL))
+        settings, image_data, graphics_data = snapshot
+
+        if batch:
+            indices = self.get_queued_indices(image_data=image_data, graphics_data=graphics_data,
+                                              include_blanks=settings["include_blanks"])
+        else:  # Render only the current image.
+            indices = [self.app.image_index]
+
+        render_state = {
+            "settings": settings,
+            "highlight_opacity": self.app.user_settings["highlight_opacity"],
+            "overlay_size": (self.overlay_gm.OVERLAY_WIDTH, self.overlay_gm.OVERLAY_HEIGHT),
+            "images": list(self.app.images),
+            "image_data": image_data,
+            "graphics_data": graphics_data,
+            "indices": indices,
+        }
+        return render_state
+
+    @staticmethod
+    def create_render_state_from_project(project_data: dict, output_path: str, highlight_opacity: int = 30,
+                                         images_folder_override_path: str = None, render_workers: int = None):
+        """
+        Makes a render state straight from a loaded project dictionary, without the app. Used for headless renders.
+
+        Args:
+            project_data (dict): Dictionary from FileHandler.load_project_file.
+            output_path (str): Folder to save the rendered images.
+            highlight_opacity (int): Highlight opacity from the user settings. Default 30.
+            images_folder_override_path (str,optional): Folder to look for the images that are not found in their saved path.
+            render_workers (int,optional): Number of render worker processes. Default is the value saved in the project.
+
+        Returns:
+            dict: The render state.
+
+        Raises:
+            FileNotFoundError: If any of the project images is missing.
+
+        """
+        settings = dict(project_data["settings"])
+        settings["output_path"] = output_path
+        if render_workers:
+            settings["render_workers"] = render_workers
+
+        image_data = project_data["image_data"]
+        graphics_data = project_data["graphics_data"]
+
+        images = []
+        for index in sorted(image_data):
+            current_filepath = image_data[index]["file"]
+            if not os.path.exists(current_filepath) and images_folder_override_path:
+                # Replace the folder path of the file.
+                image_filename = os.path.basename(current_filepath)
+                current_filepath = os.path.join(images_folder_override_path, image_filename)
+                image_data[index]["file"] = current_filepath
+
+            if not os.path.exists(current_filepath):
+                raise FileNotFoundError(current_filepath)
+            images.append(current_filepath)
+
+        # The image_objects are removed from the OverlayImageCache while saving the project, reloading them from disk.
+        OVERLAY_IMAGE_INDEX = -2
+        for item_id, image_cache in list(graphics_data[OVERLAY_IMAGE_INDEX].items()):
+            try:
+                image_object = Image.open(image_cache.image_path).convert("RGBA")
+            except Exception:  # Skip the overlay image if not found, same as loading the project in the app.
+                del graphics_data[OVERLAY_IMAGE_INDEX][item_id]
+                continue
+
+            alpha = image_object.split()[3]
+            alpha = alpha.point(lambda p: p * image_cache.opacity)
+            image_object.putalpha(alpha)
+            image_cache.image_object = image_object
+
+        render_state = {
+            "settings": settings,
+            "highlight_opacity": highlight_opacity,
+            "overlay_size": (1920, 1080),  # Same ghost size as the OverlayGraphicsManager.
+            "images": images,
+            "image_data": image_data,
+            "graphics_data": graphics_data,
+            "indices": ImageProcessor.get_queued_indices(image_data=image_data, graphics_data=graphics_data,
+                                                         include_blanks=settings["include_blanks"]),
+        }
+        return render_state
+
+    @staticmethod
+    def get_queued_indices(image_data: dict, graphics_data: dict, include_blanks: bool):
+        """
+        Gets the indices of the images in the render queue.
+
+        Args:
+            image_data (dict): Image data dictionary of the project.
+            graphics_data (dict): Graphics data dictionary of the project.
+            include_blanks (bool): If False, images without any annotations are left out.
+
+        Returns:
+            list: Indices of the images to render, in order.
+
+        """
+        indices_with_queue = []
+        for index, data in image_data.items():
+            if data.get("in_queue") == True:
+                if graphics_data[index] or include_blanks:
+                    indices_with_queue.append(index)  # saving the indexes of the images in queue
+
+        return sorted(indices_with_queue)
+
+    def configure_render(self, render_state: dict):
+        """
+        Assigns the values from the render state to the ImageProcessor before rendering.
+
+        Args:
+            render_state (dict): Render state from create_render_state.
+
+        Returns:
+            None
+
+        """
+        settings = render_state["settings"]
+
+        self.HIGHLIGHT_OPACITY = render_state["highlight_opacity"]
+        self.OVERLAY_IMAGE_INDEX = -2
+        self.OVERLAY_GRAPHICS_INDEX = -1
+        self.OVERLAY_WIDTH, self.OVERLAY_HEIGHT = render_state["overlay_size"]
+        self.FONT_PATH = "fonts"
+        self.images = render_state["images"]
+        self.data_dict = render_state["image_data"]
+        self.graphics_data = render_state["graphics_data"]
+        self.current_image_size = None
+
+        self.overlay_enabled = settings["render_overlay"]
+        self.trim_overlay = settings["trim_overlay"]
+        self.render_sequence_code = settings["render_sequence_code"]
+        self.sequence_code_position = settings["sequence_code_render_position"]
+        self.anti_alias = settings["anti_alias"]
+        self.jpeg_quality = settings["jpeg_quality"]
+        self.png_compression = settings["png_compression"]
+        self.output_path = settings["output_path"]
+        # Skips the frames that are unchanged since the last render in the output folder.
+        self.skip_unchanged = settings.get("skip_unchanged", True)
+        # Resumes the unfinished batch render of the same queue from its checkpoint.
+        self.resume_render = settings.get("resume_render", True)
+        # Extra formats and sizes saved from the same rendered image, on top of the image in the output folder.
+        self.export_targets = settings.get("export_targets", [])
+        # Saves only the annotation layers with a json sidecar each, the source images are not decoded.
+        self.annotations_only = settings.get("annotations_only", False)
+        self.annotation_format = settings.get("annotation_format", "png")
+        # Animated WebP or GIF of the render queue, encoded while the batch renders. None for no animation.
+        self.animation = settings.get("animation") if not self.annotations_only else None
+        self.animation_frames = {}  # Downscaled frames waiting to be added to the animation, keyed by index.
+        # Paginated grid of thumbnails of the render queue, saved instead of the images. None to save the images.
+        self.contact_sheet = settings.get("contact_sheet")
+        # ZIP or TAR archive the batch is written into instead of the output folder. None to save the images as
+        #   files. Every frame goes into the archive, so there are no unchanged or finished frames to skip.
+        self.archive = settings.get("archive")
+        self.archive_entries = {}  # Encoded files waiting to be added to the archive, keyed by index.
+        if self.archive:
+            self.skip_unchanged = False
+            self.resume_render = False
+        # Finished overlay layers keyed by ("layer", image size), and the resized and rotated overlay images they
+        #   are made from keyed by ("element", item id, width, height), least recently used first. Both count
+        #   against the same memory budget.
+        self.overlay_cache = OrderedDict()
+        self.overlay_cache_bytes = 0
+        self.overlay_cache_budget = settings.get("overlay_cache_mb", 256) * 1024 * 1024
+        # Number of images the reader stage decodes ahead and the writer stage holds before saving.
+        self.prefetch_depth = settings.get("prefetch_depth", 4)
+        self.write_behind_depth = settings.get("write_behind_depth", 4)
+        # Images that would need more working memory than this, per render thread or worker, are rendered in bands.
+        #   Without a budget, only the images that do not fit in the memory available to each worker are banded.
+        render_memory_budget_mb = settings.get("render_memory_budget_mb")
+        if render_memory_budget_mb:
+            self.render_memory_budget = int(render_memory_budget_mb * 1024 * 1024)
+        else:
+            self.render_memory_budget = psutil.virtual_memory().available // max(1, settings.get("render_workers", 1))
+
+        if self.anti_alias:
+            self.FILM_RESIZE = 2
+        else:
+            self.FILM_RESIZE = 1
+
+        if self.graphics_data[self.OVERLAY_GRAPHICS_INDEX]:  # Overlay 2d drawings index.
+            self.has_2d_overlay = True
+        else:
+            self.has_2d_overlay = False
+
+        if self.graphics_data[self.OVERLAY_IMAGE_INDEX]:  # Overlay image index
+            self.has_image_overlay = True
+        else:
+            self.has_image_overlay = False
+
+        # If nothing in the overlay canvas, set overlay to False.
+        if not self.has_2d_overlay and not self.has_image_overlay:
+            self.overlay_enabled = False
+
+    def render_images(self, batch: bool, render_state: dict = None, progress_callback=None, stop_event=None,
+                      pause_event=None):
+        """
+        Renders the graphic annotations onto the images and saves the images in the specified folder.
+
+        Args:
+            batch (bool): True renders every image in queue, False renders the current image on display.
+            render_state (dict,optional): Pre-made render state. Default is a snapshot of the app.
+            progress_callback (optional): Called with progress, status and the render stats after every image.
+                Called from the render thread. Default ignores the progress.
+            stop_event (threading.Event,optional): Stops the render once set.
+            pause_event (threading.Event,optional): Holds the render while set.
+
+        Returns:
+            bool: True on successful render of all images. Else False.
+
+        """
+        if render_state is None:
+            render_state = self.create_render_state(batch=batch)
+        if progress_callback is None:
+            progress_callback = lambda progress, status, stats: None
+
+        self.configure_render(render_state)
+        if not batch:  # A single image is saved in the output folder.
+            self.archive = None
+        self.failed_images = []
+        self.animation_error = None
+        self.archive_error = None
+        self.reset_stage_stats()
+
+        indices = render_state["indices"]
+        total_images_in_queue = len(indices)
+        self.reset_render_stats(images_total=total_images_in_queue)
+
+        if total_images_in_queue == 0:
+            progress_callback(progress=1, status=False, stats=self.get_render_stats())
+            return False
+
+        if batch and self.contact_sheet:
+            return self.render_contact_sheets(render_state=render_state, progress_callback=progress_callback,
+                                              stop_event=stop_event, pause_event=pause_event)
+
+        # Fingerprints of every frame, compared against the manifest of the last render in the output folder.
+        self.render_manifest = self.load_render_manifest()
+        frame_fingerprints = self.get_frame_fingerprints(indices=indices)
+        if batch and self.skip_unchanged:
+            indices = [image_index for image_index in indices
+                       if not self.is_frame_unchanged(image_index, frame_fingerprints[image_index])]
+
+        # Resumes an unfinished batch of the same render queue, even if the unchanged frames are not skipped.
+        self.render_checkpoint = set()
+        if batch and not self.archive:
+            queue_hash = self.get_values_hash([[self.get_output_location(image_index), frame_fingerprints[image_index]]
+                                               for image_index in render_state["indices"]])
+            if self.resume_render:
+                self.render_checkpoint = self.load_render_checkpoint(queue_hash)
+            indices = [image_index for image_index in indices
+                       if not self.is_frame_checkpointed(image_index)]
+
+        files_saved = total_images_in_queue - len(indices)  # For progress bar update, skipped frames count as done.
+        self.render_stats["images_skipped"] = files_saved
+        self.render_stats["images_done"] = files_saved
+        if files_saved:
+            progress_callback(progress=files_saved / total_images_in_queue, status=True,
+                              stats=self.get_render_stats())
+
+        render_workers = render_state["settings"].get("render_workers", 1)
+        if batch and render_workers > 1 and len(indices) > 1:
+            results = self.render_in_process_pool(render_state=render_state, render_workers=render_workers,
+                                                  indices=indices)
+        else:
+            results = self.render_in_thread(indices=indices)
+
+        stopped = finished = False
+        last_checkpoint_time = time.perf_counter()
+        if batch and self.animation:
+            self.start_animation(queue_indices=render_state["indices"], render_indices=indices)
+        if self.archive:
+            self.start_archive()
+        try:
+            # Results arrive in queue order, so the progress bar fills in order.
+            for image_index, error in results:
+                if self.archive:
+                    self.feed_archive(image_index, rendered=not error)
+                    if self.archive_error:  # Nothing more can be written into the archive.
+                        break
+                else:
+                    self.update_render_manifest(image_index, frame_fingerprints[image_index], rendered=not error)
+                if error:
+                    self.failed_images.append((image_index, error))
+                    self.render_stats["images_failed"] += 1
+                else:
+                    self.render_checkpoint.add(image_index)
+                    for output_location in self.get_saved_locations(image_index):
+                        output_stat = self.get_file_stat(output_location)
+                        if output_stat:
+                            self.render_stats["bytes_written"] += output_stat[0]
+
+                if batch and self.animation:
+                    self.feed_animation(rendered_index=image_index)
+
+                files_saved += 1
+                self.render_stats["images_done"] = files_saved
+                progress = files_saved / total_images_in_queue  # 0 to 1 range
+                progress_callback(progress=progress, status=True, stats=self.get_render_stats())
+
+                if (batch and not self.archive and
+                        time.perf_counter() - last_checkpoint_time > self.RENDER_CHECKPOINT_INTERVAL):
+                    # Written during the render too, so a crash or a killed process loses a few frames at most.
+                    self.save_render_checkpoint(queue_hash)
+                    self.save_render_manifest()
+                    last_checkpoint_time = time.perf_counter()
+
+                # Not taking the next result holds the render, the stage queues or the worker window fill up.
+                self.wait_while_paused(pause_event=pause_event, stop_event=stop_event)
+                if stop_event is not None and stop_event.is_set():
+                    stopped = True
+                    break
+            else:
+                finished = True
+        finally:
+            # Stops the remaining renders if the loop did not finish.
+            results.close()
+            if batch and self.animation:
+                self.finish_animation(finished=finished)
+            if self.archive:
+                self.finish_archive(finished=finished)
+            else:
+                # Saved even if the render was stopped, the finished frames can be skipped the next time.
+                self.save_render_manifest()
+                if batch:
+                    if finished and not self.failed_images:
+                        self.remove_render_checkpoint()
+                    else:
+                        self.save_render_checkpoint(queue_hash)
+
+        if stopped:
+            return False
+
+        if self.failed_images or self.animation_error or self.archive_error:
+            progress_callback(progress=1, status=False, stats=self.get_render_stats())
+            return False
+
+        return True
+
+    def start_animation(self, queue_indices: list, render_indices: list):
+        """
+        Prepares the animation of the render queue. The frame durations follow the timestamps in the sequence codes,
+            scaled so the frames last frame_duration on average. Frames without a timestamp last frame_duration.
+
+        Args:
+            queue_indices (list): Indices of every image in the render queue, in order.
+            render_indices (list): Indices of the images rendered this time, the rest are read from the
+                output folder.
+
+        Returns:
+            None
+
+        """
+        frame_duration = self.animation.get("frame_duration", 500)
+        timestamps = [FileHandler.get_sequence_code_seconds(self.data_dict[image_index]['sequence_code'])
+                      for image_index in queue_indices]
+        gaps = [next_timestamp - timestamp if timestamp is not None and next_timestamp is not None else None
+                for timestamp, next_timestamp in zip(timestamps, timestamps[1:])]
+        positive_gaps = [gap for gap in gaps if gap is not None and gap > 0]
+        mean_gap = sum(positive_gaps) / len(positive_gaps) if positive_gaps else None
+
+        self.animation_durations = []
+        for gap in gaps + [None]:  # The last frame has no next timestamp.
+            if self.animation.get("sequence_timing", True) and mean_gap and gap is not None and gap > 0:
+                # Kept between 20 ms, the shortest delay players respect, and ten times the average.
+                self.animation_durations.append(min(max(round(frame_duration * gap / mean_gap), 20),
+                                                    frame_duration * 10))
+            else:
+                self.animation_durations.append(frame_duration)
+
+        animation_format = self.animation.get("format", "webp")
+        self.animation_path = self.animation.get("path") or f"{self.output_path}/rview_animation.{animation_format}"
+        self.animation_queue = list(queue_indices)
+        self.animation_pending = set(render_indices)
+        self.animation_position = 0
+        self.animation_last_frame = None
+        self.animation_writer = None
+        self.feed_animation(rendered_index=None)  # Frames skipped at the start of the queue.
+
+    def feed_animation(self, rendered_index):
+        """
+        Adds the frames that are ready, in queue order. Frames skipped by the render are read from the output folder
+            and a failed frame repeats the frame before it.
+
+        Args:
+            rendered_index (int|None): Index of the image the render just finished.
+
+        Returns:
+            None
+
+        """
+        self.animation_pending.discard(rendered_index)
+        while (self.animation_position < len(self.animation_queue) and
+               self.animation_queue[self.animation_position] not in self.animation_pending):
+            image_index = self.animation_queue[self.animation_position]
+            frame = self.animation_frames.pop(image_index, None)
+            if frame is None:
+                frame = self.load_animation_frame(image_index)
+
+            if frame is not None:
+                self.animation_last_frame = frame
+            elif self.animation_last_frame is not None:
+                frame = self.animation_last_frame
+            else:  # Nothing to show yet, the first frames of the queue failed.
+                frame = Image.new("RGB", (16, 9), "black")
+
+            if self.animation_writer is None:  # The first frame sets the size of the animation.
+                self.animation_writer = AnimationWriter(path=self.animation_path,
+                                                        durations=self.animation_durations, frame_size=frame.size,
+                                                        quality=self.animation.get("quality", 80))
+            self.animation_writer.add_frame(frame)
+            self.animation_position += 1
+
+    def load_animation_frame(self, image_index: int):
+        """
+        Reads a frame of the animation from the image saved in the output folder.
+
+        Args:
+            image_index (int): Index of the image.
+
+        Returns:
+            Image|None: The downscaled frame. None if the image could not be read.
+
+        """
+        try:
+            with open_project_image(self.get_output_location(image_index)) as output_image:
+                output_image.draft("RGB", self.get_animation_frame_size(output_image.size))  # Faster JPEG decode.
+                return self.get_animation_frame(output_image)
+        except Exception:
+            return None
+
+    def finish_animation(self, finished: bool):
+        """
+        Finishes the animation once every frame is added, else removes the unfinished animation.
+
+        Args:
+            finished (bool): True if the render went through the whole queue.
+
+        Returns:
+            None
+
+        """
+        self.animation_frames = {}
+        if self.animation_writer is None:
+            return
+
+        if finished and self.animation_position == len(self.animation_queue):
+            try:
+                animation_path = self.animation_writer.close()
+            except OSError as e:
+                self.animation_error = str(e)
+            else:
+                self.render_stats["bytes_written"] += os.path.getsize(animation_path)
+        else:
+            self.animation_writer.abort()
+        self.animation_writer = None
+
+    def get_animation_frame_size(self, image_size: tuple):
+        """
+        Gets the size of an image downscaled to fit the max size of the animation.
+
+        Args:
+            image_size (tuple): Size of the rendered image.
+
+        Returns:
+            tuple: Size of the animation frame.
+
+        """
+        max_size = self.animation.get("max_size", 1280)
+        scale = min(1, max_size / max(image_size))
+        return max(1, round(image_size[0] * scale)), max(1, round(image_size[1] * scale))
+
+    def get_animation_frame(self, final_image):
+        """
+        Downscales the rendered image to an RGB frame of the animation.
+
+        Args:
+            final_image (Image): The rendered image, left unchanged.
+
+        Returns:
+            Image: The animation frame.
+
+        """
+        frame_size = self.get_animation_frame_size(final_image.size)
+        if frame_size != final_image.size:
+            final_image = final_image.resize(frame_size, resample=Image.LANCZOS, reducing_gap=3.0)
+        return final_image.convert("RGB")
+
+    def start_archive(self):
+        """
+        Opens the archive the batch is written into.
+
+        Returns:
+            None
+
+        """
+        archive_format = self.archive.get("format", "zip")
+        self.archive_path = self.archive.get("path") or f"{self.output_path}/rview_output.{archive_format}"
+        self.archive_index = []
+        self.archive_writer = ArchiveWriter(path=self.archive_path)
+
+    def feed_archive(self, image_index: int, rendered: bool):
+        """
+        Adds the encoded files of a finished frame to the archive. The results arrive in queue order, so the
+            archive is in queue order too.
+
+        Args:
+            image_index (int): Index of the image the render just finished.
+            rendered (bool): False drops the files of a failed frame.
+
+        Returns:
+            None
+
+        """
+        archive_entries = self.archive_entries.pop(image_index, [])
+        if not rendered or self.archive_writer is None:
+            return
+
+        try:
+            for name, data in archive_entries:
+                self.render_stats["bytes_written"] += self.archive_writer.add_file(name, data)
+        except OSError as e:
+            self.archive_error = f"{type(e).__name__}: {e}"
+            self.archive_writer.abort()
+            self.archive_writer = None
+            return
+
+        if self.archive.get("index"):
+            self.archive_index.append({"files": [name for name, _ in archive_entries],
+                                       "source": self.images[image_index],
+                                       "sequence_code": self.data_dict[image_index]['sequence_code']})
+
+    def finish_archive(self, finished: bool):
+        """
+        Finishes the archive, with the index as its last file, once every frame is added. Else removes the
+            unfinished archive.
+
+        Args:
+            finished (bool): True if the render went through the whole queue.
+
+        Returns:
+            None
+
+        """
+        self.archive_entries = {}
+        if self.archive_writer is None:
+            return
+
+        if finished:
+            try:
+                if self.archive.get("index"):
+                    index_data = json.dumps(self.archive_index, indent=4).encode("utf-8")
+                    self.render_stats["bytes_written"] += self.archive_writer.add_file(self.ARCHIVE_INDEX_FILENAME,
+                                                                                       index_data)
+                self.archive_writer.close()
+            except OSError as e:
+                self.archive_error = f"{type(e).__name__}: {e}"
+                self.archive_writer.abort()
+        else:
+            self.archive_writer.abort()
+        self.archive_writer = None
+
+    def render_contact_sheets(self, render_state: dict, progress_callback, stop_event=None, pause_event=None):
+        """
+        Renders the render queue as pages of thumbnails with their sequence codes. Every thumbnail is rendered at
+            its own scale, the annotations are drawn straight at thumbnail size instead of shrinking a full size
+            render, and the thumbnails are rendered in the render worker processes.
+
+        Args:
+            render_state (dict): Render state from create_render_state.
+            progress_callback: Called with progress, status and the render stats after every thumbnail.
+            stop_event (threading.Event,optional): Stops the render once set.
+            pause_event (threading.Event,optional): Holds the render while set.
+
+        Returns:
+            bool: True on successful render of all thumbnails. Else False.
+
+        """
+        indices = render_state["indices"]
+        columns = self.contact_sheet.get("columns", 6)
+        rows = self.contact_sheet.get("rows", 5)
+        cell_width = self.contact_sheet.get("thumbnail_width", 320)
+        cell_size = (cell_width, cell_width * 9 // 16)
+        sheet_format = self.contact_sheet.get("format", "png")
+        caption_height = max(12, cell_width // 14)
+        caption_font, ascent, descent = get_cached_font(font_path=os.path.join("fonts", "RobotoMono-Medium.ttf"),
+                                                        size=caption_height - 2)
+        padding = self.CONTACT_SHEET_PADDING
+        cells_per_sheet = columns * rows
+
+        render_workers = render_state["settings"].get("render_workers", 1)
+        if render_workers > 1 and len(indices) > 1:
+            results = self.render_thumbnails_in_process_pool(render_state=render_state, render_workers=render_workers,
+                                                             indices=indices, cell_size=cell_size)
+        else:
+            results = ((image_index, *self.render_thumbnail_safely(image_index, cell_size=cell_size))
+                       for image_index in indices)
+
+        sheet = sheet_draw = None
+        try:
+            for position, (image_index, error, thumbnail) in enumerate(results):
+                cell = position % cells_per_sheet
+                if cell == 0:  # New page, the last page only has the rows it needs.
+                    sheet_rows = min(rows, math.ceil((len(indices) - position) / columns))
+                    sheet = Image.new("RGB", (padding + columns * (cell_size[0] + padding),
+                                              padding + sheet_rows * (cell_size[1] + caption_height + padding)),
+                                      self.CONTACT_SHEET_COLOR)
+                    sheet_draw = ImageDraw.Draw(sheet)
+
+                cell_left = padding + (cell % columns) * (cell_size[0] + padding)
+                cell_upper = padding + (cell // columns) * (cell_size[1] + caption_height + padding)
+                if error:
+                    self.failed_images.append((image_index, error))
+                    self.render_stats["images_failed"] += 1
+                    sheet_draw.rectangle((cell_left, cell_upper, cell_left + cell_size[0] - 1,
+                                          cell_upper + cell_size[1] - 1), outline="#E20000", width=2)
+                else:
+                    sheet.paste(thumbnail, (cell_left + (cell_size[0] - thumbnail.width) // 2,
+                                            cell_upper + (cell_size[1] - thumbnail.height) // 2))
+
+                caption = (self.data_dict[image_index]['sequence_code'] or
+                           os.path.basename(self.data_dict[image_index]['file']))
+                while len(caption) > 1 and sheet_draw.textlength(caption, font=caption_font) > cell_size[0]:
+                    caption = caption[:-2] + "…"
+                sheet_draw.text((cell_left, cell_upper + cell_size[1] + caption_height), caption,
+                                font=caption_font, fill="#DADADA", anchor="ls")
+
+                if cell == cells_per_sheet - 1 or position == len(indices) - 1:
+                    sheet_location = f"{self.output_path}/rview_contact_sheet_{position // cells_per_sheet + 1:03d}." \
+                                     f"{sheet_format}"
+                    sheet.save(sheet_location, quality=self.jpeg_quality, compress_level=self.png_compression)
+                    self.render_stats["bytes_written"] += os.path.getsize(sheet_location)
+
+                self.render_stats["images_done"] = position + 1
+                progress_callback(progress=(position + 1) / len(indices), status=True, stats=self.get_render_stats())
+
+                self.wait_while_paused(pause_event=pause_event, stop_event=stop_event)
+                if stop_event is not None and stop_event.is_set():
+                    return False
+        finally:
+            results.close()
+
+        if self.failed_images:
+            progress_callback(progress=1, status=False, stats=self.get_render_stats())
+            return False
+        return True
+
+    def render_thumbnails_in_process_pool(self, render_state: dict, render_workers: int, indices: list,
+                                          cell_size: tuple):
+        """
+        Renders the contact sheet thumbnails in a pool of worker processes, a few thumbnails per worker in flight.
+
+        Args:
+            render_state (dict): Render state from create_render_state.
+            render_workers (int): Number of worker processes.
+            indices (list): Indices of the images.
+            cell_size (tuple): Size of the contact sheet cell.
+
+        Yields:
+            tuple: (image_index, error message or None, thumbnail or None) for every image, in queue order.
+
+        """
+        mp_context = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(max_workers=render_workers, mp_context=mp_context,
+                                       initializer=init_render_worker, initargs=(render_state,))
+        pending = deque()
+        indices = iter(indices)
+        try:
+            while True:
+                while len(pending) < render_workers * 4:
+                    image_index = next(indices, None)
+                    if image_index is None:
+                        break
+                    pending.append(executor.submit(render_thumbnail_task, image_index, cell_size))
+                if not pending:
+                    break
+                yield pending.popleft().result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def render_thumbnail_safely(self, image_index: int, cell_size: tuple):
+        """
+        Renders a contact sheet thumbnail, returning the error instead of raising it.
+
+        Args:
+            image_index (int): Index of the image.
+            cell_size (tuple): Size of the contact sheet cell.
+
+        Returns:
+            tuple: (error message or None, thumbnail or None)
+
+        """
+        try:
+            return None, self.render_thumbnail(image_index, cell_size=cell_size)
+        except Exception as e:  # If any one of the image fails, carry on with the rest.
+            return f"{type(e).__name__}: {e}", None
+
+    def render_thumbnail(self, image_index: int, cell_size: tuple):
+        """
+        Renders the image at the scale that fits the contact sheet cell. The source is decoded straight at thumbnail
+            size where the format allows, and the annotations, overlay and sequence code are drawn at that scale.
+
+        Args:
+            image_index (int): Index of the image.
+            cell_size (tuple): Size of the contact sheet cell.
+
+        Returns:
+            Image: RGB thumbnail.
+
+        """
+        with open_project_image(self.images[image_index]) as source_image:
+            image_width, image_height = source_image.size
+            # The untrimmed overlay makes the final image 16:9, the final image has to fit the cell.
+            final_width, final_height = source_image.size
+            if self.overlay_enabled and not self.trim_overlay:
+                final_width, final_height = self.get_overlay_size(image_size=source_image.size)
+            scale = min(cell_size[0] / final_width, cell_size[1] / final_height, 1)
+            thumbnail_size = (max(1, round(image_width * scale)), max(1, round(image_height * scale)))
+
+            source_image.draft("RGB", thumbnail_size)  # JPEGs are decoded at a fraction of their size.
+            if source_image.mode not in ("RGB", "RGBA", "L"):
+                source_image = source_image.convert("RGBA")
+            thumbnail = source_image.resize(thumbnail_size, resample=Image.LANCZOS, reducing_gap=3.0)
+
+        self.thumbnail_scale = thumbnail_size[0] / image_width
+        try:
+            thumbnail = self.render_image(image_index, source_image=thumbnail.convert("RGBA"))
+        finally:
+            self.thumbnail_scale = 1
+        return thumbnail.convert("RGB")
+
+    def wait_while_paused(self, pause_event, stop_event):
+        """
+        Blocks while the render is paused. The paused time is left out of the elapsed render time.
+
+        Args:
+            pause_event (threading.Event|None): Holds the render while set.
+            stop_event (threading.Event|None): Ends the pause once set.
+
+        Returns:
+            None
+
+        """
+        if pause_event is None or not pause_event.is_set():
+            return
+
+        pause_start = time.perf_counter()
+        while pause_event.is_set() and not (stop_event is not None and stop_event.is_set()):
+            time.sleep(0.1)
+        self.render_stats["start_time"] += time.perf_counter() - pause_start
+
+    def estimate_output(self, render_state: dict, batch: bool = True, sample_count: int = 3,
+                        kept_samples: dict = None, samples_lock=None, stop_event=None):
+        """
+        Estimates the size of the render output and the encode time from a few sample frames spread over the queue.
+            The samples are rendered and encoded in memory at the current settings, nothing is saved. Copied frames
+            are counted at the size of their source file. The export targets, the animation, the annotation layers,
+            the contact sheets and the archive are counted the way the render saves them.
+
+        Args:
+            render_state (dict): Render state from create_render_state.
+            batch (bool): True estimates the batch render, False the render of the current image, which saves only
+                the image and its export targets. Default True.
+            sample_count (int): Number of frames to sample. Default 3.
+            kept_samples (dict,optional): Encoded sizes and times of the sample frames and the contact sheet
+                thumbnails kept between estimates, keyed by the sample frame key from get_sample_frame_key and the
+                encode settings. The rendered frames are not kept. Only the samples of the current settings are
+                kept. Updated in place.
+            samples_lock (threading.Lock,optional): Guards kept_samples, shared by the estimates that overlap
+                while a stopped estimate finishes.
+            stop_event (threading.Event,optional): Stops the estimate once set.
+
+        Returns:
+            dict|None: "total_bytes" estimated size of the output, "encode_seconds" per frame, "samples"
+                number of sampled frames and "png_levels", {level: {"bytes", "seconds"}} per frame for every PNG
+                compression level. None if stopped.
+
+        """
+        self.configure_render(render_state)
+        if not batch:  # A single image is saved in the output folder.
+            self.animation = self.contact_sheet = self.archive = None
+        if kept_samples is None:
+            kept_samples = {}
+        if samples_lock is None:
+            samples_lock = threading.Lock()
+        indices = render_state["indices"]
+
+        cell_size = None
+        if self.contact_sheet:
+            cell_width = self.contact_sheet.get("thumbnail_width", 320)
+            cell_size = (cell_width, cell_width * 9 // 16)
+        render_key = (self.overlay_enabled, self.trim_overlay, self.render_sequence_code,
+                      self.sequence_code_position, self.anti_alias, self.annotations_only, cell_size)
+        with samples_lock:  # The samples of earlier settings are not kept around.
+            for sample_key in [sample_key for sample_key in kept_samples if sample_key[0][1] != render_key]:
+                del kept_samples[sample_key]
+
+        def get_sample(sample_key: tuple, make_sample):
+            with samples_lock:
+                if sample_key in kept_samples:
+                    return kept_samples[sample_key]
+            sample = make_sample()
+            with samples_lock:
+                # A stopped estimate may have outdated settings, the newer estimate already pruned the samples.
+                if stop_event is None or not stop_event.is_set():
+                    # The samples of the frame before it was edited are dropped.
+                    frame_key = sample_key[0]
+                    for kept_key in [kept_key for kept_key in kept_samples
+                                     if kept_key[0][0] == frame_key[0] and kept_key[0] != frame_key]:
+                        del kept_samples[kept_key]
+                    kept_samples[sample_key] = sample
+            return sample
+
+        if self.contact_sheet:
+            return self.estimate_contact_sheets(indices, sample_count=sample_count, cell_size=cell_size,
+                                                render_key=render_key, get_sample=get_sample, stop_event=stop_event)
+        if self.annotations_only:
+            estimate = self.estimate_annotation_layers(indices, sample_count=sample_count, render_key=render_key,
+                                                       get_sample=get_sample, stop_event=stop_event)
+        else:
+            estimate = self.estimate_images(indices, sample_count=sample_count, render_key=render_key,
+                                            get_sample=get_sample, stop_event=stop_event)
+        if estimate is not None and self.archive:
+            estimate["total_bytes"] += self.estimate_archive_overhead(indices)
+        return estimate
+
+    def estimate_images(self, indices: list, sample_count: int, render_key: tuple, get_sample, stop_event=None):
+        """
+        Estimates the images in the output folder, their export targets and the animation from a few rendered
+            sample frames.
+
+        Args:
+            indices (list): Indices of the images in the render queue.
+            sample_count (int): Number of frames to sample.
+            render_key (tuple): Settings that change the rendered pixels.
+            get_sample: Gets a kept sample by its key, or makes it with the callable given.
+            stop_event (threading.Event,optional): Stops the estimate once set.
+
+        Returns:
+            dict|None: Estimate, see estimate_output. None if stopped.
+
+        """
+        total_bytes = 0
+        encoded_indices = []
+        encoded_pixels = 0
+        target_pixels = [0] * len(self.export_targets)
+        for image_index in indices:
+            output_size = self.get_output_size(image_index)
+            if output_size:  # Copied frames are saved to the export targets too.
+                for target_position, export_target in enumerate(self.export_targets):
+                    target_size = self.get_target_size(output_size, max_size=export_target.get("max_size"))
+                    target_pixels[target_position] += target_size[0] * target_size[1]
+            if self.is_copy_of_source(image_index):
+                total_bytes += self.get_file_stat(self.images[image_index])[0]
+                continue
+            if output_size:
+                encoded_pixels += output_size[0] * output_size[1]
+            if not self.is_large_image(image_index):  # Too slow to sample, estimated from the others.
+                encoded_indices.append(image_index)
+        sample_indices = self.get_sample_indices(encoded_indices, sample_count=sample_count)
+
+        sample_bytes = []
+        sample_pixels = []
+        target_bytes = [0] * len(self.export_targets)
+        target_sample_pixels = [0] * len(self.export_targets)
+        animation_bytes = []
+        encode_seconds = []
+        png_levels = {level: {"bytes": 0, "seconds": 0.0} for level in range(10)}
+        png_samples = 0
+        for image_index in sample_indices:
+            if stop_event is not None and stop_event.is_set():
+                return None
+
+            # Only the encoded sizes and times are kept, the frame is rendered again if one of them is not kept for
+            #   the current encode settings.
+            frame_key = self.get_sample_frame_key(image_index, render_key=render_key)
+            rendered_frame = {}
+
+            def get_frame(image_index=image_index, rendered_frame=rendered_frame):
+                if "image" not in rendered_frame:
+                    rendered_frame["image"] = self.render_image(image_index)
+                return rendered_frame["image"]
+
+            frame_width, frame_height = get_sample((frame_key, "size"), lambda: get_frame().size)
+            sample_pixels.append(frame_width * frame_height)
+
+            image_format = Image.registered_extensions().get(os.path.splitext(self.images[image_index])[1].lower())
+            if image_format == "PNG":
+                # Every compression level is encoded once, the compression setting picks one of them.
+                sample_levels = get_sample((frame_key, "png_levels"),
+                                           lambda: self.sweep_png_levels(get_frame(), stop_event))
+                if sample_levels is None:
+                    return None
+                image_bytes, frame_seconds = sample_levels[self.png_compression]
+                png_samples += 1
+                for level, (level_bytes, level_seconds) in sample_levels.items():
+                    png_levels[level]["bytes"] += level_bytes
+                    png_levels[level]["seconds"] += level_seconds
+            else:
+                image_bytes, frame_seconds = get_sample(
+                    (frame_key, "image", image_format, self.jpeg_quality),
+                    lambda image_format=image_format: self.encode_sample(
+                        get_frame().convert("RGB") if image_format == "JPEG" else get_frame(),  # As in save_image.
+                        image_format=image_format, quality=self.jpeg_quality, compress_level=self.png_compression))
+            sample_bytes.append(image_bytes)
+
+            for target_position, export_target in enumerate(self.export_targets):
+                target_image_bytes, target_image_pixels, target_seconds = get_sample(
+                    (frame_key, "target", json.dumps(export_target, sort_keys=True)),
+                    lambda export_target=export_target: self.encode_target_sample(get_frame(), export_target))
+                target_bytes[target_position] += target_image_bytes
+                target_sample_pixels[target_position] += target_image_pixels
+                frame_seconds += target_seconds
+            encode_seconds.append(frame_seconds)
+
+            if self.animation:  # A still frame, the animation does not compress across frames much.
+                animation_key = (self.animation.get("format", "webp"), self.animation.get("max_size", 1280),
+                                 self.animation.get("quality", 80))
+                animation_bytes.append(get_sample((frame_key, "animation", animation_key),
+                                                  lambda: self.encode_animation_sample(get_frame())))
+
+        if sample_bytes:  # Bytes per pixel, the queue can mix resolutions.
+            total_bytes += sum(sample_bytes) / sum(sample_pixels) * encoded_pixels
+        for target_position in range(len(self.export_targets)):
+            if target_sample_pixels[target_position]:
+                total_bytes += (target_bytes[target_position] / target_sample_pixels[target_position] *
+                                target_pixels[target_position])
+        if animation_bytes:
+            total_bytes += sum(animation_bytes) / len(animation_bytes) * len(indices)
+        for level_stats in png_levels.values():
+            if png_samples:
+                level_stats["bytes"] /= png_samples
+                level_stats["seconds"] /= png_samples
+
+        return {"total_bytes": int(total_bytes),
+                "encode_seconds": sum(encode_seconds) / len(encode_seconds) if encode_seconds else 0.0,
+                "samples": len(sample_indices),
+                "png_levels": png_levels if png_samples else {}}
+
+    @staticmethod
+    def sweep_png_levels(image, stop_event=None):
+        """
+        Encodes the image at every PNG compression level.
+
+        Args:
+            image (Image): The image.
+            stop_event (threading.Event,optional): Stops the sweep once set.
+
+        Returns:
+            dict|None: {level: (bytes, seconds)} for levels 0-9. None if stopped.
+
+        """
+        sample_levels = {}
+        for level in range(10):
+            if stop_event is not None and stop_event.is_set():
+                return None
+            sample_levels[level] = ImageProcessor.encode_sample(image, image_format="PNG", compress_level=level)
+        return sample_levels
+
+    @staticmethod
+    def encode_sample(image, image_format: str, **save_options):
+        """
+        Encodes an image in memory and times the encode.
+
+        Args:
+            image (Image): The image.
+            image_format (str): Pillow format name.
+            **save_options: Options of Image.save.
+
+        Returns:
+            tuple: (size in bytes, seconds)
+
+        """
+        stage_start = time.perf_counter()
+        encoded_image = io.BytesIO()
+        image.save(encoded_image, format=image_format, **save_options)
+        return encoded_image.tell(), time.perf_counter() - stage_start
+
+    def encode_target_sample(self, final_image, export_target: dict):
+        """
+        Encodes the export target image of a sample frame in memory.
+
+        Args:
+            final_image (Image): The rendered sample frame.
+            export_target (dict): The export target.
+
+        Returns:
+            tuple: (size in bytes, pixels of the target image, seconds)
+
+        """
+        target_image = self.get_target_image(final_image, export_target=export_target)
+        target_bytes, target_seconds = self.encode_sample(target_image, image_format=export_target["format"].upper(),
+                                                          quality=export_target.get("quality", 90),
+                                                          compress_level=export_target.get("compression", 6))
+        return target_bytes, target_image.width * target_image.height, target_seconds
+
+    def encode_animation_sample(self, final_image):
+        """
+        Encodes a sample frame as a still frame of the animation in memory.
+
+        Args:
+            final_image (Image): The rendered sample frame.
+
+        Returns:
+            int: Size in bytes.
+
+        """
+        animation_frame = self.get_animation_frame(final_image)
+        if self.animation.get("format", "webp") == "gif":
+            return self.encode_sample(animation_frame.quantize(colors=256, method=Image.Quantize.MEDIANCUT),
+                                      image_format="GIF")[0]
+        return self.encode_sample(animation_frame, image_format="WEBP", quality=self.animation.get("quality", 80))[0]
+
+    def estimate_annotation_layers(self, indices: list, sample_count: int, render_key: tuple, get_sample,
+                                   stop_event=None):
+        """
+        Estimates the annotation layers and their json sidecars from a few sample layers. The source images are
+            not decoded, so every frame can be sampled.
+
+        Args:
+            indices (list): Indices of the images in the render queue.
+            sample_count (int): Number of frames to sample.
+            render_key (tuple): Settings that change the rendered pixels.
+            get_sample: Gets a kept sample by its key, or makes it with the callable given.
+            stop_event (threading.Event,optional): Stops the estimate once set.
+
+        Returns:
+            dict|None: Estimate, see estimate_output. None if stopped.
+
+        """
+        sample_indices = self.get_sample_indices(indices, sample_count=sample_count)
+        sample_bytes = []
+        encode_seconds = []
+        for image_index in sample_indices:
+            if stop_event is not None and stop_event.is_set():
+                return None
+
+            frame_key = self.get_sample_frame_key(image_index, render_key=render_key)
+            frame_bytes, frame_seconds = get_sample(
+                (frame_key, "layer", self.annotation_format, self.png_compression),
+                lambda image_index=image_index: self.encode_annotation_layer_sample(image_index))
+            sample_bytes.append(frame_bytes)
+            encode_seconds.append(frame_seconds)
+
+        return {"total_bytes": int(sum(sample_bytes) / len(sample_bytes) * len(indices)) if sample_bytes else 0,
+                "encode_seconds": sum(encode_seconds) / len(encode_seconds) if encode_seconds else 0.0,
+                "samples": len(sample_indices),
+                "png_levels": {}}
+
+    def encode_annotation_layer_sample(self, image_index: int):
+        """
+        Renders and encodes the annotation layer of a sample frame in memory, with its json sidecar.
+
+        Args:
+            image_index (int): Index of the image.
+
+        Returns:
+            tuple: (size in bytes of the layer and the sidecar, seconds of the layer encode)
+
+        """
+        annotation_layer, offset = self.render_annotation_layer(image_index)
+        layer_bytes, layer_seconds = 0, 0.0
+        if annotation_layer is not None:
+            layer_bytes, layer_seconds = self.encode_sample(annotation_layer,
+                                                            image_format=self.annotation_format.upper(),
+                                                            lossless=True, compress_level=self.png_compression)
+        sidecar = self.get_annotation_sidecar(image_index, annotation_layer=annotation_layer, offset=offset,
+                                              image_size=self.current_image_size)
+        return layer_bytes + len(json.dumps(sidecar, indent=4).encode("utf-8")), layer_seconds
+
+    def estimate_contact_sheets(self, indices: list, sample_count: int, cell_size: tuple, render_key: tuple,
+                                get_sample, stop_event=None):
+        """
+        Estimates the contact sheet pages from a sheet of a few sample thumbnails, scaled by the area of the pages.
+
+        Args:
+            indices (list): Indices of the images in the render queue.
+            sample_count (int): Number of thumbnails to sample.
+            cell_size (tuple): Size of the contact sheet cell.
+            render_key (tuple): Settings that change the rendered pixels.
+            get_sample: Gets a kept sample by its key, or makes it with the callable given.
+            stop_event (threading.Event,optional): Stops the estimate once set.
+
+        Returns:
+            dict|None: Estimate, see estimate_output. "encode_seconds" is the share of a page per thumbnail.
+                None if stopped.
+
+        """
+        columns = self.contact_sheet.get("columns", 6)
+        rows = self.contact_sheet.get("rows", 5)
+        sheet_format = self.contact_sheet.get("format", "png")
+        caption_height = max(12, cell_size[0] // 14)
+        padding = self.CONTACT_SHEET_PADDING
+        cells_per_sheet = columns * rows
+
+        sample_indices = self.get_sample_indices([image_index for image_index in indices
+                                                  if not self.is_large_image(image_index)], sample_count=sample_count)
+        thumbnails = []
+        for image_index in sample_indices:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            # The thumbnails are small, so they are kept instead of their encoded sizes.
+            thumbnails.append(get_sample((self.get_sample_frame_key(image_index, render_key=render_key), "thumbnail"),
+                                         lambda image_index=image_index: self.render_thumbnail(image_index,
+                                                                                               cell_size=cell_size)))
+        if not thumbnails:
+            return {"total_bytes": 0, "encode_seconds": 0.0, "samples": 0, "png_levels": {}}
+
+        # One row of the sample thumbnails, laid out like a page.
+        sample_sheet = Image.new("RGB", (padding + len(thumbnails) * (cell_size[0] + padding),
+                                         padding + cell_size[1] + caption_height + padding),
+                                 self.CONTACT_SHEET_COLOR)
+        for position, thumbnail in enumerate(thumbnails):
+            sample_sheet.paste(thumbnail, (padding + position * (cell_size[0] + padding) +
+                                           (cell_size[0] - thumbnail.width) // 2,
+                                           padding + (cell_size[1] - thumbnail.height) // 2))
+        stage_start = time.perf_counter()
+        encoded_image = io.BytesIO()
+        sample_sheet.save(encoded_image, format=Image.registered_extensions().get(f".{sheet_format}"),
+                          quality=self.jpeg_quality, compress_level=self.png_compression)
+        encode_seconds = time.perf_counter() - stage_start
+        sample_sheet_pixels = sample_sheet.width * sample_sheet.height
+
+        sheet_pixels = 0
+        for position in range(0, len(indices), cells_per_sheet):
+            sheet_rows = min(rows, math.ceil((len(indices) - position) / columns))
+            sheet_pixels += ((padding + columns * (cell_size[0] + padding)) *
+                             (padding + sheet_rows * (cell_size[1] + caption_height + padding)))
+
+        return {"total_bytes": int(encoded_image.tell() / sample_sheet_pixels * sheet_pixels),
+                "encode_seconds": encode_seconds / sample_sheet_pixels * sheet_pixels / len(indices),
+                "samples": len(thumbnails),
+                "png_levels": {}}
+
+    def estimate_archive_overhead(self, indices: list):
+        """
+        Estimates the bytes the archive adds to the encoded files, the headers of every file and the index.
+
+        Args:
+            indices (list): Indices of the images in the render queue.
+
+        Returns:
+            int: Size in bytes.
+
+        """
+        archive_format = self.archive.get("format", "zip")
+        archive_index = []
+        overhead_bytes = 0
+        for image_index in indices:
+            if self.annotations_only:  # Counted as if every frame had a layer.
+                names = [os.path.basename(location) for location in self.get_output_locations(image_index)]
+            else:
+                names = [os.path.basename(self.get_output_location(image_index))]
+            overhead_bytes += sum(ArchiveWriter.get_entry_overhead(archive_format, name) for name in names)
+            archive_index.append({"files": names, "source": self.images[image_index],
+                                  "sequence_code": self.data_dict[image_index]['sequence_code']})
+
+        if self.archive.get("index"):
+            overhead_bytes += len(json.dumps(archive_index, indent=4).encode("utf-8"))
+            overhead_bytes += ArchiveWriter.get_entry_overhead(archive_format, self.ARCHIVE_INDEX_FILENAME)
+        return overhead_bytes
+
+    @staticmethod
+    def get_sample_indices(indices: list, sample_count: int):
+        """
+        Picks the sample frames of the estimate spread over the queue, so a queue of mixed scenes and resolutions
+            is not judged by its start.
+
+        Args:
+            indices (list): Indices to sample from.
+            sample_count (int): Number of frames to sample.
+
+        Returns:
+            list: Indices of the sample frames.
+
+        """
+        step = max(1, len(indices) // sample_count)
+        return indices[step // 2::step][:sample_count]
+
+    def get_sample_frame_key(self, image_index: int, render_key: tuple):
+        """
+        Gets the key of a sample frame of the estimate. It changes with the source file, the graphic elements, the
+            overlay and the settings that change the rendered pixels, so a frame edited since is sampled again.
+
+        Args:
+            image_index (int): Index of the image.
+            render_key (tuple): Settings that change the rendered pixels.
+
+        Returns:
+            tuple: (image_index, render_key, hash of the frame contents)
+
+        """
+        fingerprint = self.get_frame_fingerprints([image_index])[image_index]
+        return image_index, render_key, self.get_values_hash([fingerprint["source"], fingerprint["graphics"],
+                                                              fingerprint["overlay"]])
+
+    def get_output_size(self, image_index: int):
+        """
+        Gets the size of the rendered image from the image size in the image data, the untrimmed overlay
+            makes the rendered image 16:9.
+
+        Args:
+            image_index (int): Index of the image.
+
+        Returns:
+            tuple|None: Width and height, None if the image size is not known.
+
+        """
+        image_size = self.data_dict[image_index].get("image_size")
+        if not image_size:
+            return None
+        if self.overlay_enabled and not self.trim_overlay:
+            return tuple(self.get_overlay_size(image_size=tuple(image_size)))
+        return tuple(image_size)
+
+    def reset_render_stats(self, images_total: int):
+        """
+        Resets the counters reported with the render progress.
+
+        Args:
+            images_total (int): Number of images in the render queue.
+
+        Returns:
+            None
+
+        """
+        self.render_stats = {
+            "images_total": images_total,
+            "images_done": 0,  # Rendered, failed and skipped images.
+            "images_skipped": 0,
+            "images_failed": 0,
+            "bytes_written": 0,
+            "start_time": time.perf_counter(),
+        }
+
+    def get_render_stats(self):
+        """
+        Gets a copy of the render counters with the time elapsed since the render started, safe to hand over to
+            another thread.
+
+        Returns:
+            dict: Render stats.
+
+        """
+        render_stats = dict(self.render_stats)
+        render_stats["elapsed"] = time.perf_counter() - render_stats.pop("start_time")
+        return render_stats
+
+    @staticmethod
+    def get_render_throughput(stats: dict):
+        """
+        Calculates the render throughput and the time left from the render stats. Skipped images are left out
+            of the throughput.
+
+        Args:
+            stats (dict): Render stats from get_render_stats.
+
+        Returns:
+            tuple: (images per second, seconds left or None if not known yet)
+
+        """
+        images_rendered = stats["images_done"] - stats["images_skipped"]
+        if images_rendered <= 0 or stats["elapsed"] <= 0:
+            return 0.0, None
+
+        images_per_second = images_rendered / stats["elapsed"]
+        return images_per_second, (stats["images_total"] - stats["images_done"]) / images_per_second
+
+    def load_render_manifest(self):
+        """
+        Loads the render manifest from the output folder.
+
+        Returns:
+            dict: Manifest entries keyed by the output filename. Empty if there is no valid manifest.
+
+        """
+        manifest_path = os.path.join(self.output_path, self.RENDER_MANIFEST_FILENAME)
+        try:
+            with open(manifest_path, 'r') as file:
+                manifest = json.load(file)
+            if manifest.get("version") == self.RENDER_MANIFEST_VERSION:
+                return manifest["frames"]
+        except Exception:
+            pass
+        return {}
+
+    def save_render_manifest(self):
+        """
+        Writes the render manifest to the output folder. Written to a temporary file first, so an interrupted write
+            never leaves a broken manifest behind.
+
+        Returns:
+            None
+
+        """
+        manifest_path = os.path.join(self.output_path, self.RENDER_MANIFEST_FILENAME)
+        manifest = {"version": self.RENDER_MANIFEST_VERSION, "frames": self.render_manifest}
+        try:
+            with open(manifest_path + ".tmp", 'w') as file:
+                json.dump(manifest, file)
+            os.replace(manifest_path + ".tmp", manifest_path)
+        except OSError:  # The manifest only speeds up the next render, not worth failing the render for.
+            pass
+
+    def load_render_checkpoint(self, queue_hash: str):
+        """
+        Loads the frames finished by an unfinished batch render of the same render queue.
+
+        Args:
+            queue_hash (str): Hash of the output filenames and the fingerprints of the render queue.
+
+        Returns:
+            set: Indices of the finished frames. Empty if there is no checkpoint of this render queue.
+
+        """
+        checkpoint_path = os.path.join(self.output_path, self.RENDER_CHECKPOINT_FILENAME)
+        try:
+            with open(checkpoint_path, 'r') as file:
+                checkpoint = json.load(file)
+            if checkpoint.get("version") == self.RENDER_CHECKPOINT_VERSION and checkpoint["queue"] == queue_hash:
+                return set(checkpoint["completed"])
+        except Exception:
+            pass
+        return set()
+
+    def save_render_checkpoint(self, queue_hash: str):
+        """
+        Writes the finished frames of the batch render to the output folder, written the same way as the manifest.
+
+        Args:
+            queue_hash (str): Hash of the output filenames and the fingerprints of the render queue.
+
+        Returns:
+            None
+
+        """
+        checkpoint_path = os.path.join(self.output_path, self.RENDER_CHECKPOINT_FILENAME)
+        checkpoint = {"version": self.RENDER_CHECKPOINT_VERSION, "queue": queue_hash,
+                      "completed": sorted(self.render_checkpoint)}
+        try:
+            with open(checkpoint_path + ".tmp", 'w') as file:
+                json.dump(checkpoint, file)
+            os.replace(checkpoint_path + ".tmp", checkpoint_path)
+        except OSError:
+            pass
+
+    def remove_render_checkpoint(self):
+        """
+        Removes the checkpoint once the batch render is complete.
+
+        Returns:
+            None
+
+        """
+        try:
+            os.remove(os.path.join(self.output_path, self.RENDER_CHECKPOINT_FILENAME))
+        except OSError:
+            pass
+
+    def is_frame_checkpointed(self, image_index: int):
+        """
+        Checks if the frame was finished by the unfinished batch render and its output file still exists.
+
+        Args:
+            image_index (int): Index of the image.
+
+        Returns:
+            bool: True if the frame can be skipped.
+
+        """
+        return image_index in self.render_checkpoint and os.path.isfile(self.get_output_location(image_index))
+
+    def update_render_manifest(self, image_index: int, fingerprint: dict, rendered: bool):
+        """
+        Records the fingerprint of a rendered frame along with the size and modified time of the saved image.
+
+        Args:
+            image_index (int): Index of the image.
+            fingerprint (dict): Fingerprint from get_frame_fingerprints.
+            rendered (bool): False removes the frame from the manifest.
+
+        Returns:
+            None
+
+        """
+        filename = os.path.basename(self.data_dict[image_index]['file'])
+        try:
+            if not rendered:
+                raise OSError
+            output_stat = os.stat(self.get_output_location(image_index))
+        except OSError:
+            self.render_manifest.pop(filename, None)
+            return
+
+        self.render_manifest[filename] = {"fingerprint": fingerprint,
+                                          "output": [output_stat.st_size, output_stat.st_mtime_ns]}
+
+    def is_frame_unchanged(self, image_index: int, fingerprint: dict):
+        """
+        Checks if the saved image in the output folder was rendered from the same source, annotations, overlay and
+            settings, and has not been changed since.
+
+        Args:
+            image_index (int): Index of the image.
+            fingerprint (dict): Fingerprint from get_frame_fingerprints.
+
+        Returns:
+            bool: True if the frame can be skipped.
+
+        """
+        filename = os.path.basename(self.data_dict[image_index]['file'])
+        manifest_entry = self.render_manifest.get(filename)
+        if not manifest_entry or manifest_entry["fingerprint"] != fingerprint:
+            return False
+
+        if not self.annotations_only and not all(os.path.isfile(self.get_target_location(image_index, export_target))
+                                                 for export_target in self.export_targets):
+            return False
+
+        try:
+            output_stat = os.stat(self.get_output_location(image_index))
+        except OSError:  # Output image was deleted.
+            return False
+        return manifest_entry["output"] == [output_stat.st_size, output_stat.st_mtime_ns]
+
+    def get_frame_fingerprints(self, indices: list):
+        """
+        Fingerprints everything that decides the rendered output of each frame. The source file is identified by
+            its size and modified time, the rest by a hash of the values.
+
+        Args:
+            indices (list): Indices of the images.
+
+        Returns:
+            dict: Fingerprint dictionary keyed by the image index.
+
+        """
+        settings_hash = self.get_values_hash([self.overlay_enabled, self.trim_overlay, self.render_sequence_code,
+                                              self.sequence_code_position, self.anti_alias, self.jpeg_quality,
+                                              self.png_compression, self.HIGHLIGHT_OPACITY,
+                                              self.OVERLAY_WIDTH, self.OVERLAY_HEIGHT, self.export_targets,
+                                              self.annotations_only, self.annotation_format])
+
+        overlay_hash = ""
+        if self.overlay_enabled:
+            overlay_graphics = [self.get_graphics_cache_values(cache)
+                                for cache in self.graphics_data[self.OVERLAY_GRAPHICS_INDEX].values()]
+            overlay_images = [[image_cache.image_path, self.get_file_stat(image_cache.image_path),
+                               image_cache.coordinates, image_cache.size, image_cache.opacity, image_cache.angle]
+                              for image_cache in self.graphics_data[self.OVERLAY_IMAGE_INDEX].values()]
+            overlay_hash = self.get_values_hash([overlay_graphics, overlay_images])
+
+        frame_fingerprints = {}
+        for image_index in indices:
+            graphics = [self.get_graphics_cache_values(cache) for cache in self.graphics_data[image_index].values()]
+            sequence_code = self.data_dict[image_index]['sequence_code'] if self.render_sequence_code else None
+
+            frame_fingerprints[image_index] = {
+                "source": self.get_file_stat(self.images[image_index]),
+                "graphics": self.get_values_hash([graphics, sequence_code]),
+                "overlay": overlay_hash,
+                "settings": settings_hash,
+            }
+        return frame_fingerprints
+
+    @staticmethod
+    def get_graphics_cache_values(cache):
+        """
+        Gets the values of a GraphicsCache that affect the render. The tags are left out.
+
+        Args:
+            cache (GraphicsCache): Graphic element.
+
+        Returns:
+            dict: Field values of the graphic element.
+
+        """
+        return {key: value for key, value in dataclasses.asdict(cache).items() if key != "tags"}
+
+    @staticmethod
+    def get_values_hash(values):
+        """
+        Hashes json serializable values.
+
+        Args:
+            values: Values to hash.
+
+        Returns:
+            str: sha1 hex digest.
+
+        """
+        return hashlib.sha1(json.dumps(values, default=str).encode()).hexdigest()
+
+    @staticmethod
+    def get_file_stat(file_path: str):
+        """
+        Gets the size and modified time of a file.
+
+        Args:
+            file_path (str): Path to the file.
+
+        Returns:
+            list|None: [size, modified time in ns]. None if the file is not found.
+
+        """
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            return None
+        return [file_stat.st_size, file_stat.st_mtime_ns]
+
+    def render_in_thread(self, indices: list):
+        """
+        Renders and saves the images in a three stage pipeline. A reader thread decodes the upcoming images,
+            the current thread draws the annotations and a writer thread encodes and saves the rendered images.
+            The stages are linked with bounded queues, so only a few images are held in memory at any time.
+
+        Args:
+            indices (list): Indices of the images to render.
+
+        Yields:
+            tuple: (image_index, error message or None) for every image, in order.
+
+        """
+        decoded_queue = queue.Queue(maxsize=self.prefetch_depth)
+        encode_queue = queue.Queue(maxsize=self.write_behind_depth)
+        results_queue = queue.Queue()
+        stop_event = threading.Event()
+
+        reader = threading.Thread(target=self.read_stage, args=(indices, decoded_queue, stop_event), daemon=True)
+        writer = threading.Thread(target=self.write_stage, args=(encode_queue, results_queue, stop_event),
+                                  daemon=True)
+        reader.start()
+        writer.start()
+
+        results_yielded = 0
+        try:
+            for image_index in indices:
+                item = self.get_from_stage_queue(decoded_queue, producer=reader)
+                if item is None:  # The reader died, the images it had not decoded fail.
+                    item = (image_index, None, "RuntimeError: The image reader stopped unexpectedly.")
+                image_index, source_image, error = item
+
+                final_image = None
+                if error is None and source_image is not None:
+                    stage_start = time.perf_counter()
+                    try:
+                        final_image = self.render_image(image_index, source_image=source_image)
+                    except Exception as e:  # If any one of the image fails, carry on with the rest.
+                        error = f"{type(e).__name__}: {e}"
+                    self.add_stage_time(stage="annotate", stage_start=stage_start)
+
+                elif error is None and (self.is_large_image(image_index) or self.annotations_only):
+                    # Decoded, rendered and saved here, so only one large image is held in memory at a time.
+                    #   Annotation layers are small, not worth handing over to the writer.
+                    try:
+                        self.render_and_save(image_index)
+                    except Exception as e:
+                        error = f"{type(e).__name__}: {e}"
+
+                # Errors also go through the writer, so the results stay in order.
+                if not self.put_to_stage_queue(encode_queue, (image_index, final_image, error), stop_event,
+                                               consumer=writer):
+                    break  # The writer died, the images it has not saved fail below.
+
+                # Passing on the images the writer has finished so far.
+                while not results_queue.empty():
+                    results_yielded += 1
+                    yield results_queue.get()
+            else:
+                self.put_to_stage_queue(encode_queue, None, stop_event, consumer=writer)  # No more images.
+
+            while results_yielded < len(indices):
+                result = self.get_from_stage_queue(results_queue, producer=writer)
+                if result is None:  # The writer died, the images it had not saved fail.
+                    for image_index in indices[results_yielded:]:
+                        yield image_index, "RuntimeError: The image writer stopped unexpectedly."
+                    return
+                results_yielded += 1
+                yield result
+
+        finally:
+            # Stops the reader and writer if the render was stopped midway.
+            stop_event.set()
+
+    def read_stage(self, indices: list, decoded_queue: queue.Queue, stop_event: threading.Event):
+        """
+        Reader stage of the render pipeline, decodes the images ahead of the annotate stage.
+
+        Args:
+            indices (list): Indices of the images to render.
+            decoded_queue (queue.Queue): Bounded queue to the annotate stage.
+            stop_event (threading.Event): Set when the render is stopped.
+
+        Returns:
+            None
+
+        """
+        for image_index in indices:
+            source_image = None
+            error = None
+            # Copies are made by the writer, large images are decoded by the annotate stage and annotation layers
+            #   need no decode.
+            if not (self.is_copy_of_source(image_index) or self.is_large_image(image_index) or self.annotations_only):
+                stage_start = time.perf_counter()
+                try:
+                    source_image = self.decode_image(image_index)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                self.add_stage_time(stage="decode", stage_start=stage_start)
+
+            if not self.put_to_stage_queue(decoded_queue, (image_index, source_image, error), stop_event):
+                return
+
+    def write_stage(self, encode_queue: queue.Queue, results_queue: queue.Queue, stop_event: threading.Event):
+        """
+        Writer stage of the render pipeline, encodes and saves the rendered images behind the annotate stage.
+
+        Args:
+            encode_queue (queue.Queue): Bounded queue from the annotate stage.
+            results_queue (queue.Queue): Queue for the (image_index, error) results.
+            stop_event (threading.Event): Set when the render is stopped.
+
+        Returns:
+            None
+
+        """
+        while not stop_event.is_set():
+            try:
+                item = encode_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            if item is None:  # All images done.
+                return
+
+            image_index, final_image, error = item
+            # Large images come already saved by the annotate stage.
+            if error is None and (final_image is not None or self.is_copy_of_source(image_index)):
+                stage_start = time.perf_counter()
+                try:
+                    if final_image is None:
+                        self.copy_source_image(image_index)
+                    else:
+                        self.save_image(image_index, final_image=final_image)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                self.add_stage_time(stage="encode", stage_start=stage_start)
+
+            results_queue.put((image_index, error))
+
+    @staticmethod
+    def get_from_stage_queue(stage_queue: queue.Queue, producer: threading.Thread):
+        """
+        Takes the next item of a stage queue, waiting while the stage that fills it is running.
+
+        Args:
+            stage_queue (queue.Queue): Queue to take the item from.
+            producer (threading.Thread): Thread of the stage that fills the queue.
+
+        Returns:
+            The item. None if the producer stopped without queuing it.
+
+        """
+        while True:
+            try:
+                return stage_queue.get(timeout=0.1)
+            except queue.Empty:
+                if not producer.is_alive():
+                    try:  # Queued right before the producer stopped.
+                        return stage_queue.get_nowait()
+                    except queue.Empty:
+                        return None
+
+    @staticmethod
+    def put_to_stage_queue(stage_queue: queue.Queue, item, stop_event: threading.Event,
+                           consumer: threading.Thread = None):
+        """
+        Puts an item in a bounded stage queue, waiting for space unless the render is stopped.
+
+        Args:
+            stage_queue (queue.Queue): Queue to put the item in.
+            item: Item to put in the queue.
+            stop_event (threading.Event): Set when the render is stopped.
+            consumer (threading.Thread,optional): Thread of the stage that empties the queue, the wait ends if it
+                stops. Default waits until the render is stopped.
+
+        Returns:
+            bool: True if the item was queued, False if the render was stopped or the consumer stopped.
+
+        """
+        while not stop_event.is_set():
+            try:
+                stage_queue.put(item, timeout=0.1)
+            except queue.Full:
+                if consumer is not None and not consumer.is_alive():
+                    return False
+                continue
+            return True
+        return False
+
+    def reset_stage_stats(self):
+        """
+        Resets the time spent and images processed by each render stage.
+
+        Returns:
+            None
+
+        """
+        self.stage_stats = {stage: {"images": 0, "seconds": 0.0} for stage in ("decode", "annotate", "encode")}
+
+    def add_stage_time(self, stage: str, stage_start: float = None, seconds: float = None, images: int = 1):
+        """
+        Adds the time spent on an image to the stats of a render stage.
+
+        Args:
+            stage (str): "decode", "annotate" or "encode".
+            stage_start (float,optional): time.perf_counter value from the start of the work.
+            seconds (float,optional): Time spent, if already measured.
+            images (int): Number of images processed in that time. Default 1.
+
+        Returns:
+            None
+
+        """
+        if seconds is None:
+            seconds = time.perf_counter() - stage_start
+        with self.stage_stats_lock:
+            self.stage_stats[stage]["images"] += images
+            self.stage_stats[stage]["seconds"] += seconds
+
+    def get_stage_throughput(self):
+        """
+        Calculates the throughput of every render stage from the time the stage spent working.
+            In the process pool, the time of all the workers is added up, so the throughput is per worker.
+
+        Returns:
+            dict: Images per second for "decode", "annotate" and "encode".
+
+        """
+        throughput = {}
+        with self.stage_stats_lock:
+            stage_stats = {stage: dict(stats) for stage, stats in self.stage_stats.items()}
+        for stage, stats in stage_stats.items():
+            if stats["seconds"] > 0:
+                throughput[stage] = stats["images"] / stats["seconds"]
+            else:
+                throughput[stage] = 0.0
+        return throughput
+
+    def get_stage_times(self):
+        """
+        Gets the time every render stage spent working, in total and per image. In the process pool, the time of
+            all the workers is added up.
+
+        Returns:
+            dict: {"seconds", "ms_per_image"} for "decode", "annotate" and "encode".
+
+        """
+        with self.stage_stats_lock:
+            stage_stats = {stage: dict(stats) for stage, stats in self.stage_stats.items()}
+        return {stage: {"seconds": stats["seconds"],
+                        "ms_per_image": stats["seconds"] * 1000 / stats["images"] if stats["images"] else 0.0}
+                for stage, stats in stage_stats.items()}
+
+    def render_in_process_pool(self, render_state: dict, render_workers: int, indices: list):
+        """
+        Renders and saves the images in a pool of worker processes.
+
+        Args:
+            render_state (dict): Render state from create_render_state.
+            render_workers (int): Number of worker processes.
+            indices (list): Indices of the images to render.
+
+        Yields:
+            tuple: (image_index, error message or None) for every image, in queue order.
+
+        """
+        # spawn, since forking a process that runs tkinter is not safe.
+        mp_context = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(max_workers=render_workers, mp_context=mp_context,
+                                       initializer=init_render_worker, initargs=(render_state,))
+        # Keeps a few renders per worker in flight instead of submitting the whole queue, so a paused or stopped
+        #   render leaves no backlog of submitted renders behind.
+        pending = deque()
+        indices = iter(indices)
+        try:
+            while True:
+                while len(pending) < render_workers * 2:
+                    image_index = next(indices, None)
+                    if image_index is None:
+                        break
+                    pending.append(executor.submit(render_worker_task, image_index))
+                if not pending:
+                    break
+
+                image_index, error, stage_stats, animation_frame, archive_entries = pending.popleft().result()
+                if animation_frame is not None:
+                    self.animation_frames[image_index] = animation_frame
+                if archive_entries is not None:
+                    self.archive_entries[image_index] = archive_entries
+                for stage, stats in stage_stats.items():
+                    self.add_stage_time(stage=stage, seconds=stats["seconds"], images=stats["images"])
+                yield image_index, error
+        finally:
+            # Drops the pending renders if the render was stopped midway.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def render_and_save(self, image_index: int):
+        """
+        Decodes, renders and saves a single image in the output folder.
+
+        Args:
+            image_index (int): Index of the image to render.
+
+        Returns:
+            str: Path of the saved image.
+
+        """
+        if self.annotations_only:
+            stage_start = time.perf_counter()
+            output_location = self.save_annotation_layer(image_index)
+            self.add_stage_time(stage="annotate", stage_start=stage_start)
+            return output_location
+
+        if self.is_copy_of_source(image_index):
+            stage_start = time.perf_counter()
+            output_location = self.copy_source_image(image_index)
+            self.add_stage_time(stage="encode", stage_start=stage_start)
+            return output_location
+
+        stage_start = time.perf_counter()
+        source_image = self.decode_image(image_index)
+        self.add_stage_time(stage="decode", stage_start=stage_start)
+
+        stage_start = time.perf_counter()
+        final_image = self.render_image(image_index, source_image=source_image)
+        self.add_stage_time(stage="annotate", stage_start=stage_start)
+
+        stage_start = time.perf_counter()
+        output_location = self.save_image(image_index, final_image=final_image)
+        self.add_stage_time(stage="encode", stage_start=stage_start)
+        return output_location
+
+    def is_copy_of_source(self, image_index: int):
+        """
+        Checks if the rendered image would be the same as the source image, a blank image with no overlay
+            and no sequence code.
+
+        Args:
+            image_index (int): Index of the image.
+
+        Returns:
+            bool: True if the source file can be copied as it is.
+
+        """
+        if self.graphics_data[image_index] or self.overlay_enabled or self.annotations_only:
+            return False
+        if self.render_sequence_code and self.data_dict[image_index]['sequence_code']:
+            return False
+        return True
+
+    def copy_source_image(self, image_index: int):
+        """
+        Copies the source file to the output folder, or the archive, without decoding and encoding it again.
+            Keeps the original quality and runs at disk speed, shutil uses sendfile where the os supports it.
+
+        Args:
+            image_index (int): Index of the image.
+
+        Returns:
+            str: Path of the copied image.
+
+        """
+        output_location = self.get_output_location(image_index)
+
+        if self.archive:
+            with open(self.images[image_index], 'rb') as source_file:
+                self.add_archive_entry(image_index, output_location, source_file.read())
+        else:
+            try:
+                shutil.copyfile(self.images[image_index], output_location)
+            except shutil.SameFileError:  # Output folder is the source folder, already in place.
+                pass
+
+        if self.export_targets or self.animation:  # Converted, so the source is decoded once for them.
+            with open_project_image(self.images[image_index]) as source_image:
+                self.save_export_targets(image_index, final_image=source_image)
+                if self.animation:
+                    self.animation_frames[image_index] = self.get_animation_frame(source_image)
+        return output_location
+
+    def decode_image(self, image_index: int):
+        """
+        Loads the source image as RGBA. Images rendered in bands are kept as RGB if they have no alpha,
+            converting them would hold a second full size copy.
+
+        Args:
+            image_index (int): Index of the image.
+
+        Returns:
+            Image: The decoded image.
+
+        """
+        source_image = open_project_image(self.images[image_index])
+        if source_image.mode in ("RGB", "RGBA") and self.is_tiled_render(image_size=source_image.size):
+            source_image.load()
+            return source_image
+        return source_image.convert(mode="RGBA")
+
+    def render_image(self, image_index: int, source_image=None):
+        """
+        Draws the annotations, overlay and sequence code of a single image.
+
+        Args:
+            image_index (int): Index of the image to render.
+            source_image (Image,optional): Already decoded RGBA source image. Default decodes the image.
+
+        Returns:
+            Image: The final RGBA image.
+
+        """
+        if source_image is None:
+            source_image = self.decode_image(image_index)
+
+        if self.is_tiled_render(image_size=source_image.size):
+            self.final_image = self.render_image_tiled(image_index, source_image=source_image)
+            self.imprint_sequence_code(image_index)
+            return self.final_image
+
+        if not self.graphics_data[image_index]:  # No 2d drawings, render as it is.
+            self.final_base_image = source_image
+
+        else:  # if the current image has 2d drawings.
+            self.current_image = source_image
+            self.final_base_image = self.current_image
+
+            # Only the region covered by the annotations gets supersampled and composited.
+            annotation_box = self.get_annotation_box(graphics_dict=self.graphics_data[image_index],
+                                                     image_size=self.current_image.size)
+            if annotation_box:
+                left, upper, right, lower = annotation_box
+                self.resized_base_graphics_layer = self.draw_annotation_layer(image_index,
+                                                                              annotation_box=annotation_box)
+
+                # Final Annotated Base image
+                self.final_base_image.alpha_composite(self.resized_base_graphics_layer, dest=(left, upper))
+
+        self.current_image_size = self.final_base_image.size
+
+        # ================Render Overlay Canvas==========================
+        if self.overlay_enabled:
+            # Reuses the overlay made for an earlier image of the same resolution.
+            self.overlay_layer = self.get_overlay_layer(image_size=self.current_image_size)
+
+            if self.trim_overlay:
+                # The overlay layer is already trimmed to the image, so no 16:9 backdrop is needed.
+                self.final_base_image.alpha_composite(self.overlay_layer)
+                self.final_image = self.final_base_image
+            else:
+                self.background_layer = Image.new("RGBA", (self.overlay_layer.width,
+                                                           self.overlay_layer.height), "white")
+
+                paste_position = ((self.overlay_layer.width - self.final_base_image.width) // 2,
+                                  (self.overlay_layer.height - self.final_base_image.height) // 2)
+
+                # pasting the base image on a 16:9 backdrop
+                self.background_layer.paste(self.final_base_image, paste_position)
+                self.final_image = Image.alpha_composite(self.background_layer, self.overlay_layer)
+
+        else:  # if no overlay save the base image.
+            self.final_image = self.final_base_image
+
+        # ============Imprint the Sequence code on the image=================
+        self.imprint_sequence_code(image_index)
+
+        return self.final_image
+
+    def draw_annotation_layer(self, image_index: int, annotation_box: tuple):
+        """
+        Draws the graphic elements of the image on a transparent film the size of the annotation box and returns it
+            downscaled to image pixels. The elements are drawn at their full film coordinates through FilmDraw, so
+            the layer gets the same pixels as the box of a full size film.
+
+        Args:
+            image_index (int): Index of the image.
+            annotation_box (tuple): (left, upper, right, lower) from get_annotation_box.
+
+        Returns:
+            Image: The RGBA annotation layer the size of the annotation box, downscaled to image pixels.
+
+        """
+        left, upper, right, lower = annotation_box
+
+        self.base_graphics_layer = Image.new("RGBA", ((right - left) * self.FILM_RESIZE,
+                                                      (lower - upper) * self.FILM_RESIZE), (0, 0, 0, 0))
+
+        self.canvas_draw = FilmDraw(self.base_graphics_layer, upper=upper * self.FILM_RESIZE,
+                                    left=left * self.FILM_RESIZE)
+
+        # ================Render Base Canvas==========================
+
+        # The graphic elements are drawn on a transparent blank film layer before finally pasting over the base image.
+
+        for id, cache in self.graphics_data[image_index].items():
+            # cache is the single graphic object.
+            self.current_cache = cache
+            # Draws the 2d elements on the image.
+            self.plot_graphic_element(layer="base")
+
+        # Resize the enlarged box to Normal size.
+        if self.anti_alias:
+            # The margin of the box keeps the kernel of the downscale on transparent pixels at the film edges.
+            return self.base_graphics_layer.resize((right - left, lower - upper), resample=Image.LANCZOS)
+        return self.base_graphics_layer  # not wasting time with useless resize
+
+    def render_annotation_layer(self, image_index: int):
+        """
+        Renders only the annotations, the overlay and the sequence code of the image on a transparent layer,
+            cropped to the region they cover. The source image is never decoded, only its size is needed.
+            Composited over the source image at the offset, the layer gives the pixels of render_image, off by one
+            rounding step at most where the annotations and the overlay overlap.
+
+        Args:
+            image_index (int): Index of the image.
+
+        Returns:
+            tuple: (RGBA layer or None if there is nothing to draw, (x, y) offset of the layer from the top left
+                corner of the source image). The offset is negative where an untrimmed overlay reaches past the image.
+
+        """
+        image_size = self.data_dict[image_index].get("image_size")
+        if not image_size:
+            with open_project_image(self.images[image_index]) as source_image:  # Reads the header only.
+                image_size = source_image.size
+        image_width, image_height = self.current_image_size = tuple(image_size)
+
+        # Layers to stack, with their position on the source image. Later layers go on top.
+        layers = []
+        annotation_box = None
+        if self.graphics_data[image_index]:
+            annotation_box = self.get_annotation_box(graphics_dict=self.graphics_data[image_index],
+                                                     image_size=self.current_image_size)
+        if annotation_box:
+            layers.append((self.draw_annotation_layer(image_index, annotation_box=annotation_box),
+                           annotation_box[:2]))
+
+        # Box of the final image on the source image, the sequence code goes on its corner.
+        frame_box = (0, 0, image_width, image_height)
+        if self.overlay_enabled:
+            overlay_layer = self.get_overlay_layer(image_size=self.current_image_size)
+            overlay_position = (0, 0)
+            if not self.trim_overlay:  # The image sits in the middle of the 16:9 overlay.
+                overlay_position = (-((overlay_layer.width - image_width) // 2),
+                                    -((overlay_layer.height - image_height) // 2))
+                frame_box = (*overlay_position, overlay_position[0] + overlay_layer.width,
+                             overlay_position[1] + overlay_layer.height)
+            overlay_box = overlay_layer.getbbox()
+            if overlay_box:
+                layers.append((overlay_layer.crop(overlay_box),
+                               (overlay_position[0] + overlay_box[0], overlay_position[1] + overlay_box[1])))
+
+        sequence_code = self.data_dict[image_index]['sequence_code'] if self.render_sequence_code else None
+        if sequence_code:
+            frame_left, frame_upper, frame_right, frame_lower = frame_box
+            sequence_code_image = self.generate_sequence_code_image(
+                sequence_code=sequence_code, frame_size=(frame_right - frame_left, frame_lower - frame_upper))
+            sequence_code_image = sequence_code_image.convert("RGBA")
+            code_left = frame_right - sequence_code_image.width if self.sequence_code_position in ("ne", "se") \
+                else frame_left
+            code_upper = frame_lower - sequence_code_image.height if self.sequence_code_position in ("sw", "se") \
+                else frame_upper
+            layers.append((sequence_code_image, (code_left, code_upper)))
+
+        if not layers:
+            return None, (0, 0)
+
+        left = min(position[0] for layer, position in layers)
+        upper = min(position[1] for layer, position in layers)
+        right = max(position[0] + layer.width for layer, position in layers)
+        lower = max(position[1] + layer.height for layer, position in layers)
+
+        annotation_layer = Image.new("RGBA", (right - left, lower - upper), (0, 0, 0, 0))
+        for layer, (layer_left, layer_upper) in layers:
+            annotation_layer.alpha_composite(layer, dest=(layer_left - left, layer_upper - upper))
+        return annotation_layer, (left, upper)
+
+    def save_annotation_layer(self, image_index: int):
+        """
+        Saves the annotation layer of the image and a json sidecar with its offset, for compositing the annotations
+            over the source image, or a regraded copy of it, outside the app.
+
+        Args:
+            image_index (int): Index of the image.
+
+        Returns:
+            str: Path of the saved sidecar.
+
+        """
+        annotation_layer, offset = self.render_annotation_layer(image_index)
+
+        layer_location = self.get_annotation_layer_location(image_index)
+        sidecar = self.get_annotation_sidecar(image_index, annotation_layer=annotation_layer, offset=offset,
+                                              image_size=self.current_image_size)
+        if annotation_layer is not None:
+            layer_file = io.BytesIO() if self.archive else layer_location
+            annotation_layer.save(layer_file, format=self.annotation_format.upper(), lossless=True,
+                                  compress_level=self.png_compression)
+            if self.archive:
+                self.add_archive_entry(image_index, layer_location, layer_file.getvalue())
+        elif not self.archive and os.path.exists(layer_location):  # Left over from an earlier render of the image.
+            os.remove(layer_location)
+
+        sidecar_location = self.get_output_location(image_index)
+        if self.archive:
+            self.add_archive_entry(image_index, sidecar_location, json.dumps(sidecar, indent=4).encode("utf-8"))
+        else:
+            with open(sidecar_location, 'w') as file:
+                json.dump(sidecar, file, indent=4)
+        return sidecar_location
+
+    def get_annotation_sidecar(self, image_index: int, annotation_layer, offset: tuple, image_size: tuple):
+        """
+        Gets the json sidecar of the annotation layer, the offset and size of the layer on the source image.
+
+        Args:
+            image_index (int): Index of the image.
+            annotation_layer (Image|None): The annotation layer, None if there is nothing to draw.
+            offset (tuple): (x, y) offset of the layer from the top left corner of the source image.
+            image_size (tuple): Size of the source image.
+
+        Returns:
+            dict: The sidecar.
+
+        """
+        sidecar = {"image": os.path.basename(self.data_dict[image_index]['file']),
+                   "image_size": list(image_size), "layer": None, "offset": list(offset), "size": None}
+        if annotation_layer is not None:
+            sidecar["layer"] = os.path.basename(self.get_annotation_layer_location(image_index))
+            sidecar["size"] = list(annotation_layer.size)
+        return sidecar
+
+    def is_large_image(self, image_index: int):
+        """
+        Checks the image size saved in the image data to find the images rendered in bands before decoding them.
+
+        Args:
+            image_index (int): Index of the image.
+
+        Returns:
+            bool: True if the image is too large to render in one piece.
+
+        """
+        image_size = self.data_dict[image_index].get("image_size")
+        return bool(image_size) and self.is_tiled_render(image_size=tuple(image_size))
+
+    def is_tiled_render(self, image_size: tuple):
+        """
+        Checks if rendering the image in one piece would go over the render memory budget.
+
+        Args:
+            image_size (tuple): Size of the image.
+
+        Returns:
+            bool: True if the image has to be rendered in bands.
+
+        """
+        width, height = image_size
+        return self.get_band_row_bytes(width=width) * height > self.render_memory_budget
+
+    def get_band_row_bytes(self, width: int):
+        """
+        Estimates the memory used per row of a band, the supersampled film, its downscaled and cropped copies
+            and the RGBA copies of the image band made while compositing.
+
+        Args:
+            width (int): Width of the band.
+
+        Returns:
+            int: Bytes per row.
+
+        """
+        return width * 4 * (self.FILM_RESIZE ** 2 + 5)
+
+    def get_band_height(self, width: int):
+        """
+        Gets the height of the bands that fit in the render memory budget.
+
+        Args:
+            width (int): Width of the band.
+
+        Returns:
+            int: Band height in pixels.
+
+        """
+        band_height = self.render_memory_budget // self.get_band_row_bytes(width=width) - 2 * self.ANNOTATION_BOX_MARGIN
+        band_height -= band_height % 2  # Even, so the film offsets of the bands stay even.
+        return max(band_height, self.MIN_BAND_HEIGHT)
 
-    def __init__(self, app, canvas_gm, overlay_gm):
+    def render_image_tiled(self, image_index: int, source_image):
         """
-        Initializer for the ImageProcessor
+        Renders an image too large for the render memory budget in horizontal bands. Each band draws only the
+            graphic elements that cross it and is composited onto the image in place, so the memory used on top of
+            the decoded image stays within the budget however large the image is.
+            The films of the bands skip the rows above them through FilmDraw while the elements keep their full film
+            coordinates, so a banded image has the same pixels as the image rendered in one piece.
 
         Args:
-            app: Main app
-            canvas_gm: Base Canvas GraphicsProcessor
-            overlay_gm: Overlay Canvas GraphicProcessor
-        """
-        self.app = app
-        self.canvas_gm = canvas_gm
-        self.overlay_gm = overlay_gm
+            image_index (int): Index of the image to render.
+            source_image (Image): Decoded RGB or RGBA source image, modified in place.
 
-        self.current_image = None
-        self.canvas_image = None
-        self.overlay_layer = None
-        self.current_image_size = None
-        self.prev_image_size = None
-        try:
-            self.font = ImageFont.truetype(font=os.path.join("fonts", "RobotoMono-Medium.ttf"), size=30)
-        except:
-            self.font = ImageFont.load_default()
+        Returns:
+            Image: The final image, in the mode of the source image.
 
-    def render_images(self, batch: bool):
         """
-        Renders the graphic annotations onto the images and saves the images in the specified folder.
+        self.current_image_size = source_image.size
+        return self.render_bands(image_index, source_image=source_image)
+
+    def render_bands(self, image_index: int, source_image):
+        """
+        Draws the annotations and the overlay of the image band by band, called by render_image_tiled.
 
         Args:
-            batch (bool): True renders every image in queue, False renders the current image on display.
+            image_index (int): Index of the image to render.
+            source_image (Image): Decoded RGB or RGBA source image, modified in place.
 
         Returns:
-            bool: True on successful render of all images. Else False.
+            Image: The final image.
 
         """
+        image_width, image_height = source_image.size
+
+        graphics_dict = self.graphics_data[image_index]
+        if graphics_dict:
+            # Film boxes of the elements, measured once for all the bands.
+            element_boxes = []
+            for id, cache in graphics_dict.items():
+                self.current_cache = cache
+                element_box = self.get_graphic_element_box(layer="base")
+                if element_box is not None:
+                    element_boxes.append((cache, element_box))
+
+            band_height = self.get_band_height(width=image_width)
+            for upper in range(0, image_height, band_height):
+                self.render_annotation_band(source_image, element_boxes=element_boxes,
+                                            band=(upper, min(upper + band_height, image_height)))
+
+        final_image = source_image
+        if self.overlay_enabled:
+            overlay_width, overlay_height = self.get_overlay_size(image_size=self.current_image_size)
+            if self.trim_overlay:
+                overlay_left, overlay_upper, right, lower = self.get_trim_box(
+                    overlay_size=(overlay_width, overlay_height), image_size=self.current_image_size)
+            else:
+                # pasting the base image on a 16:9 backdrop
+                final_image = Image.new(source_image.mode, (overlay_width, overlay_height), "white")
+                final_image.paste(source_image, ((overlay_width - image_width) // 2,
+                                                 (overlay_height - image_height) // 2))
+                overlay_left = overlay_upper = 0
+
+            # The overlay films start at the left edge of the overlay.
+            band_height = self.get_band_height(width=overlay_width)
+            for upper in range(0, final_image.height, band_height):
+                lower = min(upper + band_height, final_image.height)
+                overlay_band = self.build_overlay_layer(image_size=self.current_image_size,
+                                                        region=(overlay_left, overlay_upper + upper,
+                                                                overlay_left + final_image.width,
+                                                                overlay_upper + lower))
+                self.composite_band(final_image, layer=overlay_band, dest=(0, upper))
+
+        return final_image
+
+    def render_annotation_band(self, image, element_boxes: list, band: tuple):
+        """
+        Draws the graphic elements crossing a band of the image on a supersampled film and composites it
+            onto the image. The film is drawn with a margin so the anti-alias downscale matches across the bands.
 
-        # OverlayCanvas is the tkinter.Canvas object for the global overlay elements.
+        Args:
+            image (Image): Image being rendered, modified in place.
+            element_boxes (list): (GraphicsCache, film box) of the elements of the image.
+            band (tuple): (upper, lower) rows of the band.
 
-        self.HIGHLIGHT_OPACITY = self.app.user_settings["highlight_opacity"]
-        self.OVERLAY_IMAGE_INDEX = -2
-        self.OVERLAY_GRAPHICS_INDEX = -1
-        self.FONT_PATH = "fonts"
-        self.data_dict = self.app.image_data
-        self.graphics_data = self.app.graphics_data
-        self.current_image_size = None
-        self.prev_image_size = None
+        Returns:
+            None
+
+        """
+        upper, lower = band
+        margin = self.ANNOTATION_BOX_MARGIN
+        film_upper, film_lower = max(0, upper - margin), min(image.height, lower + margin)
+
+        band_elements = [cache for cache, box in element_boxes
+                         if box[1] < film_lower * self.FILM_RESIZE and box[3] > film_upper * self.FILM_RESIZE]
+        if not band_elements:
+            return
 
-        include_blanks = self.app.include_blanks
-        overlay_enabled = self.app.render_overlay
-        trim_overlay = self.app.trim_overlay
-        render_sequence_code = self.app.render_sequence_code
-        sequence_code_position = self.app.sequence_code_render_position
-        self.anti_alias = self.app.anti_alias_output
-        jpeg_quality = self.app.jpeg_quality
-        png_compression = self.app.png_compression
-        output_path = self.app.output_path
+        self.base_graphics_layer = Image.new("RGBA", (image.width * self.FILM_RESIZE,
+                                                      (film_lower - film_upper) * self.FILM_RESIZE), (0, 0, 0, 0))
+        self.canvas_draw = FilmDraw(self.base_graphics_layer, upper=film_upper * self.FILM_RESIZE)
 
-        first_image_processed = False
+        for cache in band_elements:
+            self.current_cache = cache
+            self.plot_graphic_element(layer="base")
 
         if self.anti_alias:
-            self.FILM_RESIZE = 2
+            band_layer = self.base_graphics_layer.resize((image.width, film_lower - film_upper),
+                                                         resample=Image.LANCZOS)
         else:
-            self.FILM_RESIZE = 1
+            band_layer = self.base_graphics_layer
+        self.base_graphics_layer = None  # Freed before compositing.
 
-        if self.graphics_data[self.OVERLAY_GRAPHICS_INDEX]:  # Overlay 2d drawings index.
-            has_2d_overlay = True
-        else:
-            has_2d_overlay = False
+        band_layer = band_layer.crop((0, upper - film_upper, image.width, lower - film_upper))
+        self.composite_band(image, layer=band_layer, dest=(0, upper))
 
-        if self.graphics_data[self.OVERLAY_IMAGE_INDEX]:  # Overlay image index
-            has_image_overlay = True
-        else:
-            has_image_overlay = False
+    @staticmethod
+    def composite_band(image, layer, dest: tuple):
+        """
+        Alpha composites a layer onto a region of an RGB or RGBA image in place.
 
-        # If nothing in the overlay canvas, set overlay to False.
-        if not has_2d_overlay and not has_image_overlay:
-            overlay_enabled = False
+        Args:
+            image (Image): Image to composite onto.
+            layer (Image): RGBA layer.
+            dest (tuple): Upper left corner of the region.
 
-        if batch:  # If export mode is batch.
+        Returns:
+            None
 
-            indices_with_queue = []
+        """
+        if image.mode == "RGBA":
+            image.alpha_composite(layer, dest=dest)
+            return
 
-            # Get the total images in queue
-            for index, data in self.data_dict.items():
-                if data.get("in_queue") == True:
-                    indices_with_queue.append(index)  # saving the indexes of the images in queue
-            total_images_in_queue = len(indices_with_queue)
+        left, upper = dest
+        band = image.crop((left, upper, left + layer.width, upper + layer.height)).convert("RGBA")
+        band.alpha_composite(layer)
+        image.paste(band.convert(image.mode), dest)
 
-            # total_images_in_queue = sum(1 for index,data in self.data_dict.items() if data.get("in_queue") is True)
-            if not include_blanks:
-                total_blanks = 0
-                for key in indices_with_queue:
-                    if not self.graphics_data[key]:
-                        total_blanks += 1
-                total_images_in_queue = total_images_in_queue - total_blanks
+    def imprint_sequence_code(self, image_index: int):
+        """
+        Pastes the sequence code of the image on a corner of the final image.
 
-            total_range = (0, self.app.available_index + 1)
+        Args:
+            image_index (int): Index of the rendered image.
 
-            if total_images_in_queue == 0:
-                self.app.render_menu.update_progress_bar(progress=1, status=False)
-                return False
+        Returns:
+            None
 
-        else:  # Render only the current image.
-            total_images_in_queue = 1
-            total_range = (self.app.image_index, self.app.image_index + 1)
+        """
+        if self.render_sequence_code:
+            sequence_code = self.data_dict[image_index]['sequence_code']
+            if sequence_code:
+                sequence_code_image = self.generate_sequence_code_image(sequence_code=sequence_code)
 
-        files_saved = 0  # For progress bar update.
+                if self.sequence_code_position == "ne":  # top right
+                    paste_anchor = (self.final_image.width - sequence_code_image.width, 0)
 
-        # Iterating through each of the images and redrawing the graphic elements.
-        for image_index in range(*total_range):
-            try:
-                # If the image is queued or single image export.
-                if self.data_dict[image_index]["in_queue"] or not batch:
-                    # If no 2d drawings, but include blanks is checked.
-                    if not self.graphics_data[image_index] and (include_blanks or not batch):
-                        self.final_base_image = Image.open(self.app.images[image_index]).convert(mode="RGBA")
+                elif self.sequence_code_position == "sw":  # bottom left
+                    paste_anchor = (0, self.final_image.height - sequence_code_image.height)
 
-                    elif self.graphics_data[image_index]:  # if the current image has 2d drawings.
-                        self.current_image = Image.open(self.app.images[image_index]).convert(mode="RGBA")
+                elif self.sequence_code_position == "se":  # bottom right
+                    paste_anchor = (self.final_image.width - sequence_code_image.width,
+                                    self.final_image.height - sequence_code_image.height)
+                else:  # nw top corner
+                    paste_anchor = (0, 0)
 
-                        self.base_graphics_layer = Image.new("RGBA", (self.current_image.width * self.FILM_RESIZE,
-                                                                      self.current_image.height * self.FILM_RESIZE),
-                                                             (0, 0, 0, 0))
+                self.final_image.paste(sequence_code_image, paste_anchor)
 
-                        self.canvas_draw = ImageDraw.Draw(self.base_graphics_layer)
+    def get_output_location(self, image_index: int):
+        """
+        Gets the path of the rendered image in the output folder, the filename of the source image.
 
-                        # ================Render Base Canvas==========================
+        Args:
+            image_index (int): Index of the image.
 
-                        # The graphic elements are drawn on a transparent blank film layer before finally pasting over the base image.
+        Returns:
+            str: Output path of the image.
 
-                        for id, cache in self.app.graphics_data[image_index].items():
-                            # cache is the single graphic object.
-                            self.current_cache = cache
-                            # Draws the 2d elements on the image.
-                            self.plot_graphic_element(layer="base")
+        """
+        filename = os.path.basename(self.data_dict[image_index]['file'])
+        if self.annotations_only:  # The sidecar is saved for every image, the layer only if there is one.
+            return f"{self.output_path}/{os.path.splitext(filename)[0]}.annotations.json"
+        return f"{self.output_path}/{filename}"
 
-                        # Resize the enlarged image to Normal size.
-                        if self.anti_alias:
-                            self.resized_base_graphics_layer = self.base_graphics_layer.resize(self.current_image.size,
-                                                                                               resample=Image.LANCZOS)
-                        else:  # not wasting time with useless resize
-                            self.resized_base_graphics_layer = self.base_graphics_layer
+    def get_annotation_layer_location(self, image_index: int):
+        """
+        Gets the path of the annotation layer in the output folder, saved next to its json sidecar.
 
-                        # Final Annotated Base image
-                        self.final_base_image = Image.alpha_composite(self.current_image,
-                                                                      self.resized_base_graphics_layer)
+        Args:
+            image_index (int): Index of the image.
 
-                    else:
-                        continue  # Skip the image.
-
-                    self.current_image_size = self.final_base_image.size
-
-                    # ================Render Overlay Canvas==========================
-                    if overlay_enabled:
-                        # if the previous image had the same resolution, reuse the currently made overlay.
-                        if self.prev_image_size != self.current_image_size:
-                            self.prepare_overlay_layer()
-
-                            # Makes the transparent layer.
-                            # Enlarge the image if anti_alias enabled.
-                            if self.anti_alias:
-                                self.overlay_layer = self.overlay_layer.resize(
-                                    (self.overlay_layer.width * self.FILM_RESIZE,
-                                     self.overlay_layer.height * self.FILM_RESIZE))
-                                self.overlay_draw = ImageDraw.Draw(self.overlay_layer)
-
-                            for id, cache in self.graphics_data[self.OVERLAY_GRAPHICS_INDEX].items():
-                                # cache is the single graphic object.
-                                self.current_cache = cache
-                                # Draw overlay 2d items one by one.
-                                self.plot_graphic_element(layer="overlay")
-
-                            # Rescale overlay to image size.
-                            if self.anti_alias:
-                                self.overlay_layer = self.overlay_layer.resize(
-                                    (self.overlay_layer.width // self.FILM_RESIZE,
-                                     self.overlay_layer.height // self.FILM_RESIZE),
-                                    resample=Image.LANCZOS)
-
-                            # Images are pasted in after all the drawings has been made on the overlay layer.
-                            if has_image_overlay:  # if current overlay canvas has image elements.
-                                for id, image_cache in self.graphics_data[self.OVERLAY_IMAGE_INDEX].items():
-                                    self.current_cache = image_cache
-                                    # Draw overlay image items one by one.
-                                    self.insert_overlay_image_element()
-                        else:
-
-                            pass
-
-                        self.background_layer = Image.new("RGBA", (self.overlay_layer.width,
-                                                                   self.overlay_layer.height), "white")
-
-                        paste_position = ((self.overlay_layer.width - self.final_base_image.width) // 2,
-                                          (self.overlay_layer.height - self.final_base_image.height) // 2)
-
-                        # pasting the base image on a 16:9 backdrop
-                        self.background_layer.paste(self.final_base_image, paste_position)
-                        self.final_image = Image.alpha_composite(self.background_layer, self.overlay_layer)
-
-                        # -----------Trim the Final Image to the original image size------------------
-                        if trim_overlay:
-                            original_width, original_height = self.final_image.size
-                            target_width, target_height = self.final_base_image.size
-
-                            # Calculate the coordinates for cropping from the center
-                            left = (original_width - target_width) // 2
-                            upper = (original_height - target_height) // 2
-                            right = left + target_width
-                            lower = upper + target_height
-                            # crop the image
-                            self.final_image = self.final_image.crop((left, upper, right, lower))
-
-                    else:  # if no overlay save the base image.
-                        self.final_image = self.final_base_image
-
-                    # ============Imprint the Sequence code on the image=================
-                    if render_sequence_code:
-                        sequence_code = self.data_dict[image_index]['sequence_code']
-                        if sequence_code:
-                            sequence_code_image = self.generate_sequence_code_image(sequence_code=sequence_code)
-
-                            if sequence_code_position == "ne":  # top right
-                                paste_anchor = (self.final_image.width - sequence_code_image.width, 0)
-
-                            elif sequence_code_position == "sw":  # bottom left
-                                paste_anchor = (0, self.final_image.height - sequence_code_image.height)
-
-                            elif sequence_code_position == "se":  # bottom right
-                                paste_anchor = (self.final_image.width - sequence_code_image.width,
-                                                self.final_image.height - sequence_code_image.height)
-                            else:  # nw top corner
-                                paste_anchor = (0, 0)
-
-                            self.final_image.paste(sequence_code_image, paste_anchor)
-
-                    # ================Save the rendered image==========================
-                    filename = os.path.basename(self.data_dict[image_index]['file'])
-                    output_location = f"{output_path}/{filename}"
+        Returns:
+            str: Path of the annotation layer.
 
-                    try:
-                        self.final_image.save(output_location, quality=jpeg_quality, compress_level=png_compression)
-                    except OSError:  # incase image fails to save with alphas
-                        self.final_image = self.final_image.convert("RGB")
-                        self.final_image.save(output_location, quality=jpeg_quality, compress_level=png_compression)
-                    finally:
-                        files_saved += 1
-                        progress = files_saved / total_images_in_queue  # 0 to 1 range
-                        self.prev_image_size = self.current_image_size
-                    try:
-                        self.app.render_menu.update_progress_bar(progress=progress, status=True)
-                    except:
-                        return False
+        """
+        filename = os.path.splitext(os.path.basename(self.data_dict[image_index]['file']))[0]
+        return f"{self.output_path}/{filename}.annotations.{self.annotation_format}"
 
-            except Exception:  # If any one of the image fails to save.
-                return False
+    def get_target_location(self, image_index: int, export_target: dict):
+        """
+        Gets the path of the image saved for an export target, the filename of the source image with the
+            extension of the target format. A relative target folder is inside the output folder.
 
-        return True
+        Args:
+            image_index (int): Index of the image.
+            export_target (dict): Export target with the "folder" and "format" keys.
+
+        Returns:
+            str: Path of the image in the folder of the export target.
+
+        """
+        filename = os.path.splitext(os.path.basename(self.data_dict[image_index]['file']))[0]
+        target_folder = os.path.join(self.output_path, export_target['folder'])
+        return f"{target_folder}/{filename}{self.EXPORT_TARGET_EXTENSIONS[export_target['format']]}"
+
+    def get_output_locations(self, image_index: int):
+        """
+        Gets the paths of every image saved for the frame, the output folder first.
+
+        Args:
+            image_index (int): Index of the image.
+
+        Returns:
+            list: Output paths of the image.
+
+        """
+        if self.annotations_only:
+            return [self.get_output_location(image_index), self.get_annotation_layer_location(image_index)]
+        return [self.get_output_location(image_index)] + [self.get_target_location(image_index, export_target)
+                                                          for export_target in self.export_targets]
+
+    def get_saved_locations(self, image_index: int):
+        """
+        Gets the paths of the images saved as files for the frame. The files that went into the archive are
+            left out.
+
+        Args:
+            image_index (int): Index of the image.
+
+        Returns:
+            list: Paths of the saved files.
+
+        """
+        if not self.archive:
+            return self.get_output_locations(image_index)
+        if self.annotations_only:
+            return []
+        return [self.get_target_location(image_index, export_target) for export_target in self.export_targets]
+
+    def add_archive_entry(self, image_index: int, output_location: str, data: bytes):
+        """
+        Holds an encoded file of the frame until the render adds it to the archive, named after its file in the
+            output folder.
+
+        Args:
+            image_index (int): Index of the image.
+            output_location (str): Path the file would have in the output folder.
+            data (bytes): Contents of the file.
+
+        Returns:
+            None
+
+        """
+        self.archive_entries.setdefault(image_index, []).append((os.path.basename(output_location), data))
+
+    def save_image(self, image_index: int, final_image):
+        """
+        Saves the final image in the output folder, or the archive, with the filename of the source image.
+
+        Args:
+            image_index (int): Index of the rendered image.
+            final_image (Image): The rendered image.
+
+        Returns:
+            str: Path of the saved image.
+
+        """
+        output_location = self.get_output_location(image_index)
+        # Encoded in memory for the archive, the format is taken from the extension either way.
+        image_format = Image.registered_extensions().get(os.path.splitext(output_location)[1].lower())
+
+        output_file = io.BytesIO() if self.archive else output_location
+        try:
+            final_image.save(output_file, format=image_format, quality=self.jpeg_quality,
+                             compress_level=self.png_compression)
+        except OSError:  # incase image fails to save with alphas
+            final_image = final_image.convert("RGB")
+            output_file = io.BytesIO() if self.archive else output_location
+            final_image.save(output_file, format=image_format, quality=self.jpeg_quality,
+                             compress_level=self.png_compression)
+        if self.archive:
+            self.add_archive_entry(image_index, output_location, output_file.getvalue())
+
+        self.save_export_targets(image_index, final_image=final_image)
+        if self.animation:
+            self.animation_frames[image_index] = self.get_animation_frame(final_image)
+        return output_location
+
+    def save_export_targets(self, image_index: int, final_image):
+        """
+        Saves the rendered image once more for every export target, in the format of the target and downscaled to
+            its max size. The targets share the decode and the annotations of the image in the output folder.
+
+        Args:
+            image_index (int): Index of the rendered image.
+            final_image (Image): The rendered image, left unchanged.
+
+        Returns:
+            None
+
+        """
+        for export_target in self.export_targets:
+            target_image = self.get_target_image(final_image, export_target=export_target)
+            target_location = self.get_target_location(image_index, export_target)
+            os.makedirs(os.path.dirname(target_location), exist_ok=True)
+            target_image.save(target_location,
+                              format=export_target["format"].upper(), quality=export_target.get("quality", 90),
+                              compress_level=export_target.get("compression", 6))
+
+    @staticmethod
+    def get_target_size(image_size: tuple, max_size: int = None):
+        """
+        Gets the size of an image downscaled to fit the max size of an export target.
+
+        Args:
+            image_size (tuple): Size of the rendered image.
+            max_size (int,optional): Longest side of the target. None keeps the size.
+
+        Returns:
+            tuple: Size of the target image.
+
+        """
+        if not max_size or max(image_size) <= max_size:
+            return tuple(image_size)
+        scale = max_size / max(image_size)
+        return max(1, round(image_size[0] * scale)), max(1, round(image_size[1] * scale))
+
+    def get_target_image(self, final_image, export_target: dict):
+        """
+        Downscales the rendered image to the max size of the export target, in a mode its format can save.
+
+        Args:
+            final_image (Image): The rendered image, left unchanged.
+            export_target (dict): Export target with the "format" and "max_size" keys.
+
+        Returns:
+            Image: The image to save for the target.
+
+        """
+        target_image = final_image
+        target_size = self.get_target_size(final_image.size, max_size=export_target.get("max_size"))
+        if target_size != final_image.size:
+            target_image = final_image.resize(target_size, resample=Image.LANCZOS, reducing_gap=3.0)
+
+        if export_target["format"] == "jpeg" and target_image.mode not in ("RGB", "L"):
+            target_image = target_image.convert("RGB")
+        return target_image
 
     def plot_graphic_element(self, layer: str):
         """
@@ -278,18 +2900,54 @@ class ImageProcessor:
 
         """
         cache = self.current_cache
+        self.set_adjusted_values(layer=layer)
 
         if layer != "overlay":
             canvas = self.canvas_draw
+        else:
+            canvas = self.overlay_draw
+
+        if cache.tool == 2:  # Brush tool
+            self.plot_brush_stroke(canvas)
+
+        elif cache.tool == 4:  # Line tool
+            self.plot_line(canvas)
+
+        elif cache.tool == 5:  # rectangle tool
+            self.plot_rectangle(canvas)
+
+        elif cache.tool == 6:  # rectangle tool
+            self.plot_oval(canvas)
+
+        elif cache.tool == 8:  # Insert Text
+            self.insert_text(canvas)
+
+    def set_adjusted_values(self, layer: str):
+        """
+        Scales the coordinates and the stroke width or font size of the current graphic element to the film layer.
+
+        Args:
+            layer (str): If the overlay elements are being drawn then,"overlay". Else "base"
+
+        Returns:
+            None
+
+        """
+        cache = self.current_cache
+
+        if layer != "overlay":
             if cache.tool == 8:
                 self.adjusted_coordinates = self.get_resized_coordinates(item="text")
                 self.adjusted_font_size = abs(cache.font_size * self.FILM_RESIZE)
+                if self.thumbnail_scale != 1:
+                    self.adjusted_font_size = max(1, self.adjusted_font_size * self.thumbnail_scale)
             else:
                 self.adjusted_coordinates = self.get_resized_coordinates()
                 self.adjusted_stroke_width = (round(cache.width) * self.FILM_RESIZE)
+                if self.thumbnail_scale != 1:  # Thin strokes stay visible on the thumbnail.
+                    self.adjusted_stroke_width = max(1, round(self.adjusted_stroke_width * self.thumbnail_scale))
 
         else:
-            canvas = self.overlay_draw
             if cache.tool == 8:
                 self.adjusted_coordinates = self.get_values_for_overlay_layer_from_overlaycache(item="text")
                 self.adjusted_font_size = abs(self.get_values_for_overlay_layer_from_overlaycache(item="font"))
@@ -297,29 +2955,240 @@ class ImageProcessor:
                 self.adjusted_coordinates = self.get_values_for_overlay_layer_from_overlaycache()
                 self.adjusted_stroke_width = (round(self.get_values_for_overlay_layer_from_overlaycache(item="width")))
 
-        if cache.tool == 2:  # Brush tool
-            self.plot_brush_stroke(canvas)
+    def get_annotation_box(self, graphics_dict: dict, image_size: tuple):
+        """
+        Finds the region of the image covered by the graphic elements, so only that region needs to be supersampled.
+            The region is padded by ANNOTATION_BOX_MARGIN so the LANCZOS downscale gives the same pixels as a full
+            size film layer.
 
-        elif cache.tool == 4:  # Line tool
-            self.plot_line(canvas)
+        Args:
+            graphics_dict (dict): Graphic elements of the image.
+            image_size (tuple): Size of the image.
 
-        elif cache.tool == 5:  # rectangle tool
-            self.plot_rectangle(canvas)
+        Returns:
+            tuple|None: (left, upper, right, lower) in image pixels. None if no element falls inside the image.
 
-        elif cache.tool == 6:  # rectangle tool
-            self.plot_oval(canvas)
+        """
+        left = upper = math.inf
+        right = lower = -math.inf
+
+        for id, cache in graphics_dict.items():
+            self.current_cache = cache
+            element_box = self.get_graphic_element_box(layer="base")
+            if element_box is None:
+                continue
+            left = min(left, element_box[0])
+            upper = min(upper, element_box[1])
+            right = max(right, element_box[2])
+            lower = max(lower, element_box[3])
+
+        if left == math.inf:
+            return None
+
+        # Film layer pixels to image pixels.
+        margin = self.ANNOTATION_BOX_MARGIN
+        image_width, image_height = image_size
+        left = max(0, math.floor(left / self.FILM_RESIZE) - margin)
+        upper = max(0, math.floor(upper / self.FILM_RESIZE) - margin)
+        right = min(image_width, math.ceil(right / self.FILM_RESIZE) + margin)
+        lower = min(image_height, math.ceil(lower / self.FILM_RESIZE) + margin)
+
+        if left >= right or upper >= lower:  # Drawn completely outside the image.
+            return None
+        return (left, upper, right, lower)
+
+    def get_graphic_element_box(self, layer: str):
+        """
+        Calculates the bounding box of the current graphic element on the film layer.
 
-        elif cache.tool == 8:  # Insert Text
-            self.insert_text(canvas)
+        Args:
+            layer (str): If the overlay elements are being drawn then,"overlay". Else "base"
+
+        Returns:
+            tuple|None: (left, upper, right, lower) in film layer pixels. None if the element is not drawable.
+
+        """
+        cache = self.current_cache
+        if cache.tool not in (2, 4, 5, 6, 8):  # Not a drawable element.
+            return None
+
+        self.set_adjusted_values(layer=layer)
+        BOX_PADDING = 2  # Extra pixels for the rounding done while drawing.
+
+        if cache.tool == 8:
+            font, descent = self.get_text_font()
+            x, y = self.adjusted_coordinates
+            left, upper, right, lower = self.measure_draw.textbbox((x, y - descent), cache.text, font=font,
+                                                                   anchor="ls")
+            return (left - BOX_PADDING, upper - BOX_PADDING, right + BOX_PADDING, lower + BOX_PADDING)
+
+        x_coordinates = [x for x, y in self.adjusted_coordinates]
+        y_coordinates = [y for x, y in self.adjusted_coordinates]
+        # Strokes, caps and outlines spread at most one stroke width around the coordinates.
+        padding = self.adjusted_stroke_width + BOX_PADDING
+        return (min(x_coordinates) - padding, min(y_coordinates) - padding,
+                max(x_coordinates) + padding, max(y_coordinates) + padding)
+
+    def get_overlay_layer(self, image_size: tuple):
+        """
+        Gets the finished overlay layer for the given image size from the overlay cache, or makes it if not cached.
+            The layers share the memory budget of the cache with the resized overlay images, see add_to_overlay_cache.
+            If trim_overlay is enabled, the layer is cropped to the image size before caching.
+
+        Args:
+            image_size (tuple): Size of the annotated base image.
+
+        Returns:
+            Image: The RGBA overlay layer.
+
+        """
+        overlay_layer = self.get_from_overlay_cache(key=("layer", image_size))
+        if overlay_layer is not None:
+            return overlay_layer
+
+        overlay_layer = self.build_overlay_layer(image_size=image_size)
+        if self.trim_overlay:
+            # Only the part of the 16:9 overlay over the image is kept after trimming.
+            overlay_layer = overlay_layer.crop(self.get_trim_box(overlay_size=overlay_layer.size,
+                                                                 image_size=image_size))
 
-    def prepare_overlay_layer(self):
+        self.add_to_overlay_cache(key=("layer", image_size), image=overlay_layer)
+        return overlay_layer
+
+    def get_from_overlay_cache(self, key: tuple):
+        """
+        Gets an overlay layer or a resized overlay image from the overlay cache and marks it as the most recently
+            used.
+
+        Args:
+            key (tuple): Key of the cached image.
+
+        Returns:
+            Image|None: The cached RGBA image, None if it is not cached.
+
+        """
+        image = self.overlay_cache.get(key)
+        if image is not None:
+            self.overlay_cache.move_to_end(key)
+        return image
+
+    def add_to_overlay_cache(self, key: tuple, image):
         """
-        Prepares a transparent image in the 16:9 ratio for the graphic elements to be drawn onto.
+        Adds an overlay layer or a resized overlay image to the overlay cache. The least recently used images are
+            dropped once the cache goes over its memory budget, the newest image is kept even if it is over the
+            budget on its own.
+
+        Args:
+            key (tuple): Key of the image.
+            image (Image): RGBA image to cache.
+
         Returns:
             None
 
         """
-        annotated_img_width, annotated_img_height = self.final_base_image.size
+        self.overlay_cache[key] = image
+        self.overlay_cache_bytes += image.width * image.height * 4
+        while self.overlay_cache_bytes > self.overlay_cache_budget and len(self.overlay_cache) > 1:
+            evicted_key, evicted_image = self.overlay_cache.popitem(last=False)
+            self.overlay_cache_bytes -= evicted_image.width * evicted_image.height * 4
+
+    @staticmethod
+    def get_trim_box(overlay_size: tuple, image_size: tuple):
+        """
+        Gets the region of the 16:9 overlay layer that lies over the image, the image is centered on the overlay.
+
+        Args:
+            overlay_size (tuple): Size of the overlay layer.
+            image_size (tuple): Size of the annotated base image.
+
+        Returns:
+            tuple: (left, upper, right, lower) crop box.
+
+        """
+        original_width, original_height = overlay_size
+        target_width, target_height = image_size
+
+        # Calculate the coordinates for cropping from the center
+        left = (original_width - target_width) // 2
+        upper = (original_height - target_height) // 2
+        right = left + target_width
+        lower = upper + target_height
+        return left, upper, right, lower
+
+    def build_overlay_layer(self, image_size: tuple, region: tuple = None):
+        """
+        Draws the overlay graphic elements and pastes the overlay images on a new overlay layer.
+            The layer can cover only a region of the 16:9 overlay. The film of a region skips the rows above it
+            through FilmDraw and starts at the left edge of the overlay, and is drawn with a margin so the
+            anti-alias downscale gives the same pixels as the full layer.
+
+        Args:
+            image_size (tuple): Size of the annotated base image.
+            region (tuple,optional): (left, upper, right, lower) region of the overlay to draw. Default whole overlay.
+
+        Returns:
+            Image: The RGBA overlay layer.
+
+        """
+        overlay_width, overlay_height = self.get_overlay_size(image_size=image_size)
+        if region is None:
+            region = (0, 0, overlay_width, overlay_height)
+        left, upper, right, lower = region
+
+        # Film region with the margin, clamped to the overlay.
+        margin = self.ANNOTATION_BOX_MARGIN if self.anti_alias else 0
+        film_upper = max(0, upper - margin)
+        film_right, film_lower = min(overlay_width, right + margin), min(overlay_height, lower + margin)
+
+        # Makes the transparent layer.
+        # Enlarge the layer if anti_alias enabled.
+        self.overlay_film_size = (overlay_width * self.FILM_RESIZE, overlay_height * self.FILM_RESIZE)
+        self.overlay_layer = Image.new("RGBA", (film_right * self.FILM_RESIZE,
+                                                (film_lower - film_upper) * self.FILM_RESIZE), (0, 0, 0, 0))
+        self.overlay_draw = FilmDraw(self.overlay_layer, upper=film_upper * self.FILM_RESIZE)
+
+        for id, cache in self.graphics_data[self.OVERLAY_GRAPHICS_INDEX].items():
+            # cache is the single graphic object.
+            self.current_cache = cache
+            # Draw overlay 2d items one by one.
+            self.plot_graphic_element(layer="overlay")
+
+        # Rescale overlay to image size, only the columns of the region.
+        film_box = (left * self.FILM_RESIZE, 0, right * self.FILM_RESIZE, self.overlay_layer.height)
+        if self.anti_alias:
+            self.overlay_layer = self.overlay_layer.resize((right - left, film_lower - film_upper),
+                                                           resample=Image.LANCZOS, box=film_box)
+        elif film_box != (0, 0, *self.overlay_layer.size):
+            self.overlay_layer = self.overlay_layer.crop(film_box)
+
+        # Dropping the margin.
+        if (film_upper, film_lower) != (upper, lower):
+            self.overlay_layer = self.overlay_layer.crop((0, upper - film_upper, right - left, lower - film_upper))
+
+        # Images are pasted in after all the drawings has been made on the overlay layer.
+        if self.has_image_overlay:  # if current overlay canvas has image elements.
+            self.overlay_film_size = (overlay_width, overlay_height)
+            self.overlay_offset = (left, upper)
+            for id, image_cache in self.graphics_data[self.OVERLAY_IMAGE_INDEX].items():
+                self.current_cache = image_cache
+                # Draw overlay image items one by one.
+                self.insert_overlay_image_element(item_id=id)
+
+        return self.overlay_layer
+
+    @staticmethod
+    def get_overlay_size(image_size: tuple):
+        """
+        Calculates the size of the 16:9 overlay layer that fits the image.
+
+        Args:
+            image_size (tuple): Size of the annotated base image.
+
+        Returns:
+            tuple: Width and height of the overlay layer.
+
+        """
+        annotated_img_width, annotated_img_height = image_size
 
         canvas_width = 16 * annotated_img_height // 9
         canvas_height = annotated_img_height
@@ -328,42 +3197,50 @@ class ImageProcessor:
             canvas_width = annotated_img_width
             canvas_height = 9 * annotated_img_width // 16
 
-        base_width = canvas_width  # *self.OVERLAY_RESIZE
-        base_height = canvas_height  # *self.OVERLAY_RESIZE
+        return canvas_width, canvas_height
 
-        # Makes a new transparent image .
-        self.overlay_layer = Image.new("RGBA", (base_width, base_height), (0, 0, 0, 0))
-        self.overlay_draw = ImageDraw.Draw(self.overlay_layer)
-
-    def insert_overlay_image_element(self):
+    def insert_overlay_image_element(self, item_id: int):
         """
-        Renders the overlay image element to the overlay cel layer.
+        Renders the overlay image element to the overlay cel layer. Only the region covered by the element
+            is composited, the resized and rotated element is reused for every overlay layer of the same scale.
+
+        Args:
+            item_id (int): Item id of the overlay image element.
 
         Returns:
             None
 
         """
-
-        transparent_layer = Image.new("RGBA", (self.overlay_layer.width, self.overlay_layer.height), (0, 0, 0, 0))
-        # self.overlay_draw = ImageDraw.Draw(transparent_layer)
-
-        image_to_paste = self.current_cache.image_object.convert("RGBA")
         x, y = self.get_values_for_overlay_layer_from_overlaycache(item="image")
         # Converting from overlay canvas size to true image size.
         new_width, new_height = self.get_values_for_overlay_layer_from_overlaycache(coordinates=self.current_cache.size,
-                                                                                    item="image")
-        resized_image = image_to_paste.resize((round(new_width), round(new_height)))
-
-        if (rotation_angle := self.current_cache.angle) not in (0, 360):
-            resized_image = resized_image.rotate(rotation_angle, expand=True, resample=Image.BICUBIC)
-
-        # Center anchoring the image.
-        x_offset = x - (resized_image.width // 2)
-        y_offset = y - (resized_image.height // 2)
+                                                                                    item="size")
+        element_key = ("element", item_id, round(new_width), round(new_height))
+        resized_image = self.get_from_overlay_cache(key=element_key)
+        if resized_image is None:
+            image_to_paste = self.current_cache.image_object.convert("RGBA")
+            resized_image = image_to_paste.resize((round(new_width), round(new_height)))
+
+            if (rotation_angle := self.current_cache.angle) not in (0, 360):
+                resized_image = resized_image.rotate(rotation_angle, expand=True, resample=Image.BICUBIC)
+            self.add_to_overlay_cache(key=element_key, image=resized_image)
+
+        # Center anchoring the image. The layer may only cover a region of the overlay, starting at overlay_offset,
+        #   the offset is subtracted after rounding so the image lands on the same pixel as on the whole overlay.
+        x_offset = round(x - (resized_image.width // 2)) - self.overlay_offset[0]
+        y_offset = round(y - (resized_image.height // 2)) - self.overlay_offset[1]
+
+        # Clipping the element to the overlay layer, the element can be partly outside the overlay.
+        left, upper = max(x_offset, 0), max(y_offset, 0)
+        right = min(x_offset + resized_image.width, self.overlay_layer.width)
+        lower = min(y_offset + resized_image.height, self.overlay_layer.height)
+        if left >= right or upper >= lower:  # Completely outside the overlay.
+            return
 
         # Uses the alpha from the imported image as a mask.
-        transparent_layer.paste(resized_image, (round(x_offset), round(y_offset)), )
-        self.overlay_layer = Image.alpha_composite(self.overlay_layer, transparent_layer)
+        self.overlay_layer.alpha_composite(resized_image, dest=(left, upper),
+                                           source=(left - x_offset, upper - y_offset,
+                                                   right - x_offset, lower - y_offset))
 
     def plot_brush_stroke(self, canvas):
         """
@@ -494,25 +3371,28 @@ class ImageProcessor:
         else:
             fill_color = self.current_cache.fill_color
 
-        font_path = os.path.join(self.FONT_PATH, self.current_cache.font_file)
-        font = ImageFont.truetype(font_path, int(self.adjusted_font_size))
-
-        # Pillow does not use the same anchor,as tkinter and if using left descender("ld") ("sw") some fonts are misaligned.
-        # So finding the descent value to get the baseline value of the font. then using that baseline value as an anchor fixes the issue.
-        try:
-            tk_font = Font(family=self.current_cache.font_name,
-                           size=-int(self.adjusted_font_size))  # -ve to match tkinter.
-            tk_font_info = tk_font.metrics()
-            descent = tk_font_info["descent"]
-        except Exception as e:
-            self.app.error_prompt.display_error_prompt(error_msg=f'failed to render,"{self.current_cache.text}"')
-            return
+        font, descent = self.get_text_font()
 
         # Subtracting the descent value to get the baseline value.
         canvas.text((self.adjusted_coordinates[0], self.adjusted_coordinates[1] - descent), self.current_cache.text,
                     font=font,
                     fill=fill_color, anchor="ls")  # Left Baseline,
 
+    def get_text_font(self):
+        """
+        Gets the font of the current text element at the adjusted font size from the font cache.
+
+        Returns:
+            tuple: (FreeTypeFont, descent)
+
+        """
+        font_path = os.path.join(self.FONT_PATH, self.current_cache.font_file)
+        # Pillow does not use the same anchor,as tkinter and if using left descender("ld") ("sw") some fonts are misaligned.
+        # So finding the descent value to get the baseline value of the font. then using that baseline value as an anchor fixes the issue.
+        # The descent comes from the font itself, so text renders the same on any thread or process.
+        font, ascent, descent = get_cached_font(font_path=font_path, size=int(self.adjusted_font_size))
+        return font, descent
+
     def round_cap(self, fill_color, canvas):
         """
         Uses the start and end coordinate of a segment to draw two circles to generate round tips.
@@ -559,16 +3439,17 @@ class ImageProcessor:
 
         """
 
+        # Thumbnails are drawn straight at their own scale.
+        film_scale = self.FILM_RESIZE * self.thumbnail_scale if self.thumbnail_scale != 1 else self.FILM_RESIZE
+
         if item == "text":
             try:
-                x, y = (coordinate * self.FILM_RESIZE for coordinate in self.current_cache.coordinates)
+                x, y = (coordinate * film_scale for coordinate in self.current_cache.coordinates)
             except ValueError:
-                x, y = (coordinate * self.FILM_RESIZE for coordinate in self.current_cache.coordinates[0])
+                x, y = (coordinate * film_scale for coordinate in self.current_cache.coordinates[0])
             return (x, y)
 
-        scaled_coordinates = [((x * self.FILM_RESIZE), (y * self.FILM_RESIZE)) for x, y in
-                              self.current_cache.coordinates]
-        return scaled_coordinates
+        return [(x * film_scale, y * film_scale) for x, y in self.current_cache.coordinates]
 
     def get_values_for_overlay_layer_from_overlaycache(self, coordinates=None, item=None):
         """
@@ -576,7 +3457,7 @@ class ImageProcessor:
 
         Args:
             coordinates (list|tuple): Coordinates to be scaled to match the current overlay size.
-            item (str,optional) : "font", "image", "text", "width"
+            item (str,optional) : "font", "image", "size", "text", "width"
 
         Returns:
             Scaled coordinates matching the current overlay film size.
@@ -590,15 +3471,19 @@ class ImageProcessor:
         # convert cords from 1920 to image size
 
         # xlarge image since antialias
-        new_width, new_height = self.overlay_layer.width, self.overlay_layer.height
-        old_width, old_height = self.overlay_gm.OVERLAY_WIDTH, self.overlay_gm.OVERLAY_HEIGHT
+        new_width, new_height = self.overlay_film_size
+        old_width, old_height = self.OVERLAY_WIDTH, self.OVERLAY_HEIGHT
 
         scale_x = new_width / old_width
         scale_y = new_height / old_height
 
         scale_factor = max(scale_x, scale_y)
 
-        if item == "text" or item == "image":
+        if item == "size":
+            width, height = coordinates
+            return (width * scale_factor, height * scale_factor)
+
+        elif item == "text" or item == "image":
             try:
                 x, y = (coordinate * scale_factor for coordinate in coordinates)
             except ValueError:
@@ -614,20 +3499,23 @@ class ImageProcessor:
             new_width = self.current_cache.width * scale_factor
             return new_width
 
-        scaled_coordinates = [((x * scale_factor), (y * scale_factor))
-                              for x, y in coordinates]
+        scaled_coordinates = [(x * scale_factor, y * scale_factor) for x, y in coordinates]
 
         return scaled_coordinates
 
-    def generate_sequence_code_image(self, sequence_code):
+    def generate_sequence_code_image(self, sequence_code, frame_size: tuple = None):
         """
         Generates an image from the sequence code.
 
+        Args:
+            sequence_code (str): Sequence code of the image.
+            frame_size (tuple,optional): Size of the image the code goes on. Default size of the final image.
+
         Returns:
             An RGB Image with the sequence code
 
         """
-        final_image_width, final_image_height = self.final_image.size
+        final_image_width, final_image_height = frame_size or self.final_image.size
         backdrop_width = int((10 / 100) * final_image_width)
         backdrop_height = int((35 / 100) * backdrop_width)
 
@@ -636,12 +3524,13 @@ class ImageProcessor:
 
         font_size = int(backdrop_height / 2)
 
-        self.font = ImageFont.truetype(font=os.path.join("fonts", "RobotoMono-Medium.ttf"), size=font_size)
+        font, ascent, descent = get_cached_font(font_path=os.path.join("fonts", "RobotoMono-Medium.ttf"),
+                                                size=font_size)
 
-        text_width = drawobj.textlength(sequence_code, font=self.font)
+        text_width = drawobj.textlength(sequence_code, font=font)
         text_height = font_size
         text_position = (int(backdrop_width - text_width) / 2), (int(backdrop_height - text_height) / 2.3)
 
-        drawobj.text((text_position), sequence_code, fill=(255, 255, 255), font=self.font)
+        drawobj.text((text_position), sequence_code, fill=(255, 255, 255), font=font)
 
         return sequence_code_img
@@ -2,7 +2,9 @@ import copy
 import ctypes
 import json
 import math
+import multiprocessing
 import os
+import queue
 import sys
 import threading
 from functools import wraps
@@ -12,13 +14,16 @@ import psutil
 from PIL import Image, ImageTk
 from customtkinter import filedialog
 
+from canvas_tiles import TiledCanvasImage
 from file_handler import FileHandler
 # -Custom Classes--
 from graphics_manager import GraphicsManager, OverlayGraphicsManager
 from image_processor import ImageProcessor
 from keybinds import KeyBinds, CanvasKeybinds, OverlayKeyBinds
+from mip_cache import MipCache
 from outliner import Outliner
 from tools import Tools, TextInsertWindow
+from viewport_cache import ViewportImageCache
 
 
 # Icons used in the app were downloaded from https://icons8.com/.
@@ -513,12 +518,14 @@ class UserSettingsWindow(ctk.CTkToplevel):
     """
     Toplevel window that handles user settings of the app.
     """
+    # Size budgets of the disk cache in MB.
+    DISK_CACHE_SIZES = {"Off": 0, "256 MB": 256, "1 GB": 1024, "4 GB": 4096, "16 GB": 16384}
 
     def __init__(self, app, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.app = app
         width = 250
-        height = 200
+        height = 260
         self.screen_width = self.winfo_screenwidth()
         self.screen_height = self.screen_width * 0.5625  # clamps window to 16:9 ratio.
         x = (self.screen_width - width) // 2
@@ -552,7 +559,7 @@ class UserSettingsWindow(ctk.CTkToplevel):
 
         self.dropdown_frame = ctk.CTkFrame(self, fg_color=MAIN_COLOR)
         self.dropdown_frame.columnconfigure((0, 1), weight=1)
-        self.dropdown_frame.rowconfigure((0, 1, 2, 3, 4, 5), weight=1)
+        self.dropdown_frame.rowconfigure((0, 1, 2, 3, 4, 5, 6, 7), weight=1)
         self.dropdown_frame.grid(row=1, column=0, sticky="news")
 
         canvas_color_label = ctk.CTkLabel(self.dropdown_frame, text="Canvas Color:", font=("Arial", 16), width=0)
@@ -590,6 +597,25 @@ class UserSettingsWindow(ctk.CTkToplevel):
         self.highlight_opacity_slider.set(self.app.user_settings["highlight_opacity"])
         self.highlight_opacity_slider.grid(row=5, column=1, sticky='w', padx=(5, 0))
 
+        disk_cache_label = ctk.CTkLabel(self.dropdown_frame, text="Disk Cache:", font=("Arial", 16), width=0)
+        disk_cache_label.grid(row=6, column=0, sticky='e')
+        disk_cache_mb = self.app.user_settings.get("disk_cache_mb", 1024)
+        disk_cache_sizes = dict(self.DISK_CACHE_SIZES)
+        if disk_cache_mb not in disk_cache_sizes.values():  # Size set in settings.json by hand.
+            disk_cache_sizes[f"{disk_cache_mb} MB"] = disk_cache_mb
+        self.disk_cache_dropdown = ctk.CTkOptionMenu(self.dropdown_frame, values=list(disk_cache_sizes),
+                                                     width=20, height=25)
+        self.disk_cache_dropdown.grid(row=6, column=1, sticky='w', padx=(5, 0))
+        self.disk_cache_dropdown.set(next(name for name, size in disk_cache_sizes.items() if size == disk_cache_mb))
+        self.disk_cache_sizes = disk_cache_sizes
+
+        self.clear_disk_cache_btn = ctk.CTkButton(self.dropdown_frame, text="", command=self.clear_disk_cache,
+                                                  width=50, height=20, font=("Arial", 12),
+                                                  fg_color="#39473F", hover_color="#2B3530", text_color="#D2D2D2",
+                                                  corner_radius=5)
+        self.clear_disk_cache_btn.grid(row=7, column=0, columnspan=2, pady=(5, 0))
+        self.update_clear_disk_cache_btn()
+
         # ================Output ==================================
 
         self.save_user_settings_btn = ctk.CTkButton(self, text="Save Settings", command=self.save_user_settings,
@@ -609,16 +635,38 @@ class UserSettingsWindow(ctk.CTkToplevel):
         canvas_color = self.canvas_color_dropdown.get().lower()
         selection_color = self.selection_color_dropdown.get().lower()
         highlight_opacity = int(self.highlight_opacity_slider.get())
+        disk_cache_mb = self.disk_cache_sizes[self.disk_cache_dropdown.get()]
 
         self.app.user_settings = {"canvas_color": canvas_color,
                                   "selection_color": selection_color,
                                   "highlight_opacity": highlight_opacity,
+                                  "disk_cache_mb": disk_cache_mb,
                                   }
 
         self.app.update_user_settings()
 
         self.destroy()
 
+    def clear_disk_cache(self):
+        """
+        Removes every image in the disk cache.
+
+        Returns:
+            None
+        """
+        self.app.mip_cache.clear()
+        self.update_clear_disk_cache_btn()
+
+    def update_clear_disk_cache_btn(self):
+        """
+        Shows the size of the disk cache on the clear button.
+
+        Returns:
+            None
+        """
+        cache_mb = self.app.mip_cache.get_cache_bytes() / (1024 * 1024)
+        self.clear_disk_cache_btn.configure(text=f"Clear Cache ({cache_mb:.0f} MB)")
+
     def reset_user_settings(self):
         """
         Replaces the user settings.json file with a new file with default values.
@@ -635,6 +683,8 @@ class RenderMenu(ctk.CTkToplevel):
     """
     Toplevel window that handles the render settings and starting the render.
     """
+    PROGRESS_POLL_INTERVAL = 100  # ms between reading the progress of the render thread.
+    ESTIMATE_DELAY = 500  # ms without settings changes before the output estimate is made again.
 
     def __init__(self, app, batch: bool, *args, **kwargs):
         """
@@ -649,8 +699,26 @@ class RenderMenu(ctk.CTkToplevel):
         self.app = app
         self.is_batch = batch
 
+        # The render thread reports its progress through the queue, read on the Tk main loop.
+        self.progress_queue = queue.Queue()
+        self.render_stop_event = threading.Event()
+        self.render_pause_event = threading.Event()
+        self.render_thread = None
+        self.progress_poll_job = None
+
+        # The output estimate runs in its own thread, restarted once the settings stop changing.
+        self.estimate_queue = queue.Queue()
+        self.estimate_stop_event = threading.Event()
+        self.estimate_thread = None
+        self.estimate_job = None
+        self.estimate_poll_job = None
+        # Encoded sizes and times of the sample frames of the estimates at the current settings. Guarded by the lock,
+        #   a stopped estimate thread can still be running next to the new one.
+        self.estimate_samples = {}
+        self.estimate_samples_lock = threading.Lock()
+
         width = 350
-        height = 350
+        height = 650 if batch else 460
         self.screen_width = self.winfo_screenwidth()
         self.screen_height = self.screen_width * 0.5625  # clamps window to 16:9 ratio.
         x = (self.screen_width - width) // 2
@@ -791,10 +859,112 @@ class RenderMenu(ctk.CTkToplevel):
                                                       bordermode="outside")
         self.png_compression_slider_event_handler(value=self.app.png_compression)
 
+        if self.is_batch:
+            render_workers_label = ctk.CTkLabel(self.checkbox_frame, text="Render Workers:", font=("Arial", 16))
+            render_workers_label.grid(row=7, column=0, sticky='e')
+
+            max_render_workers = os.cpu_count() or 1
+            self.render_workers_slider = ctk.CTkSlider(self.checkbox_frame, from_=1, to=max(max_render_workers, 2),
+                                                       width=int(width * 0.4),
+                                                       command=self.render_workers_slider_event_handler,
+                                                       number_of_steps=max(max_render_workers - 1, 1), )
+            self.render_workers_slider.grid(row=7, column=1, sticky='w')
+            self.render_workers_slider.set(self.app.render_workers)
+
+            self.render_workers_slider_value_label = ctk.CTkLabel(self.checkbox_frame, text=self.app.render_workers,
+                                                                  font=("Arial Bold", 12))
+            self.render_workers_slider_value_label.place(in_=self.render_workers_slider, relx=1.1, rely=0.5,
+                                                         anchor="center",
+                                                         bordermode="outside")
+            self.render_workers_slider_event_handler(value=self.app.render_workers)
+
+            skip_unchanged_label = ctk.CTkLabel(self.checkbox_frame, text="Skip Unchanged:", font=("Arial", 16))
+            skip_unchanged_label.grid(row=8, column=0, sticky='e')
+            self.skip_unchanged_checkbox = ctk.CTkCheckBox(self.checkbox_frame, text="", onvalue=1, offvalue=0,
+                                                           border_width=checkbox_border,
+                                                           command=self.skip_unchanged_checkbox_handler)
+            if self.app.skip_unchanged:
+                self.skip_unchanged_checkbox.select()
+            self.skip_unchanged_checkbox.grid(row=8, column=1, sticky='w', padx=(25, 0))
+
+        annotations_only_label = ctk.CTkLabel(self.checkbox_frame, text="Annotations Only:", font=("Arial", 16))
+        annotations_only_label.grid(row=9, column=0, sticky='e')
+        self.annotations_only_checkbox = ctk.CTkCheckBox(self.checkbox_frame, text="", onvalue=1, offvalue=0,
+                                                         width=0, border_width=checkbox_border,
+                                                         command=self.annotations_only_checkbox_handler)
+        self.annotations_only_checkbox.grid(row=9, column=1, sticky='w', padx=(25, 0))
+
+        self.annotation_format_dropdown = ctk.CTkOptionMenu(self.checkbox_frame, values=["PNG", "WEBP"], width=20,
+                                                            command=self.annotation_format_dropdown_handler,
+                                                            height=25)
+        self.annotation_format_dropdown.place(in_=self.annotations_only_checkbox, relx=2.2, rely=0.5,
+                                              anchor="center", bordermode="outside", )
+        self.annotation_format_dropdown.set(self.app.annotation_format.upper())
+        if self.app.annotations_only:
+            self.annotations_only_checkbox.select()
+        else:
+            self.annotation_format_dropdown.configure(state="disabled")
+
+        if self.is_batch:
+            animation_label = ctk.CTkLabel(self.checkbox_frame, text="Animation:", font=("Arial", 16))
+            animation_label.grid(row=10, column=0, sticky='e')
+            self.animation_checkbox = ctk.CTkCheckBox(self.checkbox_frame, text="", onvalue=1, offvalue=0, width=0,
+                                                      border_width=checkbox_border,
+                                                      command=self.animation_checkbox_handler)
+            self.animation_checkbox.grid(row=10, column=1, sticky='w', padx=(25, 0))
+
+            self.animation_format_dropdown = ctk.CTkOptionMenu(self.checkbox_frame, values=["WEBP", "GIF"], width=20,
+                                                               command=self.animation_format_dropdown_handler,
+                                                               height=25)
+            self.animation_format_dropdown.place(in_=self.animation_checkbox, relx=2.2, rely=0.5,
+                                                 anchor="center", bordermode="outside", )
+            self.animation_format_dropdown.set(self.app.animation_format.upper())
+            if self.app.render_animation:
+                self.animation_checkbox.select()
+            else:
+                self.animation_format_dropdown.configure(state="disabled")
+
+            contact_sheet_label = ctk.CTkLabel(self.checkbox_frame, text="Contact Sheet:", font=("Arial", 16))
+            contact_sheet_label.grid(row=11, column=0, sticky='e')
+            self.contact_sheet_checkbox = ctk.CTkCheckBox(self.checkbox_frame, text="", onvalue=1, offvalue=0,
+                                                          width=0, border_width=checkbox_border,
+                                                          command=self.contact_sheet_checkbox_handler)
+            self.contact_sheet_checkbox.grid(row=11, column=1, sticky='w', padx=(25, 0))
+
+            self.contact_sheet_grid_dropdown = ctk.CTkOptionMenu(self.checkbox_frame,
+                                                                 values=["4x4", "6x5", "8x6", "10x8"], width=20,
+                                                                 command=self.contact_sheet_grid_dropdown_handler,
+                                                                 height=25)
+            self.contact_sheet_grid_dropdown.place(in_=self.contact_sheet_checkbox, relx=2.2, rely=0.5,
+                                                   anchor="center", bordermode="outside", )
+            self.contact_sheet_grid_dropdown.set(self.app.contact_sheet_grid)
+            if self.app.render_contact_sheet:
+                self.contact_sheet_checkbox.select()
+            else:
+                self.contact_sheet_grid_dropdown.configure(state="disabled")
+
+            archive_label = ctk.CTkLabel(self.checkbox_frame, text="Archive:", font=("Arial", 16))
+            archive_label.grid(row=12, column=0, sticky='e')
+            self.archive_checkbox = ctk.CTkCheckBox(self.checkbox_frame, text="", onvalue=1, offvalue=0, width=0,
+                                                    border_width=checkbox_border,
+                                                    command=self.archive_checkbox_handler)
+            self.archive_checkbox.grid(row=12, column=1, sticky='w', padx=(25, 0))
+
+            self.archive_format_dropdown = ctk.CTkOptionMenu(self.checkbox_frame, values=["ZIP", "TAR"], width=20,
+                                                             command=self.archive_format_dropdown_handler,
+                                                             height=25)
+            self.archive_format_dropdown.place(in_=self.archive_checkbox, relx=2.2, rely=0.5,
+                                               anchor="center", bordermode="outside", )
+            self.archive_format_dropdown.set(self.app.archive_format.upper())
+            if self.app.render_archive:
+                self.archive_checkbox.select()
+            else:
+                self.archive_format_dropdown.configure(state="disabled")
+
         # ================Output ==================================
         self.output_frame = ctk.CTkFrame(self, fg_color=main_color)
         self.output_frame.columnconfigure((0, 1), weight=1)
-        self.output_frame.rowconfigure((0, 1, 2, 3), weight=1)
+        self.output_frame.rowconfigure((0, 1, 2, 3, 4, 5, 6, 7), weight=1)
         self.output_frame.grid(row=2, column=0, sticky="news", pady=(10, 0))
 
         output_path_label = ctk.CTkLabel(self.output_frame, text="Output Path:", font=("Arial", 14))
@@ -815,22 +985,61 @@ class RenderMenu(ctk.CTkToplevel):
         if os.path.exists(self.app.output_path):
             self.output_path_textbox.configure(fg_color="#b7ffb0")  # A shade of green if file output path exists.
 
+        # Extra formats and sizes saved from the same rendered images.
+        self.export_targets_label = ctk.CTkLabel(self.output_frame, text="", font=("Arial", 14))
+        self.export_targets_label.grid(row=2, column=0, sticky="e")
+        self.update_export_targets_label()
+
+        export_targets_btn_frame = ctk.CTkFrame(self.output_frame, fg_color=main_color)
+        export_targets_btn_frame.grid(row=2, column=1, padx=(0, 40))
+        self.add_export_target_btn = ctk.CTkButton(export_targets_btn_frame, text="Add", width=40, height=15,
+                                                   font=("Arial", 15), command=self.open_export_target_window,
+                                                   fg_color="#3568B5", hover_color="#213D67", corner_radius=5)
+        self.add_export_target_btn.grid(row=0, column=0, padx=(0, 5))
+        self.clear_export_targets_btn = ctk.CTkButton(export_targets_btn_frame, text="Clear", width=40, height=15,
+                                                      font=("Arial", 15), command=self.clear_export_targets,
+                                                      fg_color="#7e7d82", hover_color="#58575a", corner_radius=5)
+        self.clear_export_targets_btn.grid(row=0, column=1)
+        self.export_target_window = None
+
         self.render_progressbar = ctk.CTkProgressBar(self.output_frame, orientation="horizontal", fg_color=main_color,
                                                      progress_color=main_color)
         self.render_progressbar.set(0)
-        self.render_progressbar.grid(column=0, row=2, columnspan=2)
+        self.render_progressbar.grid(column=0, row=3, columnspan=2)
+
+        # Throughput, bytes written, elapsed time and ETA of the running render.
+        self.render_stats_label = ctk.CTkLabel(self.output_frame, text="", font=("Arial", 12), height=16)
+        self.render_stats_label.grid(column=0, row=4, columnspan=2)
+
+        # Estimated output size and encode time at the current slider values.
+        self.estimate_label = ctk.CTkLabel(self.output_frame, text="Estimating output size...", font=("Arial", 11),
+                                           text_color="grey", justify="center")
+        self.estimate_label.grid(column=0, row=5, columnspan=2)
 
         self.render_images_btn = ctk.CTkButton(self.output_frame, text="Render Images", command=self.start_render,
                                                width=150, height=35, font=("Arial bold", 17),
                                                fg_color="#3568B5", hover_color="#213D67", text_color="white")
 
-        self.render_images_btn.grid(column=0, row=3, columnspan=2, pady=(5, 10))
+        self.render_images_btn.grid(column=0, row=6, columnspan=2, pady=(5, 10))
+
+        if self.is_batch:
+            # Pause holds the batch render, Cancel stops it. The finished frames are resumed on the next render.
+            self.pause_render_btn = ctk.CTkButton(self.output_frame, text="Pause", command=self.pause_render,
+                                                  state="disabled", width=80, height=25, font=("Arial", 15),
+                                                  fg_color="#3568B5", hover_color="#213D67", text_color="white")
+            self.pause_render_btn.grid(column=0, row=7, sticky="e", padx=(0, 10), pady=(0, 10))
+
+            self.cancel_render_btn = ctk.CTkButton(self.output_frame, text="Cancel", command=self.cancel_render,
+                                                   state="disabled", width=80, height=25, font=("Arial", 15),
+                                                   fg_color="#d2190d", hover_color="#6a0c06", text_color="white")
+            self.cancel_render_btn.grid(column=1, row=7, sticky="w", padx=(10, 0), pady=(0, 10))
 
         if not self.is_batch:  # If not batch configure the render button to batch False.
             self.render_images_btn.configure(text="Render Image")
             self.render_images_btn.configure(command=lambda: self.start_render(batch=False))
 
         self.protocol("WM_DELETE_WINDOW", self.kill_window)
+        self.schedule_estimate()
 
     def render_overlay_checkbox_handler(self):
         """
@@ -847,6 +1056,7 @@ class RenderMenu(ctk.CTkToplevel):
             self.app.render_overlay = False
             self.overlay_trim_label.configure(text_color="grey")
             self.trim_overlay_checkbox.configure(state="disabled", fg_color="grey")
+        self.schedule_estimate()
 
     def overlay_trim_checkbox_handler(self):
         """
@@ -859,6 +1069,7 @@ class RenderMenu(ctk.CTkToplevel):
             self.app.trim_overlay = True
         else:
             self.app.trim_overlay = False
+        self.schedule_estimate()
 
     def sequence_code_checkbox_handler(self):
 
@@ -868,6 +1079,7 @@ class RenderMenu(ctk.CTkToplevel):
         else:
             self.app.render_sequence_code = False
             self.sequence_code_position_dropdown.configure(state="disabled")
+        self.schedule_estimate()
 
     def sequence_code_position_dropdown_handler(self, choice):
         choice = choice.lower()
@@ -879,18 +1091,79 @@ class RenderMenu(ctk.CTkToplevel):
             self.app.sequence_code_render_position = "se"
         else:
             self.app.sequence_code_render_position = "nw"
+        self.schedule_estimate()
 
     def anti_alias_checkbox_handler(self):
         if self.anti_alias_checkbox.get() == 1:
             self.app.anti_alias_output = True
         else:
             self.app.anti_alias_output = False
+        self.schedule_estimate()
 
     def include_blanks_checkbox_handler(self):
         if self.include_blanks_checkbox.get() == 1:
             self.app.include_blanks = True
         else:
             self.app.include_blanks = False
+        self.schedule_estimate()
+
+    def skip_unchanged_checkbox_handler(self):
+        if self.skip_unchanged_checkbox.get() == 1:
+            self.app.skip_unchanged = True
+        else:
+            self.app.skip_unchanged = False
+
+    def annotations_only_checkbox_handler(self):
+        if self.annotations_only_checkbox.get() == 1:
+            self.app.annotations_only = True
+            self.annotation_format_dropdown.configure(state="normal")
+        else:
+            self.app.annotations_only = False
+            self.annotation_format_dropdown.configure(state="disabled")
+        self.schedule_estimate()
+
+    def annotation_format_dropdown_handler(self, choice):
+        self.app.annotation_format = choice.lower()
+        self.schedule_estimate()
+
+    def animation_checkbox_handler(self):
+        if self.animation_checkbox.get() == 1:
+            self.app.render_animation = True
+            self.animation_format_dropdown.configure(state="normal")
+        else:
+            self.app.render_animation = False
+            self.animation_format_dropdown.configure(state="disabled")
+        self.schedule_estimate()
+
+    def animation_format_dropdown_handler(self, choice):
+        self.app.animation_format = choice.lower()
+        self.schedule_estimate()
+
+    def contact_sheet_checkbox_handler(self):
+        if self.contact_sheet_checkbox.get() == 1:
+            self.app.render_contact_sheet = True
+            self.contact_sheet_grid_dropdown.configure(state="normal")
+        else:
+            self.app.render_contact_sheet = False
+            self.contact_sheet_grid_dropdown.configure(state="disabled")
+        self.schedule_estimate()
+
+    def contact_sheet_grid_dropdown_handler(self, choice):
+        self.app.contact_sheet_grid = choice
+        self.schedule_estimate()
+
+    def archive_checkbox_handler(self):
+        if self.archive_checkbox.get() == 1:
+            self.app.render_archive = True
+            self.archive_format_dropdown.configure(state="normal")
+        else:
+            self.app.render_archive = False
+            self.archive_format_dropdown.configure(state="disabled")
+        self.schedule_estimate()
+
+    def archive_format_dropdown_handler(self, choice):
+        self.app.archive_format = choice.lower()
+        self.schedule_estimate()
 
     def jpeg_quality_slider_event_handler(self, value):
         """
@@ -919,6 +1192,7 @@ class RenderMenu(ctk.CTkToplevel):
             text_color = "white"
 
         self.jpeg_quality_slider_value_label.configure(text=int(value), text_color=text_color)
+        self.schedule_estimate()
 
     def png_compression_slider_event_handler(self, value):
         value = int(value)
@@ -933,6 +1207,115 @@ class RenderMenu(ctk.CTkToplevel):
         else:
             text_color = "white"
         self.png_compression_slider_value_label.configure(text_color=text_color, text=value)
+        self.schedule_estimate()
+
+    def render_workers_slider_event_handler(self, value):
+        """
+        Called on updating the render_workers_slider. 1 renders the images in the render thread,
+            more than 1 renders them in a pool of worker processes.
+
+        Returns:
+            None
+        """
+        value = int(value)
+
+        self.app.render_workers = value
+        if value == 1:
+            text_color = "white"
+        else:
+            text_color = "#9BFF99"
+        self.render_workers_slider_value_label.configure(text_color=text_color, text=value)
+
+    def schedule_estimate(self):
+        """
+        Restarts the output estimate once the settings have not changed for ESTIMATE_DELAY ms.
+
+        Returns:
+            None
+        """
+        if self.estimate_job:
+            self.after_cancel(self.estimate_job)
+        self.estimate_job = self.after(self.ESTIMATE_DELAY, self.start_estimate)
+
+    def start_estimate(self):
+        """
+        Stops the running estimate and starts a new one at the current settings. Skipped while rendering.
+
+        Returns:
+            None
+        """
+        self.estimate_job = None
+        if self.render_thread is not None and self.render_thread.is_alive():
+            return
+
+        self.estimate_stop_event.set()
+        self.estimate_stop_event = threading.Event()
+        # The render state is made on the main loop, the estimate renders with its own ImageProcessor.
+        render_state = self.app.image_processor.create_render_state(batch=self.is_batch)
+        self.estimate_thread = threading.Thread(target=self.run_estimate,
+                                                args=(render_state, self.estimate_stop_event), daemon=True)
+        self.estimate_thread.start()
+        self.estimate_label.configure(text="Estimating output size...", text_color="grey")
+        if self.estimate_poll_job is None:
+            self.poll_estimate()
+
+    def run_estimate(self, render_state: dict, stop_event: threading.Event):
+        """
+        Makes the output estimate, called from the estimate thread. Queues the estimate unless it was stopped.
+
+        Args:
+            render_state (dict): Render state from ImageProcessor.create_render_state.
+            stop_event (threading.Event): Set once a newer estimate starts.
+
+        Returns:
+            None
+        """
+        estimator = ImageProcessor(app=None, canvas_gm=None, overlay_gm=None)
+        try:
+            estimate = estimator.estimate_output(render_state, batch=self.is_batch,
+                                                 kept_samples=self.estimate_samples,
+                                                 samples_lock=self.estimate_samples_lock, stop_event=stop_event)
+        except Exception:  # Only an estimate, the render reports the real errors.
+            estimate = None
+        if not stop_event.is_set():
+            self.estimate_queue.put(estimate)
+
+    def poll_estimate(self):
+        """
+        Shows the queued estimate. Repeats every PROGRESS_POLL_INTERVAL ms while an estimate is running.
+
+        Returns:
+            None
+        """
+        while not self.estimate_queue.empty():
+            self.update_estimate_label(estimate=self.estimate_queue.get())
+
+        if self.estimate_thread.is_alive() or not self.estimate_queue.empty():
+            self.estimate_poll_job = self.after(self.PROGRESS_POLL_INTERVAL, self.poll_estimate)
+        else:
+            self.estimate_poll_job = None
+
+    def update_estimate_label(self, estimate):
+        """
+        Shows the estimated output size, the encode time per frame and the PNG encode time per compression level.
+
+        Args:
+            estimate (dict|None): Estimate from ImageProcessor.estimate_output.
+
+        Returns:
+            None
+        """
+        if not estimate:
+            self.estimate_label.configure(text="", text_color="grey")
+            return
+
+        total_mb = estimate["total_bytes"] / (1024 * 1024)
+        total_text = f"{total_mb / 1024:.1f} GB" if total_mb >= 1024 else f"{total_mb:.1f} MB"
+        estimate_text = f"Est. output {total_text}  |  {estimate['encode_seconds'] * 1000:.0f} ms/frame encode"
+        if estimate["png_levels"]:
+            estimate_text += "\nPNG ms per level 0-9: " + " ".join(
+                f"{level_stats['seconds'] * 1000:.0f}" for level_stats in estimate["png_levels"].values())
+        self.estimate_label.configure(text=estimate_text, text_color="#DADADA")
 
     def pick_path(self):
         """
@@ -954,6 +1337,51 @@ class RenderMenu(ctk.CTkToplevel):
         self.output_path_textbox.insert("0.0", self.app.output_path)
         self.output_path_btn.configure(state="normal")
 
+    def open_export_target_window(self):
+        """
+        Opens the ExportTargetWindow to add an export target, or brings the open one to the front.
+
+        Returns:
+            None
+        """
+        if self.export_target_window is None or not self.export_target_window.winfo_exists():
+            self.export_target_window = ExportTargetWindow(app=self.app, render_menu=self)
+        self.export_target_window.after(100, self.export_target_window.focus)
+
+    def add_export_target(self, export_target: dict):
+        """
+        Adds an export target, called by the ExportTargetWindow.
+
+        Args:
+            export_target (dict): Export target with the format, quality, compression, max_size and folder keys.
+
+        Returns:
+            None
+        """
+        self.app.export_targets = self.app.export_targets + [export_target]
+        self.update_export_targets_label()
+        self.schedule_estimate()
+
+    def clear_export_targets(self):
+        """
+        Removes every export target, only the images in the output folder are saved.
+
+        Returns:
+            None
+        """
+        self.app.export_targets = []
+        self.update_export_targets_label()
+        self.schedule_estimate()
+
+    def update_export_targets_label(self):
+        """
+        Shows the number of export targets.
+
+        Returns:
+            None
+        """
+        self.export_targets_label.configure(text=f"Extra Targets: {len(self.app.export_targets)}")
+
     def start_render(self, batch: bool = True):
         """
         Starts the render process by calling the render_images method from ImageProcessor.
@@ -971,22 +1399,111 @@ class RenderMenu(ctk.CTkToplevel):
         if os.path.exists(self.app.output_path):
             self.output_path_textbox.configure(fg_color="#b7ffb0", )
             self.render_progressbar.configure(progress_color="#008F39", fg_color="#6D7684")  # dark green
+            self.render_progressbar.set(0)
+            self.render_stats_label.configure(text="")
+            self.render_images_btn.configure(state="disabled")
+            if self.is_batch:
+                self.pause_render_btn.configure(state="normal", text="Pause")
+                self.cancel_render_btn.configure(state="normal")
+
+            # New events for every render, a cancelled render must not stop the next one.
+            self.render_stop_event = threading.Event()
+            self.render_pause_event = threading.Event()
+
+            # The render state is made here, so the render thread never reads the app while it changes.
+            render_state = self.app.image_processor.create_render_state(batch=batch)
 
             # Using threading for rendering images to prevent GUI freeze during the processing.
-            threading.Thread(target=self.app.image_processor.render_images, kwargs={'batch': batch},
-                             daemon=True).start()
+            self.render_thread = threading.Thread(target=self.app.image_processor.render_images,
+                                                  kwargs={'batch': batch, 'render_state': render_state,
+                                                          'progress_callback': self.push_progress,
+                                                          'stop_event': self.render_stop_event,
+                                                          'pause_event': self.render_pause_event},
+                                                  daemon=True)
+            self.render_thread.start()
+            self.poll_progress()
 
         else:
             # On invalid folder path, change path_textbox to red.
             self.output_path_textbox.configure(fg_color="#ff7575")
 
-    def update_progress_bar(self, progress: float, status: bool):
+    def push_progress(self, progress: float, status: bool, stats: dict):
+        """
+        Progress callback of the render, called from the render thread. Only queues the progress,
+            the widgets are updated on the main loop by poll_progress.
+
+        Args:
+            progress (float):A value between 0-1.
+            status (bool): True indicates a success transfer, False indicates a failed render.
+            stats (dict): Render stats from ImageProcessor.get_render_stats.
+
+        Returns:
+            None
+        """
+        self.progress_queue.put((progress, status, stats))
+
+    def poll_progress(self):
+        """
+        Reads the queued progress of the render thread and updates the widgets. Repeats every
+            PROGRESS_POLL_INTERVAL ms until the render thread is done.
+
+        Returns:
+            None
+        """
+        while not self.progress_queue.empty():
+            progress, status, stats = self.progress_queue.get()
+            self.update_progress_bar(progress=progress, status=status, stats=stats)
+
+        if self.render_thread.is_alive() or not self.progress_queue.empty():
+            self.progress_poll_job = self.after(self.PROGRESS_POLL_INTERVAL, self.poll_progress)
+        else:
+            self.progress_poll_job = None
+            self.render_images_btn.configure(state="normal")
+            if self.is_batch:
+                self.pause_render_btn.configure(state="disabled", text="Pause")
+                self.cancel_render_btn.configure(state="disabled")
+            if self.render_stop_event.is_set():
+                self.render_progressbar.configure(progress_color="#E2A000")  # orange
+                if self.is_batch and self.app.render_archive:  # The unfinished archive is removed.
+                    self.render_stats_label.configure(text="Render cancelled.")
+                else:
+                    self.render_stats_label.configure(text="Render cancelled, the next render resumes it.")
+
+    def pause_render(self):
+        """
+        Pauses or resumes the running batch render. Paused, the images in flight are finished and no new
+            images are started.
+
+        Returns:
+            None
+        """
+        if self.render_pause_event.is_set():
+            self.render_pause_event.clear()
+            self.pause_render_btn.configure(text="Pause")
+        else:
+            self.render_pause_event.set()
+            self.pause_render_btn.configure(text="Resume")
+
+    def cancel_render(self):
+        """
+        Cancels the running batch render after the images in flight. The finished images are recorded in the
+            checkpoint of the output folder, so the next render of the same queue resumes from there.
+
+        Returns:
+            None
+        """
+        self.render_stop_event.set()
+        self.pause_render_btn.configure(state="disabled")
+        self.cancel_render_btn.configure(state="disabled")
+
+    def update_progress_bar(self, progress: float, status: bool, stats: dict = None):
         """
         Updates the render_progressbar widget on the RenderMenu window based on the files processed.
 
         Args:
             progress (float):A value between 0-1.
             status (bool): True indicates a success transfer, False indicates a failed render.
+            stats (dict,optional): Render stats from ImageProcessor.get_render_stats.
 
         Returns:
             None
@@ -1003,8 +1520,37 @@ class RenderMenu(ctk.CTkToplevel):
         else:
             self.render_progressbar.set(1)
             self.render_progressbar.configure(progress_color="#E20000")  # red
+            if stats and stats["images_failed"]:
+                self.app.error_prompt.display_error_prompt(
+                    error_msg=f"{stats['images_failed']} image(s) failed to render.", priority=1)
+            elif stats and stats["images_total"]:  # Every image rendered, the animation or archive did not save.
+                self.app.error_prompt.display_error_prompt(error_msg="Animation or archive failed to save.",
+                                                           priority=1)
 
-        self.update_idletasks()
+        if stats:
+            self.update_render_stats_label(stats=stats)
+
+    def update_render_stats_label(self, stats: dict):
+        """
+        Shows the throughput, the size of the saved images, the elapsed time and the time left of the render.
+
+        Args:
+            stats (dict): Render stats from ImageProcessor.get_render_stats.
+
+        Returns:
+            None
+        """
+
+        def format_duration(seconds):
+            minutes, seconds = divmod(int(seconds), 60)
+            return f"{minutes // 60}:{minutes % 60:02d}:{seconds:02d}" if minutes >= 60 else f"{minutes}:{seconds:02d}"
+
+        images_per_second, time_left = ImageProcessor.get_render_throughput(stats)
+        stats_text = (f"{stats['images_done']}/{stats['images_total']}  |  {images_per_second:.1f} img/s  |  "
+                      f"{stats['bytes_written'] / (1024 * 1024):.1f} MB  |  {format_duration(stats['elapsed'])}")
+        if time_left is not None and stats["images_done"] < stats["images_total"]:
+            stats_text += f"  |  ETA {format_duration(time_left)}"
+        self.render_stats_label.configure(text=stats_text)
 
     def kill_window(self):
         """
@@ -1017,6 +1563,105 @@ class RenderMenu(ctk.CTkToplevel):
         if self.render_progressbar.get() not in (0, 1):
             self.app.error_prompt.display_error_prompt(error_msg="Render Interrupted!", priority=1)
 
+        self.render_stop_event.set()  # Stops the render thread after the current image.
+        self.estimate_stop_event.set()
+        for job in (self.progress_poll_job, self.estimate_job, self.estimate_poll_job):
+            if job:
+                self.after_cancel(job)
+        self.destroy()
+
+
+class ExportTargetWindow(ctk.CTkToplevel):
+    """
+    Toplevel window that sets up an extra export target of the render: format, quality, max size and folder.
+    """
+
+    def __init__(self, app, render_menu, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        width = 300
+        height = 260
+        self.app = app
+        self.render_menu = render_menu
+        self.screen_width = self.winfo_screenwidth()
+        self.screen_height = self.screen_width * 0.5625
+        x = (self.screen_width - width) // 2
+        y = (self.screen_height - height) // 2
+
+        main_color = "#263142"
+        self.title("Export Target")
+        self.configure(fg_color=main_color)
+        if sys.platform.startswith('win'):
+            self.after(201, lambda: self.iconbitmap(os.path.join("sources", "images", "logo.ico")))
+        else:
+            self.after(201, lambda: self.iconbitmap(os.path.join("@sources", "images", "logo.xbm")))
+
+        self.geometry(f"{width}x{height}+{x}+{y}")
+        self.resizable(False, False)
+        self.columnconfigure((0, 1), weight=1)
+
+        format_label = ctk.CTkLabel(self, text="Format:", font=("Arial", 14))
+        format_label.grid(row=0, column=0, sticky="e", padx=(0, 10), pady=(15, 5))
+        self.format_dropdown = ctk.CTkOptionMenu(self, values=["JPEG", "PNG", "WEBP"], width=100)
+        self.format_dropdown.grid(row=0, column=1, sticky="w", pady=(15, 5))
+
+        quality_label = ctk.CTkLabel(self, text="Quality:", font=("Arial", 14))
+        quality_label.grid(row=1, column=0, sticky="e", padx=(0, 10), pady=5)
+        self.quality_entry = ctk.CTkEntry(self, width=100, placeholder_text="1-100")
+        self.quality_entry.insert(0, "85")
+        self.quality_entry.grid(row=1, column=1, sticky="w", pady=5)
+
+        max_size_label = ctk.CTkLabel(self, text="Max Size (px):", font=("Arial", 14))
+        max_size_label.grid(row=2, column=0, sticky="e", padx=(0, 10), pady=5)
+        self.max_size_entry = ctk.CTkEntry(self, width=100, placeholder_text="Full size")
+        self.max_size_entry.grid(row=2, column=1, sticky="w", pady=5)
+
+        self.folder_btn = ctk.CTkButton(self, text="Pick Folder", command=self.pick_folder, width=80, height=15,
+                                        font=("Arial", 15), fg_color="#d2190d", hover_color="#6a0c06",
+                                        corner_radius=5)
+        self.folder_btn.grid(row=3, column=0, columnspan=2, pady=5)
+        self.folder_label = ctk.CTkLabel(self, text="", font=("Arial", 12), height=16)
+        self.folder_label.grid(row=4, column=0, columnspan=2)
+        self.folder = ""
+
+        self.add_btn = ctk.CTkButton(self, text="Add Target", command=self.add_target, width=120, height=35,
+                                     font=("Arial bold", 17), fg_color="#3568B5", hover_color="#213D67")
+        self.add_btn.grid(row=5, column=0, columnspan=2, pady=(10, 10))
+
+    def pick_folder(self):
+        """
+        Opens a filedialog.askdirectory window to set the folder of the export target.
+
+        Returns:
+            None
+        """
+        folder = filedialog.askdirectory(parent=self)
+        if folder:
+            self.folder = folder
+            self.folder_label.configure(text=folder, text_color="#DADADA")
+
+    def add_target(self):
+        """
+        Validates the values and adds the export target to the RenderMenu.
+
+        Returns:
+            None
+        """
+        try:
+            quality = int(self.quality_entry.get())
+            max_size = int(self.max_size_entry.get()) if self.max_size_entry.get().strip() else None
+        except ValueError:
+            self.quality_entry.configure(border_color="red")
+            self.max_size_entry.configure(border_color="red")
+            return
+
+        if not self.folder or not 1 <= quality <= 100 or (max_size is not None and max_size < 1):
+            self.folder_label.configure(text="Pick a folder and a quality of 1-100.", text_color="#ff7575")
+            return
+
+        export_target = {"format": self.format_dropdown.get().lower(), "quality": quality,
+                         "compression": self.app.png_compression, "max_size": max_size, "folder": self.folder}
+        self.render_menu.add_export_target(export_target)
         self.destroy()
 
 
@@ -1215,6 +1860,21 @@ class App(ctk.CTk):
         self.include_blanks = False
         self.jpeg_quality = 75
         self.png_compression = 3
+        self.render_workers = 1
+        self.overlay_cache_mb = 256  # Memory budget of the overlay layers and images reused during render.
+        # Larger images are rendered in bands to stay within this budget. None bands only the images that do not fit
+        #   in the available memory.
+        self.render_memory_budget_mb = None
+        self.skip_unchanged = True  # Skips the frames already rendered to the output folder with the same inputs.
+        self.export_targets = []  # Extra formats and sizes saved from the same rendered images.
+        self.annotations_only = False  # Saves only the transparent annotation layers, for compositing elsewhere.
+        self.annotation_format = "png"
+        self.render_animation = False  # Encodes the rendered queue into an animated WebP or GIF as well.
+        self.animation_format = "webp"
+        self.render_contact_sheet = False  # Saves pages of thumbnails of the queue instead of the images.
+        self.contact_sheet_grid = "6x5"  # Columns x rows of a contact sheet page.
+        self.render_archive = False  # Writes the batch into a single ZIP or TAR archive instead of image files.
+        self.archive_format = "zip"
         self.output_path = "images"
         # --------------------------------------
         self.images = []  # List of image filepaths
@@ -1261,7 +1921,16 @@ class App(ctk.CTk):
         self.display_mode = None
 
         self.viewport_resample = Image.NEAREST
-        self.zoomed_ld_img = None
+        # Downscaled images kept on disk between sessions, the budget is set from the user settings.
+        self.mip_cache = MipCache(max_bytes=1024 * 1024 * 1024)
+        # Images resized for the canvas, the next images in the direction of navigation are loaded ahead.
+        self.viewport_cache = ViewportImageCache(max_bytes=512 * 1024 * 1024, disk_cache=self.mip_cache)
+        self.viewport_prefetch_count = 3
+        self.navigation_direction = 1  # 1 towards the last image, -1 towards the first.
+        self.zoom_tiles_job = None
+        # Image the zoom tiles are resized from, a pyramid level or the full size image, and its (path, level size).
+        self.zoom_source_img = None
+        self.zoom_source_key = None
         self.previous_display_mode = None
         self.lock_zoom = False
 
@@ -1318,7 +1987,8 @@ class App(ctk.CTk):
             """
             default_settings = {"canvas_color": "default",
                                 "selection_color": "cyan",
-                                "highlight_opacity": 30}
+                                "highlight_opacity": 30,
+                                "disk_cache_mb": 1024}
 
             with open(file_path, 'w') as file:
                 json.dump(default_settings, file, indent=2)
@@ -1366,6 +2036,8 @@ class App(ctk.CTk):
 
         self.selection_color = selection_color
 
+        self.mip_cache.set_max_bytes(self.user_settings.get("disk_cache_mb", 1024) * 1024 * 1024)
+
         file_path = "settings.json"
         with open(file_path, 'w') as file:  # writing the new settings to disc
             json.dump(self.user_settings, file, indent=2)
@@ -2198,7 +2870,9 @@ class App(ctk.CTk):
 
         self.image_canvas.pack(expand=True)
 
-        self.resized_ld_img = self.ld_img.resize((self.aspect_width, self.aspect_height), Image.NEAREST)
+        self.resized_ld_img = self.viewport_cache.get_image(self.images[self.image_index],
+                                                            size=(self.aspect_width, self.aspect_height),
+                                                            resample=Image.NEAREST)
         self.current_imagetk = ImageTk.PhotoImage(self.resized_ld_img)
 
         center_x = self.resized_ld_img.width // 2
@@ -2212,8 +2886,10 @@ class App(ctk.CTk):
         self.canvas_scrollbar_x = ctk.CTkScrollbar(self.image_frame, command=self.image_canvas.xview,
                                                    orientation="horizontal")
         # self.canvas_scrollbar_x.place(x=12, y=123)
-        self.image_canvas.configure(xscrollcommand=self.canvas_scrollbar_x.set,
-                                    yscrollcommand=self.canvas_scrollbar_y.set)
+        self.image_canvas.configure(xscrollcommand=self.canvas_xscroll_handler,
+                                    yscrollcommand=self.canvas_yscroll_handler)
+        # The zoomed and actual scale image, drawn as tiles that are made as they scroll into view.
+        self.zoom_tiles = TiledCanvasImage(canvas=self.image_canvas, tags=("img",))
         self.image_canvas.configure(xscrollincrement=1, yscrollincrement=1)
 
         self.update_filename()  # Updates the current image filename on the bottm left corner.
@@ -3104,10 +3780,8 @@ class App(ctk.CTk):
                 image_to_pick = self.resized_rgb_img
             else:
                 canvas_to_pick = canvas
-                if self.display_mode == "actual":
-                    image_to_pick = self.ld_img
-                elif self.display_mode == "zoomed":
-                    image_to_pick = self.zoomed_ld_img
+                if self.display_mode in ("actual", "zoomed"):
+                    image_to_pick = self.zoom_tiles
                 else:
                     image_to_pick = self.resized_ld_img
 
@@ -3295,9 +3969,10 @@ class App(ctk.CTk):
         self.display_mode = "default"
         self.previous_display_mode = "default"
 
-        # Clearing the stored zoomed image from memmory.
-        if self.zoomed_ld_img:
-            self.zoomed_ld_img = None
+        # Clearing the zoomed tiles from the canvas and memory.
+        self.zoom_tiles.clear()
+        self.zoom_source_img = None
+        self.zoom_source_key = None
         # Also responsible for removing the text selection border on clicking next.
         self.call_display_mode_func()
 
@@ -3314,14 +3989,17 @@ class App(ctk.CTk):
         self.windowed_canvas_size = self.aspect_width_windowed, self.aspect_height_windowed
 
         if self.current_state == "m":
-            self.resized_ld_img = self.ld_img.resize((self.aspect_width_maxed, self.aspect_height_maxed),
-                                                     resample=self.viewport_resample)
+            self.resized_ld_img = self.viewport_cache.get_image(self.images[self.image_index],
+                                                                size=self.maximized_canvas_size,
+                                                                resample=self.viewport_resample)
             self.image_canvas.configure(width=self.aspect_width_maxed, height=self.aspect_height_maxed)
 
         elif self.current_state == "w":
-            self.resized_ld_img = self.ld_img.resize((self.aspect_width_windowed, self.aspect_height_windowed),
-                                                     resample=self.viewport_resample)
+            self.resized_ld_img = self.viewport_cache.get_image(self.images[self.image_index],
+                                                                size=self.windowed_canvas_size,
+                                                                resample=self.viewport_resample)
             self.image_canvas.configure(width=self.aspect_width_windowed, height=self.aspect_height_windowed)
+        self.prefetch_viewport_images()
 
         self.current_imagetk = ImageTk.PhotoImage(self.resized_ld_img)
         center_x = self.resized_ld_img.width // 2
@@ -3353,6 +4031,26 @@ class App(ctk.CTk):
         if self.overlay_canvas_visible:  # If overlay canvas was visible before update, re-enable it
             self.toggle_overlay_canvas(override=True, rescaled=True)
 
+    def prefetch_viewport_images(self):
+        """
+        Loads the next images in the direction of navigation, and the one behind, into the viewport cache in the
+            background.
+
+        Returns:
+            None
+
+        """
+        if self.current_state == "m":
+            frame_size = (self.image_frame_width_maxed, self.image_frame_height_maxed)
+        else:
+            frame_size = (self.image_frame_width_windowed, self.image_frame_height_windowed)
+
+        steps = [self.navigation_direction * step for step in range(1, self.viewport_prefetch_count + 1)]
+        steps.append(-self.navigation_direction)
+        paths = [self.images[self.image_index + step] for step in steps
+                 if 0 <= self.image_index + step <= self.available_index]
+        self.viewport_cache.prefetch(paths, frame_size=frame_size, resample=self.viewport_resample)
+
     def zoom_image(self, event=0, lock_zoom: bool = False):
         """
         Zooms the current image with the mouse cursor as anchor.
@@ -3390,20 +4088,18 @@ class App(ctk.CTk):
 
         self.previous_display_mode = self.display_mode
 
-        self.zoomed_ld_img = self.ld_img.resize((int(self.resized_ld_img.width * self.scale_factor),
-                                                 int(self.resized_ld_img.height * self.scale_factor)),
-                                                resample=self.viewport_resample)
-
-        self.current_imagetk = ImageTk.PhotoImage(self.zoomed_ld_img)
+        zoomed_size = (int(self.resized_ld_img.width * self.scale_factor),
+                       int(self.resized_ld_img.height * self.scale_factor))
+        # Only the tiles in view are resized, from the smallest cached pyramid level that covers the zoom, else from
+        #   the full size image.
+        self.zoom_tiles.set_image(self.get_zoom_source(zoomed_size=zoomed_size), image_size=zoomed_size,
+                                  resample=self.viewport_resample)
+        # Emptied rather than hidden, revealing the "img" items must not show the fitted image over the tiles.
+        self.image_canvas.itemconfig(self.display_image, image="")
+        self.current_imagetk = None
 
-        center_x = self.zoomed_ld_img.width // 2
-        center_y = self.zoomed_ld_img.height // 2
-
-        self.image_canvas.configure(width=self.zoomed_ld_img.width, height=self.zoomed_ld_img.height)
-        self.image_canvas.itemconfig(self.display_image, image=self.current_imagetk)
-        self.image_canvas.coords(self.display_image, center_x, center_y)
-        self.image_canvas.tag_lower("img")
-        self.image_canvas.configure(scrollregion=self.image_canvas.bbox(self.display_image))
+        self.image_canvas.configure(width=zoomed_size[0], height=zoomed_size[1])
+        self.image_canvas.configure(scrollregion=(0, 0, zoomed_size[0], zoomed_size[1]))
 
         if not lock_zoom:
             if event.delta > 0:  # Zoom in
@@ -3425,6 +4121,7 @@ class App(ctk.CTk):
 
         else:
             self.canvas_gm.scale_to_zoomed_size(mode="+", lock_zoom=True)
+        self.update_zoom_tiles()
 
         if self.scale_factor == 1:
             self.update_image_canvas()
@@ -3432,6 +4129,84 @@ class App(ctk.CTk):
 
             # self.display_mode="default"
 
+    def get_zoom_source(self, zoomed_size: tuple):
+        """
+        Gets the image the zoom tiles are resized from, the smallest cached pyramid level that covers the zoomed
+            size, else the full size image. Kept while the zoom stays on the same level.
+
+        Args:
+            zoomed_size (tuple): Width and height of the zoomed image.
+
+        Returns:
+            Image: The pyramid level or the full size image.
+
+        """
+        level_size = self.mip_cache.get_level_size(self.ld_img.size, min_size=zoomed_size)
+        zoom_source_key = (self.images[self.image_index], level_size)
+        if zoom_source_key != self.zoom_source_key:
+            if level_size:
+                self.zoom_source_img = self.mip_cache.get_level(self.images[self.image_index], level_size=level_size)
+            else:
+                self.zoom_source_img = self.ld_img
+            self.zoom_source_key = zoom_source_key
+        return self.zoom_source_img
+
+    def canvas_xscroll_handler(self, first, last):
+        """
+        Called when the horizontal view of the image canvas changes. Updates the scrollbar and the zoom tiles.
+
+        Args:
+            first (str): Start of the view, 0-1 of the scroll region.
+            last (str): End of the view, 0-1 of the scroll region.
+
+        Returns:
+            None
+
+        """
+        self.canvas_scrollbar_x.set(first, last)
+        self.schedule_zoom_tiles_update()
+
+    def canvas_yscroll_handler(self, first, last):
+        """
+        Called when the vertical view of the image canvas changes. Updates the scrollbar and the zoom tiles.
+
+        Args:
+            first (str): Start of the view, 0-1 of the scroll region.
+            last (str): End of the view, 0-1 of the scroll region.
+
+        Returns:
+            None
+
+        """
+        self.canvas_scrollbar_y.set(first, last)
+        self.schedule_zoom_tiles_update()
+
+    def schedule_zoom_tiles_update(self):
+        """
+        Updates the zoom tiles once the pending events are handled, a pan scrolls the view many times per frame.
+
+        Returns:
+            None
+
+        """
+        if self.zoom_tiles_job is None:
+            self.zoom_tiles_job = self.after_idle(self.update_zoom_tiles)
+
+    def update_zoom_tiles(self):
+        """
+        Makes the zoom tiles that scrolled into view and releases the ones that scrolled away, in the zoomed and
+            actual scale modes.
+
+        Returns:
+            None
+
+        """
+        self.zoom_tiles_job = None
+        if self.display_mode in ("zoomed", "actual"):
+            view_size = (max(self.image_canvas.winfo_width(), self.image_frame.winfo_width()),
+                         max(self.image_canvas.winfo_height(), self.image_frame.winfo_height()))
+            self.zoom_tiles.update(view_size=view_size)
+
     def show_actual_scale(self):
         """
         Displays the current image in its actual size, 1:1 ratio.
@@ -3454,17 +4229,14 @@ class App(ctk.CTk):
             self.show_actual_scale()
             return
 
-        self.current_imagetk = ImageTk.PhotoImage(self.ld_img)
-
-        center_x = self.ld_img.width // 2
-        center_y = self.ld_img.height // 2
-
-        self.image_canvas.itemconfig(self.display_image, image=self.current_imagetk)
-        self.image_canvas.coords(self.display_image, center_x, center_y)
-        self.image_canvas.tag_lower("img")
+        # Drawn as tiles cropped from the full size image as they scroll into view, the full size image is never
+        #   copied into a single PhotoImage.
+        self.zoom_tiles.set_image(self.ld_img, image_size=self.ld_img.size, resample=self.viewport_resample)
+        self.image_canvas.itemconfig(self.display_image, image="")
+        self.current_imagetk = None
 
         self.image_canvas.configure(width=self.ld_img.width, height=self.ld_img.height,
-                                    scrollregion=self.image_canvas.bbox(self.display_image))
+                                    scrollregion=(0, 0, self.ld_img.width, self.ld_img.height))
 
         canvas_width = self.ld_img.width
         canvas_height = self.ld_img.height
@@ -3483,6 +4255,7 @@ class App(ctk.CTk):
 
         self.canvas_gm.scale_to_actual_size()
         self.display_mode = "actual"
+        self.update_zoom_tiles()
         self.actual_scale_btn.configure(text="Actual Scale: ON", fg_color=self.TOP_BUTTON_FG_ACTIVE)
         self.call_display_mode_func()
 
@@ -3726,6 +4499,8 @@ class App(ctk.CTk):
 
             self.error_prompt.hide_error_prompt(animate=False)
             main_func = func(self, *args, **kwargs)
+            if self.image_index != self.prev_image_index:  # Prefetches ahead in the same direction.
+                self.navigation_direction = 1 if self.image_index > self.prev_image_index else -1
 
             # ------After index change------------
             # after function execution and image index is updated. New image loads.
@@ -4115,6 +4890,7 @@ class App(ctk.CTk):
                 None
         """
         if self.render_menu:
+            self.render_menu.render_stop_event.set()  # Stops a render still running from the old menu.
             self.render_menu.destroy()
         self.render_menu = RenderMenu(app=self, batch=batch)
         # self.render_menu.withdraw()  # hide the window
@@ -4305,10 +5081,33 @@ class App(ctk.CTk):
             "include_blanks": self.include_blanks,
             "jpeg_quality": self.jpeg_quality,
             "png_compression": self.png_compression,
+            "render_workers": self.render_workers,
+            "overlay_cache_mb": self.overlay_cache_mb,
+            "render_memory_budget_mb": self.render_memory_budget_mb,
+            "skip_unchanged": self.skip_unchanged,
+            "export_targets": self.export_targets,
+            "annotations_only": self.annotations_only,
+            "annotation_format": self.annotation_format,
+            "animation": {"format": self.animation_format} if self.render_animation else None,
+            "contact_sheet": self.get_contact_sheet_settings(),
+            "archive": {"format": self.archive_format, "index": True} if self.render_archive else None,
             "output_path": self.output_path
         }
         self.settings_data = settings_dict
 
+    def get_contact_sheet_settings(self):
+        """
+        Gets the contact sheet settings of the render from the grid chosen in the RenderMenu.
+
+        Returns:
+            dict|None: Columns and rows of a page. None if no contact sheet is rendered.
+
+        """
+        if not self.render_contact_sheet:
+            return None
+        columns, rows = (int(value) for value in self.contact_sheet_grid.split("x"))
+        return {"columns": columns, "rows": rows}
+
     def create_graphics_data_dict(self, ):
         """
         Creates the graphics_data and proxy_data dictionary with keys starting from index -2 to number of total images and empty dictionary as values.
@@ -4459,4 +5258,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Needed by the render worker processes in the frozen executable.
+    multiprocessing.freeze_support()
     main()
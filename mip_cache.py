@@ -0,0 +1,297 @@
+from PIL import Image
+import hashlib
+import os
+import threading
+
+
+class MipCache:
+    """
+    On disk cache of the downscaled images, kept between sessions. Entries are keyed by the path, file size and
+        modified time of the source image, so a changed image is decoded again. The oldest entries are removed
+        once the cache is over its size budget.
+    """
+    CACHE_FOLDER = os.path.join("cache", "mips")
+    # Longest side of the pyramid levels the zoom is resized from, instead of the full size image.
+    MIP_LEVELS = (1024, 2048, 4096)
+    # Removed down to this share of the budget, so the eviction does not run on every write.
+    EVICTION_TARGET = 0.9
+
+    def __init__(self, max_bytes: int, cache_folder: str = None):
+        """
+        Initializer for the MipCache.
+
+        Args:
+            max_bytes (int): Size budget of the cache folder in bytes, 0 turns the cache off.
+            cache_folder (str,optional): Folder of the cached images. Default CACHE_FOLDER.
+        """
+        self.max_bytes = max_bytes
+        self.cache_folder = cache_folder or self.CACHE_FOLDER
+        self.cache_bytes = None  # Counted on the first write.
+        self.lock = threading.Lock()
+
+    def get_source_key(self, path: str):
+        """
+        Gets the cache key of the source image from its path, size and modified time.
+
+        Args:
+            path (str): Path of the source image.
+
+        Returns:
+            str|None: Hex key. None if the file can not be read.
+
+        """
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return None
+        source_id = f"{os.path.abspath(path)}|{file_stat.st_size}|{file_stat.st_mtime_ns}"
+        return hashlib.sha1(source_id.encode("utf-8")).hexdigest()
+
+    def get_cache_location(self, source_key: str, size: tuple, resample):
+        """
+        Gets the path of a cached image.
+
+        Args:
+            source_key (str): Key from get_source_key.
+            size (tuple): Size of the cached image.
+            resample: Resampling filter the image was resized with.
+
+        Returns:
+            str: Path of the cached image.
+
+        """
+        # Spread over subfolders, so no single folder holds every entry.
+        return os.path.join(self.cache_folder, source_key[:2],
+                            f"{source_key}_{size[0]}x{size[1]}_{int(resample)}.png")
+
+    def get_image(self, path: str, size: tuple, resample, load_image):
+        """
+        Gets the downscaled image from the cache, or else loads it with load_image and adds it to the cache.
+
+        Args:
+            path (str): Path of the source image.
+            size (tuple): Size of the downscaled image.
+            resample: Resampling filter of the resize.
+            load_image: Called with the path, size and resample to load the image on a cache miss.
+
+        Returns:
+            Image: RGB, or RGBA if the image has transparency.
+
+        """
+        source_key = self.get_source_key(path) if self.max_bytes else None
+        if source_key is None:
+            return self.normalize_mode(load_image(path, size=size, resample=resample))
+
+        cache_location = self.get_cache_location(source_key, size, resample)
+        try:
+            with Image.open(cache_location) as cached_image:
+                cached_image.load()
+        except (OSError, ValueError):  # Not cached, or a broken entry that is replaced below.
+            pass
+        else:
+            try:
+                os.utime(cache_location)  # Marks the entry as recently used for the eviction.
+            except OSError:
+                pass
+            return cached_image
+
+        image = self.normalize_mode(load_image(path, size=size, resample=resample))
+        self.add_image(source_key, image, resample)
+        return image
+
+    def get_level_size(self, image_size: tuple, min_size: tuple):
+        """
+        Gets the size of the smallest pyramid level of the image that still covers the size.
+
+        Args:
+            image_size (tuple): Full size of the source image.
+            min_size (tuple): Width and height the level must cover.
+
+        Returns:
+            tuple|None: Size of the level. None if the cache is off or no level smaller than the image covers
+                the size.
+
+        """
+        if not self.max_bytes:
+            return None
+
+        aspect_ratio = image_size[0] / image_size[1]
+        for level in self.MIP_LEVELS:
+            if level >= max(image_size):
+                return None
+            level_size = (min(level, round(level * aspect_ratio)), min(level, round(level / aspect_ratio)))
+            if level_size[0] >= min_size[0] and level_size[1] >= min_size[1]:
+                return level_size
+        return None
+
+    def get_level(self, path: str, level_size: tuple):
+        """
+        Gets a pyramid level of the image.
+
+        Args:
+            path (str): Path of the source image.
+            level_size (tuple): Size of the level, from get_level_size.
+
+        Returns:
+            Image: The pyramid level.
+
+        """
+        return self.get_image(path, size=level_size, resample=Image.LANCZOS, load_image=self.load_level)
+
+    @staticmethod
+    def load_level(path: str, size: tuple, resample):
+        """
+        Decodes the source image and downscales it to a pyramid level.
+
+        Args:
+            path (str): Path of the source image.
+            size (tuple): Size of the level.
+            resample: Resampling filter of the resize.
+
+        Returns:
+            Image: The pyramid level.
+
+        """
+        with Image.open(path) as image:
+            if image.format == "JPEG":
+                image.draft(image.mode, size)
+            return image.resize(size, resample=resample, reducing_gap=3.0)
+
+    @staticmethod
+    def normalize_mode(image):
+        """
+        Converts the image to RGB, or RGBA if it has transparency, the modes the cache saves.
+
+        Args:
+            image (Image): The image.
+
+        Returns:
+            Image: RGB or RGBA image.
+
+        """
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        mode = "RGBA" if has_alpha else "RGB"
+        return image if image.mode == mode else image.convert(mode)
+
+    def add_image(self, source_key: str, image, resample):
+        """
+        Saves the image in the cache as PNG. Lossless, the cached images are shown and color picked in place of the
+            source. Written to a temporary file first, so a reader never sees half an entry.
+
+        Args:
+            source_key (str): Key from get_source_key.
+            image (Image): RGB or RGBA image.
+            resample: Resampling filter the image was resized with.
+
+        Returns:
+            None
+
+        """
+        cache_location = self.get_cache_location(source_key, image.size, resample)
+        temp_location = f"{cache_location}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_location), exist_ok=True)
+            # Fastest compression level, the cache is written while the user waits for the image.
+            image.save(temp_location, format="PNG", compress_level=1)
+            os.replace(temp_location, cache_location)
+            entry_bytes = os.path.getsize(cache_location)
+        except OSError:  # The cache only speeds up loading, a failed write is not worth reporting.
+            try:
+                os.remove(temp_location)
+            except OSError:
+                pass
+            return
+
+        with self.lock:
+            if self.cache_bytes is None:
+                self.cache_bytes = self.get_cache_bytes()
+            else:
+                self.cache_bytes += entry_bytes
+            if self.cache_bytes > self.max_bytes:
+                self.evict(target_bytes=int(self.max_bytes * self.EVICTION_TARGET))
+
+    def get_cache_entries(self):
+        """
+        Lists the cached images.
+
+        Returns:
+            list: (path, size in bytes, modified time) of every cached image.
+
+        """
+        cache_entries = []
+        try:
+            subfolders = list(os.scandir(self.cache_folder))
+        except OSError:
+            return cache_entries
+
+        for subfolder in subfolders:
+            if not subfolder.is_dir():
+                continue
+            try:
+                for entry in os.scandir(subfolder.path):
+                    if entry.is_file() and not entry.name.endswith(".tmp"):
+                        entry_stat = entry.stat()
+                        cache_entries.append((entry.path, entry_stat.st_size, entry_stat.st_mtime))
+            except OSError:
+                continue
+        return cache_entries
+
+    def get_cache_bytes(self):
+        """
+        Gets the size of the cache folder.
+
+        Returns:
+            int: Size in bytes.
+
+        """
+        return sum(entry_bytes for _, entry_bytes, _ in self.get_cache_entries())
+
+    def evict(self, target_bytes: int):
+        """
+        Removes the least recently used images until the cache is within the target size.
+
+        Args:
+            target_bytes (int): Size to shrink the cache to.
+
+        Returns:
+            None
+
+        """
+        cache_entries = sorted(self.get_cache_entries(), key=lambda cache_entry: cache_entry[2])
+        self.cache_bytes = sum(entry_bytes for _, entry_bytes, _ in cache_entries)
+        for cache_location, entry_bytes, _ in cache_entries:
+            if self.cache_bytes <= target_bytes:
+                break
+            try:
+                os.remove(cache_location)
+            except OSError:
+                continue
+            self.cache_bytes -= entry_bytes
+
+    def set_max_bytes(self, max_bytes: int):
+        """
+        Changes the size budget and shrinks the cache to it.
+
+        Args:
+            max_bytes (int): Size budget in bytes, 0 turns the cache off and clears it.
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            if max_bytes == self.max_bytes:
+                return
+            self.max_bytes = max_bytes
+            self.evict(target_bytes=max_bytes)
+
+    def clear(self):
+        """
+        Removes every cached image.
+
+        Returns:
+            None
+
+        """
+        with self.lock:
+            self.evict(target_bytes=0)
@@ -0,0 +1,308 @@
+import argparse
+import json
+import os
+import sys
+
+from file_handler import FileHandler
+from image_processor import ImageProcessor
+
+
+# Headless command line entry point. Renders .rvp projects without starting the app or needing a display server.
+#   python -m rview render project.rvp --out DIR
+
+def get_highlight_opacity(settings_path: str = "settings.json"):
+    """
+    Reads the highlight opacity from the user settings file.
+
+    Args:
+        settings_path (str): Path to the user settings json file.
+
+    Returns:
+        int: Highlight opacity from the user settings. 30 if the file is missing or invalid.
+
+    """
+    try:
+        with open(settings_path, 'r') as file:
+            json_file = json.load(file)
+    except Exception:
+        return 30
+
+    if FileHandler.validate_user_settings_file(json_data=json_file):
+        return json_file["highlight_opacity"]
+    return 30
+
+
+def parse_export_target(text: str):
+    """
+    Parses an export target of the --target option, comma separated key=value pairs.
+        format=jpeg,folder=web,max_size=1920,quality=85
+
+    Args:
+        text (str): Value of the --target option.
+
+    Returns:
+        dict: Export target with the format, quality, compression, max_size and folder keys.
+
+    """
+    export_target = {"format": None, "quality": 90, "compression": 6, "max_size": None, "folder": None}
+    try:
+        for pair in text.split(","):
+            key, value = pair.split("=", 1)
+            key = key.strip()
+            if key not in export_target:
+                raise ValueError(f"unknown key {key}")
+            export_target[key] = int(value) if key in ("quality", "compression", "max_size") else value.strip()
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid export target {text!r}: {e}")
+
+    export_target["format"] = (export_target["format"] or "").lower().replace("jpg", "jpeg")
+    if export_target["format"] not in ImageProcessor.EXPORT_TARGET_EXTENSIONS:
+        raise argparse.ArgumentTypeError(f"invalid export target {text!r}: format must be one of "
+                                         f"{', '.join(ImageProcessor.EXPORT_TARGET_EXTENSIONS)}")
+    if not export_target["folder"]:
+        raise argparse.ArgumentTypeError(f"invalid export target {text!r}: folder is required")
+    return export_target
+
+
+def animation_path(text: str):
+    """
+    Checks the path of the --animation option.
+
+    Args:
+        text (str): Value of the --animation option.
+
+    Returns:
+        str: Path of the animation.
+
+    """
+    if os.path.splitext(text)[1].lower() not in (".webp", ".gif"):
+        raise argparse.ArgumentTypeError(f"animation must be a .webp or .gif file: {text!r}")
+    return text
+
+
+def archive_path(text: str):
+    """
+    Checks the path of the --archive option.
+
+    Args:
+        text (str): Value of the --archive option.
+
+    Returns:
+        str: Path of the archive.
+
+    """
+    if os.path.splitext(text)[1].lower() not in (".zip", ".tar"):
+        raise argparse.ArgumentTypeError(f"archive must be a .zip or .tar file: {text!r}")
+    return text
+
+
+def contact_sheet_grid(text: str):
+    """
+    Parses the grid of the --contact-sheet option, COLUMNSxROWS.
+
+    Args:
+        text (str): Value of the --contact-sheet option.
+
+    Returns:
+        tuple: (columns, rows)
+
+    """
+    try:
+        columns, rows = (int(value) for value in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"grid must be COLUMNSxROWS, e.g. 6x5: {text!r}")
+    if columns < 1 or rows < 1:
+        raise argparse.ArgumentTypeError(f"grid must have at least one column and row: {text!r}")
+    return columns, rows
+
+
+def print_progress(progress: float, status: bool, stats: dict):
+    """
+    Progress callback for the headless render, prints the progress, throughput and ETA on a single line.
+
+    Args:
+        progress (float):A value between 0-1.
+        status (bool): True indicates a success transfer, False indicates a failed render.
+        stats (dict): Render stats from ImageProcessor.get_render_stats.
+
+    Returns:
+        None
+
+    """
+    if status:
+        images_per_second, eta = ImageProcessor.get_render_throughput(stats)
+        print(f"\rRendering: {progress * 100:5.1f}%  {images_per_second:.2f} images/s  "
+              f"{stats['bytes_written'] / (1024 * 1024):.1f} MB  ETA {format_duration(eta)}   ", end="", flush=True)
+
+
+def format_duration(seconds):
+    """
+    Formats a duration as m:ss or h:mm:ss.
+
+    Args:
+        seconds (float|None): Duration in seconds.
+
+    Returns:
+        str: Formatted duration, "--:--" if not known.
+
+    """
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def render_project(args):
+    """
+    Loads the project file and renders every queued image.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments of the render command.
+
+    Returns:
+        int: Exit code, 0 on successful render of all images.
+
+    """
+    if not FileHandler.validate_project_file(args.project):
+        print(f"Invalid project file: {args.project}", file=sys.stderr)
+        return 2
+
+    project_data = FileHandler.load_project_file(args.project)
+    os.makedirs(args.out, exist_ok=True)
+
+    highlight_opacity = args.highlight_opacity
+    if highlight_opacity is None:
+        highlight_opacity = get_highlight_opacity()
+
+    try:
+        render_state = ImageProcessor.create_render_state_from_project(project_data=project_data,
+                                                                       output_path=args.out,
+                                                                       highlight_opacity=highlight_opacity,
+                                                                       images_folder_override_path=args.images,
+                                                                       render_workers=args.workers)
+        settings = render_state["settings"]
+        if args.full:
+            settings["skip_unchanged"] = False
+            settings["resume_render"] = False
+
+        # The batch modes saved from the GUI point to paths of the GUI session and would change what the command
+        #   writes, so only the ones given on the command line are used.
+        settings["annotations_only"] = bool(args.annotations_only)
+        if args.annotations_only:
+            settings["annotation_format"] = args.annotations_only
+        settings["animation"] = None
+        if args.animation:
+            settings["animation"] = {"format": os.path.splitext(args.animation)[1].lower().lstrip("."),
+                                     "path": args.animation, "max_size": args.animation_size,
+                                     "frame_duration": args.frame_duration}
+        settings["contact_sheet"] = None
+        if args.contact_sheet:
+            columns, rows = args.contact_sheet
+            settings["contact_sheet"] = {"columns": columns, "rows": rows, "thumbnail_width": args.thumbnail_width}
+        settings["archive"] = None
+        if args.archive:
+            settings["archive"] = {"format": os.path.splitext(args.archive)[1].lower().lstrip("."),
+                                   "path": args.archive, "index": args.archive_index}
+        settings["export_targets"] = args.target or []
+        if args.memory_budget:
+            settings["render_memory_budget_mb"] = args.memory_budget
+    except FileNotFoundError as e:
+        print(f"Image not found: {e}", file=sys.stderr)
+        return 2
+
+    image_processor = ImageProcessor(app=None, canvas_gm=None, overlay_gm=None)
+    try:
+        rendered = image_processor.render_images(batch=True, render_state=render_state,
+                                                 progress_callback=print_progress)
+    except KeyboardInterrupt:
+        # The finished images are in the checkpoint of the output folder, the same command resumes the render.
+        print("\nRender cancelled, run the same command again to resume.", file=sys.stderr)
+        return 130
+    print()
+
+    for stage, images_per_second in image_processor.get_stage_throughput().items():
+        print(f"{stage.capitalize()} stage: {images_per_second:.2f} images/s")
+
+    for image_index, error in image_processor.failed_images:
+        print(f"Failed to render {render_state['images'][image_index]}: {error}", file=sys.stderr)
+    if image_processor.animation_error:
+        print(f"Failed to save the animation: {image_processor.animation_error}", file=sys.stderr)
+    if image_processor.archive_error:
+        print(f"Failed to save the archive: {image_processor.archive_error}", file=sys.stderr)
+
+    if not render_state["indices"]:
+        print("No images in the render queue.", file=sys.stderr)
+
+    return 0 if rendered else 1
+
+
+def main(argv=None):
+    """
+    Parses the command line arguments and runs the command.
+
+    Args:
+        argv (list,optional): Command line arguments. Default sys.argv.
+
+    Returns:
+        int: Exit code.
+
+    """
+    parser = argparse.ArgumentParser(prog="rview", description="R-View Tool command line.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    render_parser = subparsers.add_parser("render", help="Render the queued images of a .rvp project.",
+                                          description="Render the queued images of a .rvp project. The export "
+                                                      "targets, annotation layers, animation, archive and contact "
+                                                      "sheets saved from the GUI are not used, only the ones given "
+                                                      "here.")
+    render_parser.add_argument("project", help="Path to the .rvp project file.")
+    render_parser.add_argument("--out", required=True, help="Folder to save the rendered images.")
+    render_parser.add_argument("--images", default=None,
+                               help="Folder to look for the images that are not found in their saved path.")
+    render_parser.add_argument("--workers", type=int, default=None,
+                               help="Number of render worker processes. Default is the value saved in the project.")
+    render_parser.add_argument("--highlight-opacity", type=int, default=None,
+                               help="Highlight opacity (1-99). Default is the value in settings.json.")
+    render_parser.add_argument("--memory-budget", type=int, default=None,
+                               help="Working memory per render worker in MB, larger images are rendered in bands. "
+                                    "Default is the available memory shared by the workers.")
+    render_parser.add_argument("--target", type=parse_export_target, action="append", default=None,
+                               help="Extra export target saved from the same rendered images, can be repeated. "
+                                    "Comma separated key=value pairs: format (jpeg, png, webp), folder, "
+                                    "max_size, quality, compression. A relative folder is inside --out. "
+                                    "e.g. format=jpeg,folder=web,max_size=1920")
+    render_parser.add_argument("--annotations-only", nargs="?", const="png", default=None, choices=["png", "webp"],
+                               help="Save only the transparent annotation layers, cropped to the annotated region, "
+                                    "with a json sidecar of their offset. Format png (default) or webp.")
+    render_parser.add_argument("--animation", type=animation_path, default=None,
+                               help="Also encode the queue into an animated .webp or .gif at this path.")
+    render_parser.add_argument("--animation-size", type=int, default=1280,
+                               help="Longest side of the animation frames in pixels. Default 1280.")
+    render_parser.add_argument("--frame-duration", type=int, default=500,
+                               help="Average frame duration of the animation in ms, the timestamps in the sequence "
+                                    "codes set the relative durations. Default 500.")
+    render_parser.add_argument("--archive", type=archive_path, default=None,
+                               help="Write the rendered images into a single .zip or .tar archive at this path "
+                                    "instead of the output folder.")
+    render_parser.add_argument("--archive-index", action="store_true",
+                               help="Add rview_index.json, the sequence codes and source paths of the images, "
+                                    "to the archive.")
+    render_parser.add_argument("--contact-sheet", type=contact_sheet_grid, default=None, metavar="COLUMNSxROWS",
+                               help="Save pages of annotated thumbnails of the queue instead of the images, "
+                                    "e.g. 6x5.")
+    render_parser.add_argument("--thumbnail-width", type=int, default=320,
+                               help="Width of the contact sheet cells in pixels. Default 320.")
+    render_parser.add_argument("--full", action="store_true",
+                               help="Render every queued image, including the ones unchanged since the last render "
+                                    "and the ones finished by a cancelled render.")
+    render_parser.set_defaults(func=render_project)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+from PIL import Image, ImageChops, ImageDraw
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from benchmark import create_annotations
+from image_processor import FilmDraw, ImageProcessor
+
+
+class AnnotationLayerTest(unittest.TestCase):
+    """
+    Draws the annotations on a film the size of the annotation box and compares it with a full size film.
+    """
+    IMAGE_SIZE = (1600, 900)
+
+    def setUp(self):
+        self.working_directory = os.getcwd()
+        os.chdir(REPO_PATH)  # The fonts are looked up from the repository folder.
+
+    def tearDown(self):
+        os.chdir(self.working_directory)
+
+    def create_render_state(self, anti_alias: bool):
+        """
+        Makes a render state of frames annotated away from the top left corner of the image.
+
+        Args:
+            anti_alias (bool): Anti-alias setting of the render.
+
+        Returns:
+            dict: The render state.
+
+        """
+        graphics_data = {}
+        for index in range(3):
+            rng = random.Random(index)
+            graphics_dict = create_annotations(rng, "heavy", (500, 300))
+            shift_x, shift_y = rng.uniform(400, 1000), rng.uniform(300, 550)
+            for cache in graphics_dict.values():
+                if cache.tool == 8:  # Text is placed at a single point.
+                    cache.coordinates = (cache.coordinates[0] + shift_x, cache.coordinates[1] + shift_y)
+                else:
+                    cache.coordinates = [(x + shift_x, y + shift_y) for x, y in cache.coordinates]
+            graphics_data[index] = graphics_dict
+        graphics_data[-1] = {}
+        graphics_data[-2] = {}
+
+        image_data = {index: {"file": f"frame_{index}.png", "sequence_code": f"00:00:{index:02d}",
+                              "image_size": self.IMAGE_SIZE, "in_queue": True}
+                      for index in range(3)}
+        settings = {"render_overlay": False, "trim_overlay": False, "render_sequence_code": False,
+                    "sequence_code_render_position": "se",
+                    "anti_alias": anti_alias, "include_blanks": True, "jpeg_quality": 90, "png_compression": 1,
+                    "render_workers": 1, "output_path": tempfile.gettempdir()}
+        return {"settings": settings, "highlight_opacity": 30, "overlay_size": (1920, 1080),
+                "images": [data["file"] for data in image_data.values()], "image_data": image_data,
+                "graphics_data": graphics_data, "indices": list(image_data)}
+
+    def test_box_film_matches_full_size_film(self):
+        image_width, image_height = self.IMAGE_SIZE
+        for anti_alias in (True, False):
+            image_processor = ImageProcessor(app=None, canvas_gm=None, overlay_gm=None)
+            image_processor.configure_render(self.create_render_state(anti_alias))
+            for image_index in range(3):
+                with self.subTest(anti_alias=anti_alias, image_index=image_index):
+                    annotation_box = image_processor.get_annotation_box(
+                        graphics_dict=image_processor.graphics_data[image_index], image_size=self.IMAGE_SIZE)
+                    self.assertGreater(annotation_box[0], 0)
+                    self.assertGreater(annotation_box[1], 0)
+
+                    box_layer = image_processor.draw_annotation_layer(image_index, annotation_box=annotation_box)
+                    full_layer = image_processor.draw_annotation_layer(
+                        image_index, annotation_box=(0, 0, image_width, image_height))
+
+                    self.assertEqual(full_layer.crop(annotation_box).size, box_layer.size)
+                    self.assertIsNone(ImageChops.difference(full_layer.crop(annotation_box),
+                                                            box_layer).getbbox(alpha_only=False))
+
+    def test_film_draw_matches_full_size_film(self):
+        # Pillow fills wide lines with the film column added in single precision, a few of them only match the
+        #   full size film when the columns are not shifted.
+        rng = random.Random(1)
+        width, height = 4000, 300
+        for _ in range(500):
+            left, upper = rng.randrange(1, 3000), rng.randrange(0, 100)
+            points = [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(rng.randrange(2, 5))]
+            stroke_width = rng.randrange(1, 40)
+
+            full_film = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+            ImageDraw.Draw(full_film).line(points, fill="#ff8020", width=stroke_width, joint="curve")
+            box_film = Image.new("RGBA", (width - left - 50, height - upper - 20), (0, 0, 0, 0))
+            FilmDraw(box_film, upper=upper, left=left).line(points, fill="#ff8020", width=stroke_width,
+                                                            joint="curve")
+
+            film_box = (left, upper, width - 50, height - 20)
+            self.assertIsNone(ImageChops.difference(full_film.crop(film_box), box_film).getbbox(alpha_only=False),
+                              msg=f"{points} width {stroke_width} at {(left, upper)}")
+
+
+if __name__ == "__main__":
+    unittest.main()
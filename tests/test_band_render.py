@@ -0,0 +1,97 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+from PIL import Image, ImageChops
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from benchmark import create_annotations
+from graphics_manager import GraphicsCache, OverlayImageCache
+from image_processor import ImageProcessor
+
+
+class BandRenderTest(unittest.TestCase):
+    """
+    Renders the same frames in one piece and in bands and compares them pixel for pixel.
+    """
+    IMAGE_SIZES = ((640, 480), (360, 600))
+
+    def setUp(self):
+        self.working_directory = os.getcwd()
+        os.chdir(REPO_PATH)  # The fonts are looked up from the repository folder.
+        self.temp_folder = tempfile.mkdtemp()
+
+        rng = random.Random(7)
+        self.images = []
+        for index, (width, height) in enumerate(self.IMAGE_SIZES):
+            source_image = Image.new("RGB", (width, height))
+            source_image.putdata([(rng.randrange(256), (x * 3) % 256, 90) for x in range(width * height)])
+            image_path = os.path.join(self.temp_folder, f"frame_{index}.png")
+            source_image.save(image_path)
+            self.images.append(image_path)
+
+    def tearDown(self):
+        os.chdir(self.working_directory)
+        shutil.rmtree(self.temp_folder, ignore_errors=True)
+
+    def create_render_state(self, anti_alias: bool, trim_overlay: bool):
+        """
+        Makes a render state of annotated frames with a drawn and an image overlay.
+
+        Args:
+            anti_alias (bool): Anti-alias setting of the render.
+            trim_overlay (bool): Trim overlay setting of the render.
+
+        Returns:
+            dict: The render state.
+
+        """
+        graphics_data = {index: create_annotations(random.Random(index), "light", size)
+                         for index, size in enumerate(self.IMAGE_SIZES)}
+        graphics_data[-1] = {
+            1: GraphicsCache(coordinates=[(100, 100), (1800, 1000)], width=12, tags="", tool=4, fill_color="#00ffff"),
+            2: GraphicsCache(coordinates=[(310.3, 60.7), (1500.6, 870.2)], width=5, tags="", tool=6,
+                             fill_color="#ff00ff"),
+        }
+        logo = Image.open(os.path.join("sources", "images", "logo.png")).convert("RGBA")
+        graphics_data[-2] = {
+            3: OverlayImageCache(image_object=logo, image_path="", coordinates=(1700, 150), max_coordinates=(0, 0),
+                                 proxy_coordinates=(0, 0), size=(200, 200), max_size=(0, 0), proxy_size=(0, 0),
+                                 opacity=1, angle=30, tags=""),
+        }
+        image_data = {index: {"file": path, "sequence_code": f"00:00:{index:02d}", "image_size": size,
+                              "in_queue": True}
+                      for index, (path, size) in enumerate(zip(self.images, self.IMAGE_SIZES))}
+        settings = {"render_overlay": True, "trim_overlay": trim_overlay, "render_sequence_code": True,
+                    "sequence_code_render_position": "se", "anti_alias": anti_alias, "include_blanks": True,
+                    "jpeg_quality": 90, "png_compression": 1, "render_workers": 1,
+                    "render_memory_budget_mb": 4096, "output_path": self.temp_folder}
+        return {"settings": settings, "highlight_opacity": 30, "overlay_size": (1920, 1080), "images": self.images,
+                "image_data": image_data, "graphics_data": graphics_data, "indices": [0, 1]}
+
+    def test_bands_match_one_piece_render(self):
+        for anti_alias in (True, False):
+            for trim_overlay in (True, False):
+                image_processor = ImageProcessor(app=None, canvas_gm=None, overlay_gm=None)
+                image_processor.configure_render(self.create_render_state(anti_alias, trim_overlay))
+                for image_index in range(len(self.images)):
+                    with self.subTest(anti_alias=anti_alias, trim_overlay=trim_overlay, image_index=image_index):
+                        image_processor.render_memory_budget = 4096 * 1024 * 1024
+                        one_piece = image_processor.render_image(image_index).convert("RGBA")
+
+                        # Bands of a few dozen rows, so the elements cross many band edges.
+                        image_processor.render_memory_budget = 1024 * 1024
+                        self.assertTrue(image_processor.is_tiled_render(image_size=self.IMAGE_SIZES[image_index]))
+                        banded = image_processor.render_image(image_index).convert("RGBA")
+
+                        self.assertEqual(one_piece.size, banded.size)
+                        self.assertIsNone(ImageChops.difference(one_piece, banded).getbbox(alpha_only=False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,220 @@
+from PIL import Image
+from collections import OrderedDict, deque
+import threading
+
+
+class ViewportImageCache:
+    """
+    Memory bounded cache of the images decoded and resized for the image canvas, least recently used first.
+        A background thread loads the images the user is likely to view next, so showing them is a cache hit.
+    """
+
+    def __init__(self, max_bytes: int, disk_cache=None):
+        """
+        Initializer for the ViewportImageCache.
+
+        Args:
+            max_bytes (int): Memory budget of the cached images in bytes.
+            disk_cache (MipCache,optional): On disk cache the images are read from before decoding the source.
+        """
+        self.max_bytes = max_bytes
+        self.disk_cache = disk_cache
+        self.images = OrderedDict()  # (path, size, resample): resized image
+        self.cache_bytes = 0
+        # Guards the cache and the prefetch requests, waited on while the prefetch thread loads a requested image.
+        self.condition = threading.Condition()
+        self.loading_key = None
+        self.prefetch_requests = deque()
+        self.prefetch_thread = None
+
+    @staticmethod
+    def get_fit_size(image_size: tuple, frame_size: tuple):
+        """
+        Gets the largest size of the image that fits the frame and keeps its aspect ratio.
+
+        Args:
+            image_size (tuple): Width and height of the image.
+            frame_size (tuple): Width and height of the frame.
+
+        Returns:
+            tuple: Width and height of the fitted image.
+
+        """
+        aspect_ratio = image_size[0] / image_size[1]
+        return (min(frame_size[0], int(frame_size[1] * aspect_ratio)),
+                min(frame_size[1], int(frame_size[0] / aspect_ratio)))
+
+    @staticmethod
+    def get_image_bytes(image):
+        """
+        Estimates the memory held by the pixels of an image.
+
+        Args:
+            image (Image): The image.
+
+        Returns:
+            int: Size in bytes.
+
+        """
+        return image.width * image.height * len(image.getbands())
+
+    @staticmethod
+    def load_image(path: str, size: tuple, resample):
+        """
+        Decodes the image and resizes it for the canvas.
+
+        Args:
+            path (str): Path of the image file.
+            size (tuple): Size to resize to.
+            resample: Resampling filter of the resize.
+
+        Returns:
+            Image: The resized image.
+
+        """
+        with Image.open(path) as image:
+            return ViewportImageCache.decode_image(image, size=size, resample=resample)
+
+    @staticmethod
+    def decode_image(image, size: tuple, resample):
+        """
+        Decodes an opened image at the smallest scale that still covers the size, then resizes it. JPEGs are decoded
+            at 1/2, 1/4 or 1/8 scale by the decoder itself, other formats are box reduced before the resize.
+
+        Args:
+            image (Image): The opened image, not loaded yet.
+            size (tuple): Size to resize to.
+            resample: Resampling filter of the resize.
+
+        Returns:
+            Image: The resized image.
+
+        """
+        if image.format == "JPEG":
+            image.draft(image.mode, size)
+        # The reduce is skipped by Pillow for NEAREST, which is already cheap.
+        return image.resize(size, resample=resample, reducing_gap=3.0)
+
+    def get_image(self, path: str, size: tuple, resample):
+        """
+        Gets the image resized for the canvas, from the cache or else loaded now. Waits for the prefetch thread
+            if it is loading the same image.
+
+        Args:
+            path (str): Path of the image file.
+            size (tuple): Size to resize to.
+            resample: Resampling filter of the resize.
+
+        Returns:
+            Image: The resized image, shared with the cache so it must not be changed.
+
+        """
+        key = (path, tuple(size), resample)
+        with self.condition:
+            while self.loading_key == key:
+                self.condition.wait()
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+                return image
+
+        image = self.read_image(path, size=size, resample=resample)
+        self.add_image(key, image)
+        return image
+
+    def read_image(self, path: str, size: tuple, resample):
+        """
+        Reads the resized image from the disk cache, or decodes the source if there is no disk cache.
+
+        Args:
+            path (str): Path of the image file.
+            size (tuple): Size to resize to.
+            resample: Resampling filter of the resize.
+
+        Returns:
+            Image: The resized image.
+
+        """
+        if self.disk_cache is None:
+            return self.load_image(path, size=size, resample=resample)
+        return self.disk_cache.get_image(path, size=size, resample=resample, load_image=self.load_image)
+
+    def add_image(self, key: tuple, image):
+        """
+        Adds an image to the cache and drops the least recently used images over the memory budget. The newest
+            image is kept even if it is over the budget on its own.
+
+        Args:
+            key (tuple): (path, size, resample)
+            image (Image): The resized image.
+
+        Returns:
+            None
+
+        """
+        with self.condition:
+            if key in self.images:
+                return
+            self.images[key] = image
+            self.cache_bytes += self.get_image_bytes(image)
+            while self.cache_bytes > self.max_bytes and len(self.images) > 1:
+                _, dropped_image = self.images.popitem(last=False)
+                self.cache_bytes -= self.get_image_bytes(dropped_image)
+
+    def prefetch(self, paths: list, frame_size: tuple, resample):
+        """
+        Loads the images in the background, fitted to the frame, in the order given. Replaces the images still
+            waiting from the last call.
+
+        Args:
+            paths (list): Paths of the images, the most likely to be viewed next first.
+            frame_size (tuple): Width and height of the canvas frame the images are fitted to.
+            resample: Resampling filter of the resize.
+
+        Returns:
+            None
+
+        """
+        with self.condition:
+            self.prefetch_requests.clear()
+            self.prefetch_requests.extend((path, tuple(frame_size), resample) for path in paths)
+            self.condition.notify_all()
+
+        if self.prefetch_thread is None:
+            self.prefetch_thread = threading.Thread(target=self.prefetch_worker, daemon=True)
+            self.prefetch_thread.start()
+
+    def prefetch_worker(self):
+        """
+        Prefetch thread, loads the requested images one at a time and waits for more once done.
+
+        Returns:
+            None
+
+        """
+        while True:
+            with self.condition:
+                while not self.prefetch_requests:
+                    self.condition.wait()
+                path, frame_size, resample = self.prefetch_requests.popleft()
+
+            try:
+                with Image.open(path) as image:  # Reads only the header.
+                    size = self.get_fit_size(image.size, frame_size=frame_size)
+            except Exception:  # Reported when the image is viewed, the prefetch only skips it.
+                continue
+
+            key = (path, size, resample)
+            with self.condition:
+                if key in self.images:
+                    self.images.move_to_end(key)
+                    continue
+                self.loading_key = key
+            try:
+                self.add_image(key, self.read_image(path, size=size, resample=resample))
+            except Exception:
+                pass
+            finally:
+                with self.condition:
+                    self.loading_key = None
+                    self.condition.notify_all()